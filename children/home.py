@@ -0,0 +1,125 @@
+# children/home.py
+"""
+Child home screen.
+
+The app used to open with six calls (earning meter, earning totals, goal summary,
+moneymaze dashboard, weekly streak and the chore list), each authenticating again and
+reading the wallet again. ``build_home()`` renders all six sections from one load:
+
+- the wallet row carries the moneymaze and chore counts as subquery annotations;
+- the cached sections (total concepts, goal summary) come from one ``get_many``;
+- the last seven days of earnings come back already summed per day and type
+  (earningmeter/summary.py, shared with EarningMeterView);
+- chores come through ``child.chores`` so ``child_name`` never re-reads the child,
+  first page only (``count`` tells the app whether to open the full list).
+
+Each section keeps the shape and serializer of the endpoint it replaces, so the app
+can switch over one screen at a time. ``home_etag()`` hashes the rendered body for
+``If-None-Match`` revalidation (ChildHomeView).
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from chorequest.serializers import ChoreQuestSerializer
+from earningmeter.serializers import EarningTotalsSerializer
+from earningmeter.summary import earning_meter
+from familywallet.models import ChildWallet
+from goalgetter.models import Goal
+from goalgetter.serializers import GoalSummarySerializer
+from moneymaze.models import Concept, ConceptProgress, RewardEarned, WeeklyStreak
+from moneymaze.serializers import DashboardSerializer, WeeklyStreakSerializer
+from moneymaze.views import TOTAL_CONCEPTS_CACHE_KEY, TOTAL_CONCEPTS_CACHE_TIMEOUT
+from taskmaster.models import Chore
+
+
+def _count(queryset, field='child'):
+    return Coalesce(
+        Subquery(queryset.order_by().values(field).annotate(n=Count('pk')).values('n')[:1]),
+        Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _load_wallet(child):
+    return ChildWallet.objects.filter(child_id=child.id).only(
+        'balance', 'total_earned', 'total_spent'
+    ).annotate(
+        concepts_completed=_count(ConceptProgress.objects.filter(child_id=OuterRef('child_id'), completed=True)),
+        rewards_earned=_count(RewardEarned.objects.filter(child_id=OuterRef('child_id'))),
+        chores_count=_count(Chore.objects.filter(assigned_to_id=OuterRef('child_id')), 'assigned_to'),
+    ).first()
+
+
+def _load_cached(child):
+    goal_key = Goal.summary_cache_key(child.id)
+    cached = cache.get_many([TOTAL_CONCEPTS_CACHE_KEY, goal_key])
+
+    total_concepts = cached.get(TOTAL_CONCEPTS_CACHE_KEY)
+    if total_concepts is None:
+        total_concepts = Concept.objects.count()
+        cache.set(TOTAL_CONCEPTS_CACHE_KEY, total_concepts, TOTAL_CONCEPTS_CACHE_TIMEOUT)
+
+    goal_summary = cached.get(goal_key)
+    if goal_summary is None:
+        # Goal.get_summary does the compute and the set on a miss
+        goal_summary = Goal.get_summary(child.id)
+
+    return total_concepts, goal_summary
+
+
+def _weekly_streak(child):
+    today = timezone.now().date()
+    week_start = today - timedelta(days=today.weekday())
+    streak = WeeklyStreak.objects.filter(child=child, week_start_date=week_start).first()
+    if streak is None:
+        # Render the empty week without writing; WeeklyStreakView still creates the row
+        streak = WeeklyStreak(child=child, week_start_date=week_start)
+    return WeeklyStreakSerializer(streak).data
+
+
+def _chores(child, wallet):
+    page = child.chores.order_by('-created_at', 'id')[:settings.REST_FRAMEWORK['PAGE_SIZE']]
+    return {"count": wallet.chores_count, "results": ChoreQuestSerializer(page, many=True).data}
+
+
+def build_home(child):
+    """Every home-screen section for ``child``, or None if the child has no wallet."""
+    wallet = _load_wallet(child)
+    if wallet is None:
+        return None
+    total_concepts, goal_summary = _load_cached(child)
+
+    progress_percentage = (
+        round((wallet.concepts_completed / total_concepts) * 100, 2) if total_concepts else 0
+    )
+
+    return {
+        "earning_meter": earning_meter(child, wallet),
+        "totals": EarningTotalsSerializer({
+            "total_earned": wallet.total_earned,
+            "total_saved": wallet.balance,
+            "total_spent": wallet.total_spent,
+        }).data,
+        "goals": GoalSummarySerializer(goal_summary).data,
+        "moneymaze": DashboardSerializer({
+            "concepts_completed": wallet.concepts_completed,
+            "total_concepts": total_concepts,
+            "progress_percentage": progress_percentage,
+            "rewards_earned": wallet.rewards_earned,
+        }).data,
+        "weekly_streak": _weekly_streak(child),
+        "chores": _chores(child, wallet),
+    }
+
+
+def home_etag(data):
+    body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    return f'"{hashlib.sha256(body.encode()).hexdigest()[:32]}"'
@@ -1,3 +1,4 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from children.models import Child
 from django.core.exceptions import PermissionDenied
 
@@ -5,14 +6,22 @@ class AttachChildFromHeaderMiddleware:
     """
     Middleware to attach a `request.child` based on 'X-Child-ID' header.
     """
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
         child_id = request.headers.get('X-Child-ID')
 
-        if request.user.is_authenticated and child_id:
+        if child_id and request.user.is_authenticated:
             try:
                 child = Child.objects.get(id=child_id, parent=request.user)
                 request.child = child
@@ -20,3 +29,16 @@ class AttachChildFromHeaderMiddleware:
                 raise PermissionDenied("Invalid child ID or unauthorized access.")
 
         return self.get_response(request)
+
+    async def __acall__(self, request):
+        child_id = request.headers.get('X-Child-ID')
+
+        if child_id:
+            user = await request.auser()
+            if user.is_authenticated:
+                try:
+                    request.child = await Child.objects.aget(id=child_id, parent=user)
+                except Child.DoesNotExist:
+                    raise PermissionDenied("Invalid child ID or unauthorized access.")
+
+        return await self.get_response(request)
@@ -7,4 +7,4 @@ class IsParentOfChild(permissions.BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        return obj.parent == request.user
\ No newline at end of file
+        return obj.parent_id == request.user.id
\ No newline at end of file
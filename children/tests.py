@@ -1,3 +1,78 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from children.tokens import ChildRefreshToken
+from familywallet.models import Transaction
+from waya_backend.seed import seed_family
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    OUTBOX_KICK_ON_COMMIT=False,
+)
+class ChildHomeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = seed_family(label="home", children=1, chores=15, transactions=40, goals=3)
+        cls.child = cls.parent.children.get()
+        cls.auth = f"Bearer {ChildRefreshToken.for_child(cls.child).access_token}"
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url, **headers):
+        return self.client.get(url, HTTP_AUTHORIZATION=self.auth, **headers)
+
+    def test_sections_match_the_endpoints_they_replace(self):
+        home = self.get('/api/children/home/').json()
+
+        self.assertEqual(home['earning_meter'], self.get('/api/earningmeter/dashboard/').json())
+        self.assertEqual(home['totals'], self.get('/api/earningmeter/totals/').json())
+        self.assertEqual(home['goals'], self.get('/api/goalgetter/goals/summary/').json())
+        self.assertEqual(home['moneymaze'], self.get('/api/moneymaze/dashboard/').json())
+        self.assertEqual(home['weekly_streak'], self.get('/api/moneymaze/weekly-streak/').json())
+
+        chores = self.get('/api/chorequest/chorequest/').json()
+        self.assertEqual(home['chores']['count'], chores['count'])
+        self.assertEqual(len(home['chores']['results']), len(chores['results']))
+
+    def test_weekly_summary_shares_the_earning_meter_sections(self):
+        Transaction.objects.create(
+            parent=self.parent, child=self.child, amount=Decimal("5.00"),
+            type="chore_reward", status="paid", description="Reward for today",
+        )
+        dashboard = self.get('/api/earningmeter/dashboard/').json()
+        summary = self.get('/api/earningmeter/summary/').json()
+
+        self.assertEqual(summary['recent_activities'], dashboard['recent_activities'])
+        self.assertEqual(summary['pie_chart'], dashboard['pie_chart'])
+
+        earned = Transaction.objects.filter(
+            child=self.child, type="chore_reward", status="paid",
+            created_at__gte=timezone.now() - timedelta(days=7),
+        ).aggregate(total=Sum('amount'))['total']
+        self.assertEqual(sum(Decimal(day['earned']) for day in summary['bar_chart']), earned)
+        self.assertEqual(summary['bar_chart'][-1]['day'], timezone.now().strftime("%b %d"))
+
+    def test_if_none_match_gets_304_until_something_changes(self):
+        first = self.get('/api/children/home/')
+        etag = first['ETag']
+
+        unchanged = self.get('/api/children/home/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertEqual(unchanged.content, b'')
+        self.assertEqual(unchanged['ETag'], etag)
+
+        self.child.wallet.earn(5)
+        changed = self.get('/api/children/home/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_child_without_wallet_gets_404(self):
+        self.child.wallet.delete()
+        self.assertEqual(self.get('/api/children/home/').status_code, 404)
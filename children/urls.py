@@ -6,6 +6,7 @@ from .views import (
     ChildUpdateView,
     ChildDeleteView,
     ChildLoginView,  # added
+    ChildHomeView,
 )
 
 urlpatterns = [
@@ -15,4 +16,5 @@ urlpatterns = [
     path('<uuid:pk>/update/', ChildUpdateView.as_view(), name='child-update'),
     path('<uuid:pk>/delete/', ChildDeleteView.as_view(), name='child-delete'),
     path('login/', ChildLoginView.as_view(), name='child-login'),  # added
+    path('home/', ChildHomeView.as_view(), name='child-home'),
 ]
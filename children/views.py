@@ -1,9 +1,12 @@
+from asgiref.sync import sync_to_async
 from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_vary_headers
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from children.authentication import ChildJWTAuthentication
 from children.tokens import ChildRefreshToken
+from waya_backend.async_views import AsyncAPIView
 
 from .models import Child
 from .serializers import (
@@ -12,6 +15,7 @@ from .serializers import (
     ChildUpdateSerializer,
     ChildLoginSerializer
 )
+from .home import build_home, home_etag
 from .permissions import IsParentOfChild
 
 
@@ -125,3 +129,26 @@ class ChildSelfDetailView(generics.RetrieveAPIView):
 
     def get_object(self):
         return self.request.user  # or request.child if you set both
+
+
+class ChildHomeView(AsyncAPIView):
+    """
+    GET /api/children/home/
+    Every section of the child's home screen in one response (children.home). Sends an
+    ETag of the body; a matching If-None-Match gets 304 with no body.
+    """
+    authentication_classes = [ChildJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        # One hop for the whole build, so its queries share one connection
+        data = await sync_to_async(build_home)(request.user)
+        if data is None:
+            return Response({"error": "Child wallet not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        etag = home_etag(data)
+        response = get_conditional_response(request._request, etag=etag) or Response(data)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(response, ['Authorization'])
+        return response
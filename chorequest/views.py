@@ -2,6 +2,7 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.utils import timezone
+from django.db import transaction as db_transaction
 
 from taskmaster.models import Chore
 from .serializers import (
@@ -11,7 +12,8 @@ from .serializers import (
 )
 from children.authentication import ChildJWTAuthentication
 from .permissions import IsChild
-from notifications.utils import send_notification, notify_parent_realtime
+from notifications.utils import send_notification, queue_parent_realtime
+from utils.idempotency import idempotent
 
 
 class ChoreQuestViewSet(viewsets.ReadOnlyModelViewSet):
@@ -34,21 +36,23 @@ class ChoreQuestViewSet(viewsets.ReadOnlyModelViewSet):
             if chore.assigned_to != request.child:
                 return Response({'error': 'You can only complete your own chores.'}, status=status.HTTP_403_FORBIDDEN)
 
-            chore.status = 'completed'
-            chore.completed_at = timezone.now()
-            chore.save()
+            with db_transaction.atomic():
+                chore.status = 'completed'
+                chore.completed_at = timezone.now()
+                chore.save()
 
-            notify_parent_realtime(
-                user=chore.parent,
-                message=f"{request.child.name} completed the chore '{chore.title}'",
-                chore_id=chore.id
-            )
+                queue_parent_realtime(
+                    parent_id=chore.parent_id,
+                    message=f"{request.child.name} completed the chore '{chore.title}'",
+                    chore_id=chore.id
+                )
 
             return Response({'message': 'Chore marked as completed.'}, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['post'], url_path='redeem')
+    @idempotent
     def redeem_reward(self, request):
         serializer = RedeemRewardSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
@@ -0,0 +1,112 @@
+# earningmeter/summary.py
+"""
+Earning meter sections shared by EarningMeterView, SummaryView and the child home
+screen (children/home.py).
+
+Paid earnings and spending come back already summed per day and type in one query,
+and the recent activities are read with only the columns they render.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from earningmeter.serializers import SummarySerializer
+from familywallet.models import Transaction
+
+
+def activity_status(tx):
+    if tx.status == "paid":
+        return "saved" if tx.type in ("chore_reward", "credit") else "spent"
+    if tx.status == "pending":
+        return "processing"
+    if tx.type == "debit":
+        return "spent"
+    return tx.status
+
+
+def daily_totals(child, since):
+    """Paid earnings and spending of ``child`` from ``since`` on, as two dicts keyed by date."""
+    daily = (
+        Transaction.objects.filter(
+            child=child,
+            type__in=("chore_reward", "debit"),
+            status="paid",
+            created_at__gte=since,
+        )
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'type')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+    earned_per_day = defaultdict(Decimal)
+    spent_per_day = defaultdict(Decimal)
+    for row in daily:
+        per_day = earned_per_day if row['type'] == "chore_reward" else spent_per_day
+        per_day[row['day']] += row['total']
+    return earned_per_day, spent_per_day
+
+
+def recent_activities(child, limit=5):
+    return [
+        {
+            "name": child.name,
+            "activity": tx.description,
+            "amount": f"NGN {tx.amount:.2f}",
+            "status": activity_status(tx),
+            "date": tx.created_at.strftime('%d-%B-%Y'),
+        }
+        for tx in Transaction.objects.filter(child=child)
+        .only('type', 'status', 'amount', 'description', 'created_at')
+        .order_by('-created_at')[:limit]
+    ]
+
+
+def pie_chart(wallet):
+    return {"reward_saved": wallet.balance, "reward_spent": wallet.total_spent}
+
+
+def earning_meter(child, wallet):
+    """The earning meter: every day of the last seven (today included), named by weekday."""
+    seven_days_ago = timezone.now().date() - timedelta(days=6)
+    earned_per_day, spent_per_day = daily_totals(
+        child, timezone.make_aware(datetime.combine(seven_days_ago, time.min))
+    )
+
+    bar_chart = []
+    for i in range(7):
+        day = seven_days_ago + timedelta(days=i)
+        bar_chart.append({
+            "day": day.strftime("%A"),
+            "earned": float(earned_per_day.get(day, Decimal("0.00"))),
+            "spent": float(spent_per_day.get(day, Decimal("0.00"))),
+        })
+
+    return SummarySerializer({
+        "bar_chart": bar_chart,
+        "pie_chart": pie_chart(wallet),
+        "recent_activities": recent_activities(child),
+    }).data
+
+
+def weekly_summary(child, wallet):
+    """The weekly summary: only the days of the last 7x24 hours that have activity, labelled like "Jan 05"."""
+    earned_per_day, spent_per_day = daily_totals(child, timezone.now() - timedelta(days=7))
+
+    bar_chart = [
+        {
+            "day": day.strftime("%b %d"),
+            "earned": earned_per_day.get(day, Decimal("0.00")),
+            "spent": spent_per_day.get(day, Decimal("0.00")),
+        }
+        for day in sorted(earned_per_day.keys() | spent_per_day.keys())
+    ]
+
+    return SummarySerializer({
+        "bar_chart": bar_chart,
+        "pie_chart": pie_chart(wallet),
+        "recent_activities": recent_activities(child),
+    }).data
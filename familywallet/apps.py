@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FamilywalletConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'familywallet'
+
+    def ready(self):
+        import familywallet.signals  # noqa: F401
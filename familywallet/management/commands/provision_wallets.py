@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from familywallet.provisioning import provision_wallets
+
+
+class Command(BaseCommand):
+    help = "Create every missing FamilyWallet and ChildWallet (anti-join plus bulk insert; safe to re-run)."
+
+    def handle(self, *args, **options):
+        family_wallets, child_wallets = provision_wallets()
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {family_wallets} family wallets and {child_wallets} child wallets."
+        ))
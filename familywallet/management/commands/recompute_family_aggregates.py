@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from familywallet.models import FamilyAggregate
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every parent's FamilyAggregate from the wallet and transaction tables in bulk, "
+        "reporting rows that had drifted. With --check, only report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Report drift without writing; exit 1 if any.")
+        parser.add_argument('--batch', type=int, default=1000, help="Parents per batch.")
+
+    def handle(self, *args, **options):
+        parents = User.objects.filter(role=User.ROLE_PARENT).order_by('id').values_list('id', flat=True)
+        checked = drifted = missing = 0
+        last_id = None
+
+        while True:
+            page = parents if last_id is None else parents.filter(id__gt=last_id)
+            parent_ids = list(page[:options['batch']])
+            if not parent_ids:
+                break
+            last_id = parent_ids[-1]
+
+            with transaction.atomic():
+                stored = FamilyAggregate.objects.in_bulk(parent_ids)
+                fresh = FamilyAggregate.compute(parent_ids)
+                stale = [
+                    aggregate for aggregate in fresh
+                    if aggregate.parent_id not in stored or any(
+                        getattr(aggregate, field) != getattr(stored[aggregate.parent_id], field)
+                        for field in FamilyAggregate.FIELDS
+                    )
+                ]
+                for aggregate in stale:
+                    if aggregate.parent_id in stored:
+                        drifted += 1
+                        self.stdout.write(f"  drift for parent {aggregate.parent_id}")
+                    else:
+                        missing += 1
+                if stale and not options['check']:
+                    FamilyAggregate.store(stale)
+
+            checked += len(parent_ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {checked} families: {drifted} had drifted, {missing} had no aggregate yet."
+        ))
+        if options['check'] and drifted:
+            raise CommandError(f"{drifted} family aggregates are out of date.")
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-19 12:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('children', '0004_child_children_ch_parent__6a03e7_idx_and_more'),
+        ('familywallet', '0004_alter_transaction_options_alter_allowance_amount_and_more'),
+        ('taskmaster', '0002_alter_chore_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('status', 'pending'), ('type', 'wallet_funding')), fields=['created_at'], name='tx_pending_funding_idx'),
+        ),
+    ]
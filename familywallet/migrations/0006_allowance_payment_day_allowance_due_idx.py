@@ -0,0 +1,56 @@
+# Generated by Django 5.2 on 2026-10-19 13:01
+
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import ExtractDay
+from django.utils import timezone
+
+
+def schedule_existing_allowances(apps, schema_editor):
+    # Allowances created before the payout engine were never scheduled. Same rule as
+    # Allowance.schedule_first_payment (historical models have no methods): one period
+    # after the last payment or creation, moved past now, so nothing is paid twice
+    # in a period or back-paid on the first payout run.
+    Allowance = apps.get_model('familywallet', 'Allowance')
+    now = timezone.now()
+    step = {
+        'weekly': lambda base, day: base + timedelta(weeks=1),
+        'monthly': lambda base, day: base + relativedelta(months=1, day=day),
+    }
+    unscheduled = list(Allowance.objects.filter(next_payment_date__isnull=True, frequency__in=step))
+    for allowance in unscheduled:
+        base = allowance.last_paid_at or allowance.created_at
+        allowance.payment_day = allowance.payment_day or base.day
+        next_date = step[allowance.frequency](base, allowance.payment_day)
+        while next_date <= now:
+            next_date = step[allowance.frequency](next_date, allowance.payment_day)
+        allowance.next_payment_date = next_date
+    Allowance.objects.bulk_update(unscheduled, ['next_payment_date', 'payment_day'], batch_size=1000)
+    Allowance.objects.filter(payment_day__isnull=True, next_payment_date__isnull=False).update(
+        payment_day=ExtractDay('next_payment_date')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('children', '0004_child_children_ch_parent__6a03e7_idx_and_more'),
+        ('familywallet', '0005_transaction_tx_pending_funding_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='allowance',
+            name='payment_day',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='allowance',
+            index=models.Index(fields=['status', 'next_payment_date', 'id'], name='allowance_due_idx'),
+        ),
+        migrations.RunPython(schedule_existing_allowances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-19 13:04
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('familywallet', '0006_allowance_payment_day_allowance_due_idx'),
+        ('users', '0002_alter_user_role'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FamilyAggregate',
+            fields=[
+                ('parent', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='family_aggregate', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('children_count', models.PositiveIntegerField(default=0)),
+                ('total_children_balance', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_sent', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_pending', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -1,6 +1,11 @@
+import hashlib
+import hmac
+import logging
 import uuid
+from collections import defaultdict
+from datetime import timedelta
+from dateutil.relativedelta import relativedelta
 from django.core.cache import cache
-from users.tasks import sync_wallet_stats_to_dashboard
 from decimal import Decimal
 from django.db import models, transaction as db_transaction
 from django.conf import settings
@@ -8,6 +13,10 @@ from django.utils import timezone
 from children.models import Child
 from users.models import User
 from django.contrib.auth.hashers import make_password, check_password
+from notifications import dashboard, outbox
+from notifications.models import OutboxEvent
+
+logger = logging.getLogger(__name__)
 
 class FamilyWallet(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -32,6 +41,45 @@ class FamilyWallet(models.Model):
     def check_pin(self, raw_pin):
         return check_password(raw_pin, self.pin)
 
+    def verify_pin(self, raw_pin):
+        """
+        check_pin with a short-lived grant. After one successful PBKDF2 check an HMAC of
+        the PIN is cached for WALLET_PIN_GRANT_SECONDS, so a burst of payments compares
+        HMACs instead of re-hashing. The HMAC covers the stored hash, so a PIN change
+        invalidates the grant even before set_pin revokes it. 0 disables the grant.
+        """
+        ttl = settings.WALLET_PIN_GRANT_SECONDS
+        if ttl <= 0:
+            return self.check_pin(raw_pin)
+
+        key = self.pin_grant_key(self.parent_id)
+        digest = hmac.new(
+            settings.SECRET_KEY.encode(), f"{self.id}:{self.pin}:{raw_pin}".encode(), hashlib.sha256
+        ).hexdigest()
+        try:
+            granted = cache.get(key)
+        except Exception as e:
+            logger.warning(f"[WALLET] PIN grant unavailable: {e}")
+            granted = None
+        if granted is not None and hmac.compare_digest(granted, digest):
+            return True
+
+        if not self.check_pin(raw_pin):
+            return False
+        try:
+            cache.set(key, digest, timeout=ttl)
+        except Exception as e:
+            logger.warning(f"[WALLET] Could not store PIN grant: {e}")
+        return True
+
+    @staticmethod
+    def pin_grant_key(parent_id):
+        return f"wallet:pin_grant:{parent_id}"
+
+    @classmethod
+    def revoke_pin_grant(cls, parent_id):
+        cache.delete(cls.pin_grant_key(parent_id))
+
     def add_funds(self, amount: Decimal, description: str, created_by):
         if amount <= 0:
             raise ValueError("Amount must be positive.")
@@ -47,12 +95,14 @@ class FamilyWallet(models.Model):
                 status='paid',
                 created_at=timezone.now()
             )
+            FamilyAggregate.apply_transaction(self.parent_id, amount, new_status='paid')
             # Invalidate wallet and totals cache for this parent
             self._invalidate_summary_cache()
-            sync_wallet_stats_to_dashboard.delay(self.parent_id)
+            self._queue_stats_warm()
+            self._push_balance_delta(amount)
         return transaction_obj
 
-    def create_reward_transaction(self, child, amount: Decimal, description: str):
+    def create_reward_transaction(self, child_id, amount: Decimal, description: str):
         if amount <= 0:
             raise ValueError("Amount must be positive.")
         if amount > self.balance:
@@ -62,16 +112,19 @@ class FamilyWallet(models.Model):
             self.save()
             transaction_obj = Transaction.objects.create(
                 parent=self.parent,
-                child=child,
+                child_id=child_id,
                 type='chore_reward',
                 amount=amount,
                 description=description,
                 status='paid',
                 created_at=timezone.now()
             )
+            FamilyAggregate.apply_transaction(self.parent_id, amount, new_status='paid')
             # Invalidate wallet and totals cache for this parent
             self._invalidate_summary_cache()
-            sync_wallet_stats_to_dashboard.delay(self.parent_id)
+            self._queue_stats_warm()
+            self._push_balance_delta(-amount)
+            transaction_obj.push_dashboard_delta()
         return transaction_obj
 
     def get_total_sent(self):
@@ -96,6 +149,16 @@ class FamilyWallet(models.Model):
         cache.set(cache_key, value, timeout=60*5)
         return value
 
+    def _queue_stats_warm(self):
+        """Recompute dashboard totals in a worker once the current transaction commits."""
+        outbox.enqueue(OutboxEvent.KIND_CACHE_WARM, {
+            "warmer": "wallet_stats",
+            "args": [str(self.parent_id)],
+        })
+
+    def _push_balance_delta(self, delta: Decimal):
+        dashboard.push_delta(self.parent_id, "wallet.balance", balance=self.balance, delta=delta)
+
     def _invalidate_summary_cache(self):
         """Call after any balance or transaction change for this wallet."""
         cache.delete(f"wallet:total_sent:{self.parent_id}")
@@ -140,27 +203,108 @@ class Transaction(models.Model):
             models.Index(fields=["created_at"]),
             models.Index(fields=["parent", "child"]),
             models.Index(fields=["status", "created_at"]),
+            # Reconciliation sweep over unconfirmed Paystack funding
+            models.Index(
+                fields=["created_at"],
+                name="tx_pending_funding_idx",
+                condition=models.Q(type="wallet_funding", status="pending"),
+            ),
         ]
         ordering = ["-created_at"]
 
+    @classmethod
+    def settle_wallet_funding(cls, reference, paid_amount: Decimal):
+        """
+        Credit the family wallet for a verified Paystack payment, exactly once.
+
+        The pending ``wallet_funding`` row is the ledger entry: it is marked paid and the
+        wallet balance raised in the same transaction, with both rows locked so duplicate
+        webhooks, client polls and the reconciliation sweep cannot credit twice.
+        Returns True if this call credited the wallet.
+        """
+        with db_transaction.atomic():
+            tx = cls.objects.select_for_update().filter(reference=reference, type='wallet_funding').first()
+            if tx is None or tx.status != 'pending':
+                return False
+            if paid_amount != tx.amount:
+                logger.error(
+                    f"[PAYSTACK] Amount mismatch for {reference}: paid {paid_amount}, expected {tx.amount}"
+                )
+                tx.status = 'cancelled'
+                tx.save(update_fields=['status'])
+                FamilyAggregate.apply_transaction(tx.parent_id, tx.amount, 'pending', 'cancelled')
+                return False
+
+            wallet = FamilyWallet.objects.select_for_update().get(parent_id=tx.parent_id)
+            wallet.balance += tx.amount
+            wallet.save(update_fields=['balance', 'updated_at'])
+            tx.status = 'paid'
+            tx.completed_at = timezone.now()
+            tx.save(update_fields=['status', 'completed_at'])
+            FamilyAggregate.apply_transaction(tx.parent_id, tx.amount, 'pending', 'paid')
+
+            wallet._invalidate_summary_cache()
+            wallet._queue_stats_warm()
+            wallet._push_balance_delta(tx.amount)
+        return True
+
+    @classmethod
+    def fail_wallet_funding(cls, reference, created_before=None):
+        """
+        Cancel a pending funding row Paystack reports as failed or abandoned, or (with
+        ``created_before``) one that is still unconfirmed when it expires.
+        """
+        pending = cls.objects.filter(reference=reference, type='wallet_funding', status='pending')
+        if created_before is not None:
+            pending = pending.filter(created_at__lt=created_before)
+        with db_transaction.atomic():
+            tx = pending.select_for_update().first()
+            if tx is None:
+                return False
+            tx.status = 'cancelled'
+            tx.save(update_fields=['status'])
+            FamilyAggregate.apply_transaction(tx.parent_id, tx.amount, 'pending', 'cancelled')
+        return True
+
     def complete_transaction(self):
         if self.status != 'pending':
             raise ValueError("Only pending transactions can be completed.")
-        self.status = 'paid'
-        self.completed_at = timezone.now()
-        self.save()
+        with db_transaction.atomic():
+            self.status = 'paid'
+            self.completed_at = timezone.now()
+            self.save()
+            FamilyAggregate.apply_transaction(self.parent_id, self.amount, 'pending', 'paid')
         # Invalidate parent wallet totals if this is a reward/payout
         if hasattr(self.parent, 'family_wallet'):
             self.parent.family_wallet._invalidate_summary_cache()
+        self.push_dashboard_delta(previous_status='pending')
 
     def cancel_transaction(self):
         if self.status not in ['pending', 'processing']:
             raise ValueError("Only pending or processing transactions can be cancelled.")
-        self.status = 'cancelled'
-        self.save()
+        previous_status = self.status
+        with db_transaction.atomic():
+            self.status = 'cancelled'
+            self.save()
+            FamilyAggregate.apply_transaction(self.parent_id, self.amount, previous_status, 'cancelled')
         # Invalidate on status change
         if hasattr(self.parent, 'family_wallet'):
             self.parent.family_wallet._invalidate_summary_cache()
+        self.push_dashboard_delta(previous_status=previous_status)
+
+    def push_dashboard_delta(self, previous_status=None):
+        """Tell live dashboards a chore reward was created or changed status."""
+        if self.type != 'chore_reward':
+            return
+        dashboard.push_delta(
+            self.parent_id,
+            "reward.status",
+            transaction_id=self.id,
+            child_id=self.child_id,
+            amount=self.amount,
+            previous_status=previous_status,
+            status=self.status,
+        )
 
     def __str__(self):
         child_name = self.child.name if self.child else "No Child"
@@ -186,6 +330,8 @@ class Allowance(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     last_paid_at = models.DateTimeField(null=True, blank=True)
     next_payment_date = models.DateTimeField(null=True, blank=True)
+    # Day of the month monthly allowances fall on, kept when a short month clamps it
+    payment_day = models.PositiveSmallIntegerField(null=True, blank=True)
 
     class Meta:
         indexes = [
@@ -195,18 +341,48 @@ class Allowance(models.Model):
             models.Index(fields=["frequency"]),
             models.Index(fields=["created_at"]),
             models.Index(fields=["parent", "child"]),
+            # Payout engine: due allowances in (next_payment_date, id) keyset order
+            models.Index(fields=["status", "next_payment_date", "id"], name="allowance_due_idx"),
         ]
 
     def __str__(self):
         return f"{self.child.name} - {self.amount} ({self.frequency})"
 
+    def save(self, *args, **kwargs):
+        if self.next_payment_date is None:
+            self.schedule_first_payment()
+        super().save(*args, **kwargs)
+
+    def schedule_first_payment(self, now=None):
+        """
+        Set next_payment_date for an allowance that has none: one period after it was
+        last paid (or created), moved past ``now`` the way the payout engine moves a
+        paid allowance, so an allowance paid this period is not paid again and missed
+        periods are not back-paid.
+        """
+        now = now or timezone.now()
+        self.next_payment_date = self.last_paid_at or self.created_at or now
+        if self.payment_day is None:
+            self.payment_day = self.next_payment_date.day
+        next_date = self.schedule_next_payment()
+        while next_date is not None and next_date <= now:
+            self.next_payment_date = next_date
+            next_date = self.schedule_next_payment()
+        self.next_payment_date = next_date
+
     def schedule_next_payment(self):
-        if self.last_paid_at is None:
+        """
+        The payment date after the current one. Monthly allowances keep their
+        payment_day: one paid on the 31st falls on the 28th/29th in February and
+        on the 31st again in March.
+        """
+        base = self.next_payment_date or self.last_paid_at
+        if base is None:
             return None
         if self.frequency == "weekly":
-            return self.last_paid_at + timezone.timedelta(weeks=1)
+            return base + timedelta(weeks=1)
         elif self.frequency == "monthly":
-            return self.last_paid_at + timezone.timedelta(days=30)
+            return base + relativedelta(months=1, day=self.payment_day or base.day)
         return None
 
 class ChildWallet(models.Model):
@@ -222,21 +398,42 @@ class ChildWallet(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with db_transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                FamilyAggregate.apply(self.child.parent_id, children_count=1, total_children_balance=self.balance)
+
     def earn(self, amount: Decimal):
+        with db_transaction.atomic():
+            spendable = self.apply_earning(amount)
+            self.save()
+            FamilyAggregate.apply(self.child.parent_id, total_children_balance=spendable)
+        self._invalidate_cache()
+        self._push_dashboard_delta()
+
+    def apply_earning(self, amount: Decimal):
+        """
+        Credit ``amount`` in memory, keeping savings_rate percent of it out of the
+        spendable balance. Returns the balance increase.
+        """
         savings = amount * (self.savings_rate / Decimal('100'))
         spendable = amount - savings
         self.balance += spendable
         self.total_earned += amount
-        self.save()
-        self._invalidate_cache()
+        return spendable
 
     def spend(self, amount: Decimal):
         if amount > self.balance:
             raise ValueError("Insufficient balance")
-        self.balance -= amount
-        self.total_spent += amount
-        self.save()
+        with db_transaction.atomic():
+            self.balance -= amount
+            self.total_spent += amount
+            self.save()
+            FamilyAggregate.apply(self.child.parent_id, total_children_balance=-amount)
         self._invalidate_cache()
+        self._push_dashboard_delta()
 
     def get_summary(self):
         """Cached summary for child wallet - balance, earned, spent"""
@@ -255,5 +452,117 @@ class ChildWallet(models.Model):
     def _invalidate_cache(self):
         cache.delete(f"child_wallet_summary:{self.child_id}")
 
+    def _push_dashboard_delta(self):
+        dashboard.push_delta(
+            self.child.parent_id,
+            "child_wallet.balance",
+            child_id=self.child_id,
+            balance=self.balance,
+            total_earned=self.total_earned,
+            total_spent=self.total_spent,
+        )
+
     def __str__(self):
         return f"{self.child.name}'s Wallet"
+
+
+class FamilyAggregate(models.Model):
+    """
+    Denormalized dashboard totals for one parent, read with a single primary-key lookup.
+
+    Every wallet mutation path applies its deltas with ``apply()`` / ``apply_transaction()``
+    in the same database transaction as the change itself, after writing the source rows,
+    so the row commits (or rolls back) together with them. Rows are created with the
+    family wallet (familywallet.provisioning); one still missing is computed from the
+    source tables by the first write or read. ``manage.py recompute_family_aggregates``
+    verifies or rebuilds all of them.
+    """
+    # Transaction status -> the total it counts towards (as get_total_sent/get_total_pending)
+    STATUS_FIELDS = {"paid": "total_sent", "pending": "total_pending"}
+    FIELDS = ["children_count", "total_children_balance", "total_sent", "total_pending"]
+
+    parent = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="family_aggregate")
+    children_count = models.PositiveIntegerField(default=0)
+    total_children_balance = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_sent = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_pending = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def apply(cls, parent_id, **deltas):
+        """Add ``deltas`` (field=amount) to the parent's row, atomically in the database."""
+        deltas = {field: models.F(field) + value for field, value in deltas.items() if value}
+        if not deltas:
+            return
+        if cls.objects.filter(pk=parent_id).update(updated_at=timezone.now(), **deltas):
+            return
+        with db_transaction.atomic():
+            # No row yet. Concurrent first writes queue on the parent's user row: the
+            # first builds the row from the source tables, which already hold this
+            # change, and the rest find it and apply their deltas to it
+            User.objects.select_for_update().filter(pk=parent_id).values_list('pk').first()
+            if not cls.objects.filter(pk=parent_id).update(updated_at=timezone.now(), **deltas):
+                cls.recompute([parent_id])
+
+    @classmethod
+    def apply_transaction(cls, parent_id, amount, old_status=None, new_status=None):
+        """Account for a transaction created (``old_status=None``), deleted or changing status."""
+        deltas = defaultdict(Decimal)
+        if old_status in cls.STATUS_FIELDS:
+            deltas[cls.STATUS_FIELDS[old_status]] -= amount
+        if new_status in cls.STATUS_FIELDS:
+            deltas[cls.STATUS_FIELDS[new_status]] += amount
+        cls.apply(parent_id, **deltas)
+
+    @classmethod
+    def compute(cls, parent_ids):
+        """Unsaved aggregates for ``parent_ids`` from the source tables, in two grouped queries."""
+        aggregates = {parent_id: cls(parent_id=parent_id) for parent_id in parent_ids}
+        wallet_totals = (
+            ChildWallet.objects.filter(child__parent_id__in=parent_ids)
+            .values("child__parent_id")
+            .annotate(count=models.Count("id"), balance=models.Sum("balance"))
+        )
+        for row in wallet_totals:
+            aggregate = aggregates[row["child__parent_id"]]
+            aggregate.children_count = row["count"]
+            aggregate.total_children_balance = row["balance"]
+        transaction_totals = (
+            Transaction.objects.filter(parent_id__in=parent_ids, status__in=cls.STATUS_FIELDS)
+            .values("parent_id")
+            .annotate(**{
+                field: models.Sum("amount", filter=models.Q(status=status))
+                for status, field in cls.STATUS_FIELDS.items()
+            })
+        )
+        for row in transaction_totals:
+            aggregate = aggregates[row["parent_id"]]
+            for field in cls.STATUS_FIELDS.values():
+                setattr(aggregate, field, row[field] or Decimal('0.00'))
+        return list(aggregates.values())
+
+    @classmethod
+    def recompute(cls, parent_ids):
+        """Rebuild the rows for ``parent_ids`` from the source tables."""
+        return cls.store(cls.compute(parent_ids))
+
+    @classmethod
+    def store(cls, aggregates):
+        """Insert or overwrite computed rows with one upsert."""
+        now = timezone.now()
+        for aggregate in aggregates:
+            aggregate.updated_at = now
+        cls.objects.bulk_create(
+            aggregates, update_conflicts=True, unique_fields=["parent"], update_fields=cls.FIELDS + ["updated_at"]
+        )
+        return aggregates
+
+    @classmethod
+    def for_parent(cls, parent_id):
+        aggregate = cls.objects.filter(pk=parent_id).first()
+        if aggregate is None:
+            aggregate, = cls.recompute([parent_id])
+        return aggregate
+
+    def __str__(self):
+        return f"Family aggregate for {self.parent_id}"
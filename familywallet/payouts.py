@@ -0,0 +1,165 @@
+# familywallet/payouts.py
+"""
+Allowance payout engine.
+
+The ``schedule_allowance_payouts`` beat task walks active allowances due by a cut-off
+in (next_payment_date, id) keyset order over ``allowance_due_idx``, reading only ids,
+and fans them out as ``pay_allowance_batch`` tasks of ALLOWANCE_PAYOUT_BATCH_SIZE on the
+money queue. 100k due allowances are 200 index range scans and 200 tasks, which any
+number of workers can pay in parallel.
+
+``pay_batch`` pays one batch in a single transaction:
+
+- The allowances are locked with ``select_for_update(skip_locked=True)`` and re-checked
+  against the cut-off, so an allowance another worker holds or has already paid is
+  skipped, never paid twice.
+- Family and child wallets are locked in id order (so concurrent batches cannot
+  deadlock), debited and credited in memory and written back with ``bulk_update``,
+  with one ``bulk_create`` for the ledger rows and one FamilyAggregate update per parent.
+- Each paid allowance moves to its next payment date after the cut-off. Missed periods
+  (e.g. after an outage) are not back-paid.
+
+Allowances whose family wallet cannot cover them, or whose child has no wallet yet,
+stay due and are retried on the next run.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from notifications import dashboard
+
+from .models import Allowance, ChildWallet, FamilyAggregate, FamilyWallet, Transaction
+
+logger = logging.getLogger(__name__)
+
+
+def iter_due_batches(due_before, batch_size=None):
+    """Yield lists of due allowance ids, walking the keyset without OFFSET."""
+    batch_size = batch_size or settings.ALLOWANCE_PAYOUT_BATCH_SIZE
+    due = Allowance.objects.filter(status="active", next_payment_date__lte=due_before)
+    last = None
+
+    while True:
+        page = due
+        if last is not None:
+            last_date, last_id = last
+            page = page.filter(
+                Q(next_payment_date__gt=last_date) | Q(next_payment_date=last_date, id__gt=last_id)
+            )
+        rows = list(page.order_by("next_payment_date", "id").values_list("next_payment_date", "id")[:batch_size])
+        if not rows:
+            return
+        yield [allowance_id for _, allowance_id in rows]
+        if len(rows) < batch_size:
+            return
+        last = rows[-1]
+
+
+def _advance(allowance, due_before):
+    next_date = allowance.schedule_next_payment()
+    while next_date is not None and next_date <= due_before:
+        allowance.next_payment_date = next_date
+        next_date = allowance.schedule_next_payment()
+    allowance.next_payment_date = next_date
+
+
+def pay_batch(allowance_ids, due_before):
+    """Pay the given allowances that are still due by ``due_before``. Returns the number paid."""
+    if isinstance(due_before, str):
+        due_before = datetime.fromisoformat(due_before)
+    now = timezone.now()
+
+    with transaction.atomic():
+        allowances = list(
+            Allowance.objects.select_for_update(skip_locked=True)
+            .filter(id__in=allowance_ids, status="active", next_payment_date__lte=due_before)
+            .order_by("id")
+        )
+        if not allowances:
+            return 0
+
+        family_wallets = {
+            wallet.parent_id: wallet
+            for wallet in FamilyWallet.objects.select_for_update()
+            .filter(parent_id__in={a.parent_id for a in allowances}).order_by("id")
+        }
+        child_wallets = {
+            wallet.child_id: wallet
+            for wallet in ChildWallet.objects.select_for_update()
+            .filter(child_id__in={a.child_id for a in allowances}).order_by("id")
+        }
+
+        paid, ledger = [], []
+        debited = defaultdict(Decimal)
+        credited = defaultdict(Decimal)
+        for allowance in allowances:
+            family_wallet = family_wallets.get(allowance.parent_id)
+            child_wallet = child_wallets.get(allowance.child_id)
+            if family_wallet is None or child_wallet is None:
+                logger.warning(f"[ALLOWANCE] No wallet for allowance {allowance.id}, will retry")
+                continue
+            if family_wallet.balance < allowance.amount:
+                logger.info(f"[ALLOWANCE] Insufficient balance for allowance {allowance.id}, will retry")
+                continue
+
+            family_wallet.balance -= allowance.amount
+            debited[allowance.parent_id] += allowance.amount
+            family_wallet.updated_at = now
+            credited[allowance.parent_id] += child_wallet.apply_earning(allowance.amount)
+            child_wallet.updated_at = now
+            allowance.last_paid_at = now
+            _advance(allowance, due_before)
+            paid.append(allowance)
+            ledger.append(Transaction(
+                parent_id=allowance.parent_id,
+                child_id=allowance.child_id,
+                type="allowance_payment",
+                amount=allowance.amount,
+                description=f"{allowance.get_frequency_display()} allowance",
+                status="paid",
+                completed_at=now,
+            ))
+
+        if not paid:
+            return 0
+
+        parents = debited.keys()
+        children = {a.child_id: a.parent_id for a in paid}
+        Transaction.objects.bulk_create(ledger)
+        Allowance.objects.bulk_update(paid, ["last_paid_at", "next_payment_date"])
+        FamilyWallet.objects.bulk_update(
+            [family_wallets[parent_id] for parent_id in parents], ["balance", "updated_at"]
+        )
+        ChildWallet.objects.bulk_update(
+            [child_wallets[child_id] for child_id in children],
+            ["balance", "total_earned", "updated_at"],
+        )
+
+        for parent_id in parents:
+            family_wallet = family_wallets[parent_id]
+            family_wallet._invalidate_summary_cache()
+            family_wallet._queue_stats_warm()
+            family_wallet._push_balance_delta(-debited[parent_id])
+            FamilyAggregate.apply(
+                parent_id, total_sent=debited[parent_id], total_children_balance=credited[parent_id]
+            )
+        for child_id, parent_id in children.items():
+            child_wallet = child_wallets[child_id]
+            child_wallet._invalidate_cache()
+            dashboard.push_delta(
+                parent_id,
+                "child_wallet.balance",
+                child_id=child_id,
+                balance=child_wallet.balance,
+                total_earned=child_wallet.total_earned,
+                total_spent=child_wallet.total_spent,
+            )
+
+    logger.info(f"[ALLOWANCE] Paid {len(paid)} of {len(allowance_ids)} allowances")
+    return len(paid)
@@ -28,7 +28,7 @@ class IsOwnerOfWallet(BasePermission):
     Custom permission to only allow the parent owner of a wallet to see it.
     """
     def has_object_permission(self, request, view, obj):
-        return obj.parent == request.user
+        return obj.parent_id == request.user.id
 
 class IsFamilyMemberForTransaction(BasePermission):
     """
@@ -37,11 +37,11 @@ class IsFamilyMemberForTransaction(BasePermission):
     - A child can only see transactions they are directly involved in.
     """
     def has_object_permission(self, request, view, obj):
-        user = request.user
         # The parent who owns the family wallet is always allowed.
-        if obj.family_wallet.parent == user:
+        if obj.parent_id == request.user.id:
             return True
-        # The child involved in the transaction is allowed.
-        if user.role == User.ROLE_CHILD and obj.child and obj.child.user == user:
+        # The child involved in the transaction is allowed (ChildJWTAuthentication sets request.child).
+        child = getattr(request, 'child', None)
+        if child is not None and obj.child_id == child.id:
             return True
         return False
\ No newline at end of file
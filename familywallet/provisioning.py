@@ -0,0 +1,64 @@
+# familywallet/provisioning.py
+"""
+Wallet provisioning.
+
+Every parent needs a FamilyWallet and every child a ChildWallet. ``provision_wallets()``
+finds the missing ones with one anti-join per table (``LEFT JOIN ... IS NULL``) and
+inserts them with ``bulk_create(ignore_conflicts=True)``, so it costs the same few
+queries for one family or the whole table and is safe to run concurrently. It runs
+when a child is created (familywallet.signals), from ``set_pin`` and from
+``manage.py provision_wallets`` for existing rows.
+"""
+import logging
+
+from django.db import transaction
+
+from children.models import Child
+from users.models import User
+
+from .models import ChildWallet, FamilyAggregate, FamilyWallet
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def provision_wallets(parent_ids=None):
+    """
+    Create the missing wallets, for ``parent_ids`` only if given. New family wallets
+    have no PIN until the parent sets one. Returns (family wallets, child wallets) created.
+    """
+    parents = User.objects.filter(role=User.ROLE_PARENT, family_wallet__isnull=True)
+    children = Child.objects.filter(wallet__isnull=True)
+    if parent_ids is not None:
+        parents = parents.filter(id__in=parent_ids)
+        children = children.filter(parent_id__in=parent_ids)
+
+    with transaction.atomic():
+        missing_parents = list(parents.values_list('id', flat=True))
+        missing_children = list(children.values_list('id', 'parent_id'))
+
+        FamilyWallet.objects.bulk_create(
+            [FamilyWallet(parent_id=parent_id, pin='') for parent_id in missing_parents],
+            batch_size=BATCH_SIZE, ignore_conflicts=True,
+        )
+        # With the wallet, so the first mutation always finds a row to apply its deltas to
+        FamilyAggregate.objects.bulk_create(
+            [FamilyAggregate(parent_id=parent_id) for parent_id in missing_parents],
+            batch_size=BATCH_SIZE, ignore_conflicts=True,
+        )
+        ChildWallet.objects.bulk_create(
+            [ChildWallet(child_id=child_id) for child_id, _ in missing_children],
+            batch_size=BATCH_SIZE, ignore_conflicts=True,
+        )
+
+        # bulk_create skips ChildWallet.save(), which keeps children_count in step
+        affected = sorted({parent_id for _, parent_id in missing_children}, key=str)
+        for start in range(0, len(affected), BATCH_SIZE):
+            FamilyAggregate.recompute(affected[start:start + BATCH_SIZE])
+
+    if missing_parents or missing_children:
+        logger.info(
+            f"[WALLET] Provisioned {len(missing_parents)} family and {len(missing_children)} child wallets"
+        )
+    return len(missing_parents), len(missing_children)
@@ -1,8 +1,13 @@
 from rest_framework import serializers
 from decimal import Decimal
-from .models import FamilyWallet, ChildWallet, Transaction, Allowance
+from .models import FamilyWallet, ChildWallet, FamilyAggregate, Transaction, Allowance
 from children.models import Child
 from django.db import transaction as db_transaction
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+from taskmaster.models import Chore
+from utils.querysets import SerializerJoinsMixin
 
 # Family Wallet Serializer
 class FamilyWalletSerializer(serializers.ModelSerializer):
@@ -62,11 +67,14 @@ class ChildWalletSerializer(serializers.ModelSerializer):
         fields = ['id', 'child_name', 'balance', 'total_earned', 'total_spent', 'savings_rate','child_id']
 
 # Transaction Serializer
-class TransactionSerializer(serializers.ModelSerializer):
-    family_wallet_id = serializers.UUIDField(source='parent.family_wallet.id', read_only=True)
+class TransactionSerializer(SerializerJoinsMixin, serializers.ModelSerializer):
+    family_wallet_id = serializers.SerializerMethodField()
     child_id = serializers.SerializerMethodField()
     child_name = serializers.SerializerMethodField()
 
+    select_related_fields = ('child',)
+    annotations = {'family_wallet_id': F('parent__family_wallet__id')}
+
     class Meta:
         model = Transaction
         fields = [
@@ -77,8 +85,14 @@ class TransactionSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'family_wallet_id', 'created_at', 'completed_at']
 
+    def get_family_wallet_id(self, obj):
+        if hasattr(obj, 'family_wallet_id'):
+            return obj.family_wallet_id
+        # A freshly created instance, not loaded through optimize_queryset()
+        return obj.parent.family_wallet.id
+
     def get_child_id(self, obj):
-        return str(obj.child.id) if obj.child else None
+        return str(obj.child_id) if obj.child_id else None
 
     def get_child_name(self, obj):
         return obj.child.name if obj.child else "Unknown"
@@ -105,59 +119,169 @@ class MakePaymentSerializer(serializers.Serializer):
 
     def validate(self, data):
         user = self.context['request'].user
-        try:
-            wallet = FamilyWallet.objects.get(parent=user)
-        except FamilyWallet.DoesNotExist:
+        # Wallet and child ownership in one query
+        wallet = FamilyWallet.objects.filter(parent_id=user.id).annotate(
+            child_ok=Exists(Child.objects.filter(id=data['child_id'], parent_id=OuterRef('parent_id')))
+        ).first()
+        if wallet is None:
             raise serializers.ValidationError("Family wallet not found.")
 
-        if not wallet.check_pin(data['pin']):
+        if not wallet.verify_pin(data['pin']):
             raise serializers.ValidationError("Invalid PIN.")
 
         if wallet.balance < data['amount']:
             raise serializers.ValidationError("Insufficient wallet balance.")
 
-        try:
-            child = Child.objects.get(id=data['child_id'], parent=user)
-        except Child.DoesNotExist:
+        if not wallet.child_ok:
             raise serializers.ValidationError("Invalid child.")
 
         data['wallet'] = wallet
-        data['child'] = child
         return data
 
     def create(self, validated_data):
-        wallet = validated_data['wallet']
-        child = validated_data['child']
         amount = validated_data['amount']
         chore_id = validated_data['chore_id']
 
         # Deduct balance and create transaction atomically
         with db_transaction.atomic():
+            wallet = FamilyWallet.objects.select_for_update().get(pk=validated_data['wallet'].pk)
+            # Re-checked under the lock: a concurrent request may have spent the balance
+            if wallet.balance < amount:
+                raise serializers.ValidationError("Insufficient wallet balance.")
             wallet.balance -= amount
-            wallet.save()
+            wallet.save(update_fields=['balance', 'updated_at'])
 
             txn = Transaction.objects.create(
-                parent=wallet.parent,
-                child=child,
+                parent_id=wallet.parent_id,
+                child_id=validated_data['child_id'],
                 chore_id=chore_id,
                 amount=amount,
                 type='chore_reward',
                 status='paid',
                 description=f"Reward for chore {chore_id}"
             )
+            FamilyAggregate.apply_transaction(wallet.parent_id, amount, new_status='paid')
+            wallet._push_balance_delta(-amount)
+            txn.push_dashboard_delta()
         return txn
 
 
+# Pay Chores Serializer
+class PayChoresSerializer(serializers.Serializer):
+    """
+    Pay the rewards of several chores at once. Wallet, chores (with their children) and
+    earlier payouts are each checked with one query, then every reward is written in
+    one transaction under a lock on the family wallet. Only completed or approved
+    chores can be paid.
+    """
+    chore_ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False)
+    pin = serializers.CharField(max_length=4)
+
+    def validate_chore_ids(self, value):
+        value = list(dict.fromkeys(value))
+        if len(value) > settings.WALLET_MAX_CHORE_PAYOUTS:
+            raise serializers.ValidationError(
+                f"At most {settings.WALLET_MAX_CHORE_PAYOUTS} chores can be paid at once."
+            )
+        return value
+
+    def validate(self, data):
+        user = self.context['request'].user
+        chore_ids = data['chore_ids']
+
+        wallet = FamilyWallet.objects.filter(parent_id=user.id).first()
+        if wallet is None:
+            raise serializers.ValidationError("Family wallet not found.")
+        if not wallet.verify_pin(data['pin']):
+            raise serializers.ValidationError("Invalid PIN.")
+
+        chores = list(
+            Chore.objects.filter(id__in=chore_ids, parent_id=user.id, assigned_to__parent_id=user.id)
+            .values('id', 'assigned_to_id', 'reward', 'status')
+        )
+        unknown = set(chore_ids) - {chore['id'] for chore in chores}
+        if unknown:
+            raise serializers.ValidationError(
+                {"chore_ids": [f"Chore {chore_id} not found." for chore_id in sorted(unknown, key=str)]}
+            )
+
+        payable = (Chore.STATUS_COMPLETED, Chore.STATUS_APPROVED)
+        not_payable = sorted((chore['id'] for chore in chores if chore['status'] not in payable), key=str)
+        if not_payable:
+            raise serializers.ValidationError(
+                {"chore_ids": [f"Chore {chore_id} is not completed and cannot be paid." for chore_id in not_payable]}
+            )
+
+        already_paid = set(
+            Transaction.objects.filter(chore_id__in=chore_ids, type='chore_reward', status='paid')
+            .values_list('chore_id', flat=True)
+        )
+        if already_paid:
+            raise serializers.ValidationError(
+                {"chore_ids": [f"Chore {chore_id} is already paid." for chore_id in sorted(already_paid, key=str)]}
+            )
+
+        total = sum((chore['reward'] for chore in chores), Decimal('0.00'))
+        if wallet.balance < total:
+            raise serializers.ValidationError("Insufficient wallet balance.")
+
+        data['chores'] = chores
+        data['total'] = total
+        return data
+
+    def create(self, validated_data):
+        user = self.context['request'].user
+        chores = validated_data['chores']
+        total = validated_data['total']
+
+        with db_transaction.atomic():
+            wallet = FamilyWallet.objects.select_for_update().get(parent_id=user.id)
+            # Re-checked under the lock: a concurrent request may have spent the balance
+            # or paid the same chores
+            if wallet.balance < total:
+                raise serializers.ValidationError("Insufficient wallet balance.")
+            if Transaction.objects.filter(
+                chore_id__in=[chore['id'] for chore in chores], type='chore_reward', status='paid'
+            ).exists():
+                raise serializers.ValidationError({"chore_ids": ["Some chores are already paid."]})
+            wallet.balance -= total
+            wallet.save(update_fields=['balance', 'updated_at'])
+
+            now = timezone.now()
+            transactions = Transaction.objects.bulk_create([
+                Transaction(
+                    parent_id=user.id,
+                    child_id=chore['assigned_to_id'],
+                    chore_id=chore['id'],
+                    amount=chore['reward'],
+                    type='chore_reward',
+                    status='paid',
+                    description=f"Reward for chore {chore['id']}",
+                    completed_at=now,
+                )
+                for chore in chores
+            ])
+            FamilyAggregate.apply_transaction(user.id, total, new_status='paid')
+            wallet._invalidate_summary_cache()
+            wallet._queue_stats_warm()
+            wallet._push_balance_delta(-total)
+            for txn in transactions:
+                txn.push_dashboard_delta()
+        return wallet, transactions
+
+
 # Savings Activity Breakdown Serializer
-class SavingsActivitySerializer(serializers.ModelSerializer):
+class SavingsActivitySerializer(SerializerJoinsMixin, serializers.ModelSerializer):
     child_name = serializers.CharField(source='child.name')
     child_id = serializers.UUIDField(source='child.id')
     activity = serializers.CharField(source='chore.title', default="Allowance")
     formatted_date = serializers.SerializerMethodField()
 
+    select_related_fields = ('child', 'chore')
+
     class Meta:
         model = Transaction
-        fields = ['child_name', 'activity', 'amount', 'status', 'formatted_date']
+        fields = ['child_name', 'child_id', 'activity', 'amount', 'status', 'formatted_date']
 
     def get_formatted_date(self, obj):
         return obj.created_at.strftime("%d-%B-%Y")
@@ -214,7 +338,7 @@ class AllowanceSerializer(serializers.ModelSerializer):
         Ensure the child exists and belongs to the authenticated parent.
         """
         user = self.context['request'].user
-        if not Child.objects.filter(id=value, parent=user).exists():
+        if not user.owns_child(value):
             raise serializers.ValidationError("Child not found or does not belong to you.")
         return value
 
@@ -0,0 +1,27 @@
+# familywallet/signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from children.models import Child
+from familywallet.models import ChildWallet, FamilyAggregate, Transaction
+from familywallet.provisioning import provision_wallets
+
+
+@receiver(post_save, sender=Child)
+def child_created(sender, instance, created, **kwargs):
+    if created:
+        provision_wallets(parent_ids=[instance.parent_id])
+
+
+# Deletes (admin, cascades from a deleted child) bypass the wallet mutation paths
+@receiver(post_delete, sender=ChildWallet)
+def child_wallet_deleted(sender, instance, **kwargs):
+    parent_id = Child.objects.filter(pk=instance.child_id).values_list('parent_id', flat=True).first()
+    if parent_id is not None:
+        FamilyAggregate.apply(parent_id, children_count=-1, total_children_balance=-instance.balance)
+
+
+@receiver(post_delete, sender=Transaction)
+def transaction_deleted(sender, instance, **kwargs):
+    FamilyAggregate.apply_transaction(instance.parent_id, instance.amount, old_status=instance.status)
@@ -0,0 +1,82 @@
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from familywallet import payouts
+from familywallet.models import Transaction
+from utils.paystack import PaystackUnavailable, verify_payment
+
+logger = logging.getLogger(__name__)
+
+FAILED_STATUSES = {"failed", "abandoned", "reversed"}
+
+
+@shared_task(bind=True, ignore_result=True, max_retries=5, default_retry_delay=30)
+def verify_wallet_funding(self, reference):
+    """
+    Verify a Paystack funding reference and settle it. Safe to run any number of times
+    per reference (webhook retries, client polls, the reconciliation sweep):
+    Transaction.settle_wallet_funding credits at most once.
+    """
+    try:
+        response = verify_payment(reference)
+    except PaystackUnavailable as exc:
+        raise self.retry(exc=exc)
+
+    data = response.get("data") or {}
+    payment_status = data.get("status")
+
+    if response.get("status") and payment_status == "success":
+        paid_amount = Decimal(data["amount"]) / 100  # kobo
+        if Transaction.settle_wallet_funding(reference, paid_amount):
+            logger.info(f"[PAYSTACK] Credited wallet for {reference}")
+        return
+
+    if payment_status in FAILED_STATUSES:
+        Transaction.fail_wallet_funding(reference)
+        return
+
+    # Unknown to Paystack or still in progress: leave it for the sweep until it expires
+    expired_before = timezone.now() - timedelta(hours=settings.PAYSTACK_FUNDING_EXPIRY_HOURS)
+    Transaction.fail_wallet_funding(reference, created_before=expired_before)
+
+
+@shared_task(ignore_result=True)
+def reconcile_wallet_funding():
+    """
+    Re-verify funding rows still pending PAYSTACK_RECONCILE_AFTER_MINUTES after they
+    were created, i.e. whose webhook never arrived or failed. Oldest first, at most
+    PAYSTACK_RECONCILE_BATCH_SIZE per run; the rest are picked up by the next run.
+    """
+    stale_before = timezone.now() - timedelta(minutes=settings.PAYSTACK_RECONCILE_AFTER_MINUTES)
+    references = list(
+        Transaction.objects.filter(type='wallet_funding', status='pending', created_at__lt=stale_before)
+        .order_by('created_at')
+        .values_list('reference', flat=True)[:settings.PAYSTACK_RECONCILE_BATCH_SIZE]
+    )
+    for reference in references:
+        verify_wallet_funding.delay(reference)
+    return len(references)
+
+
+@shared_task(ignore_result=True)
+def schedule_allowance_payouts():
+    """
+    Fan due allowances out to pay_allowance_batch tasks. Everything due at the start of
+    the run is covered; allowances that fall due meanwhile wait for the next run.
+    """
+    due_before = timezone.now()
+    batches = 0
+    for allowance_ids in payouts.iter_due_batches(due_before):
+        pay_allowance_batch.delay([str(allowance_id) for allowance_id in allowance_ids], due_before.isoformat())
+        batches += 1
+    return batches
+
+
+@shared_task(ignore_result=True)
+def pay_allowance_batch(allowance_ids, due_before):
+    return payouts.pay_batch(allowance_ids, due_before)
@@ -1,3 +1,520 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import json
+from importlib import import_module
+from io import StringIO
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import requests
+from asgiref.sync import async_to_sync
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import models
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from familywallet import payouts
+from children.models import Child
+from familywallet.models import Allowance, ChildWallet, FamilyAggregate, FamilyWallet, Transaction
+from familywallet.serializers import MakePaymentSerializer, SavingsActivitySerializer, TransactionSerializer
+from familywallet.views import TransactionViewSet
+from notifications import outbox
+from users.models import User
+from users.tokens import WayaRefreshToken
+from utils import paystack
+from utils.paystack_stub import PaystackStub
+from waya_backend.celery import app as celery_app
+from taskmaster.models import Chore
+from waya_backend.seed import DEFAULT_PIN, seed_family
+
+
+@override_settings(
+    PAYSTACK_SECRET_KEY="sk_test_stub",
+    PAYSTACK_READ_TIMEOUT=0.5,
+    PAYSTACK_MAX_RETRIES=2,
+    PAYSTACK_RETRY_BACKOFF=0.01,
+    PAYSTACK_BREAKER_THRESHOLD=2,
+    PAYSTACK_BREAKER_RESET_SECONDS=60,
+)
+class PaystackClientTests(SimpleTestCase):
+    def setUp(self):
+        self.stub = PaystackStub().start()
+        self.addCleanup(self.stub.stop)
+        settings_override = override_settings(PAYSTACK_BASE_URL=self.stub.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = paystack.PaystackClient()
+
+    def test_retries_transient_failures(self):
+        self.stub.fail_next = 2
+        response = self.client.verify_payment("ref-1")
+        self.assertTrue(response["status"])
+        self.assertEqual(len(self.stub.requests), 3)
+
+    def test_initialize_is_not_repeated_once_it_may_have_been_sent(self):
+        self.stub.fail_next = 1
+        with self.assertRaises(paystack.PaystackUnavailable):
+            self.client.initialize_payment("parent@example.com", 150, "ref-4")
+        self.assertEqual(len(self.stub.requests), 1)
+
+        self.stub.latency = 1
+        with self.assertRaises(paystack.PaystackUnavailable):
+            self.client.initialize_payment("parent@example.com", 150, "ref-5")
+        self.assertEqual(len(self.stub.requests), 2)
+
+    def test_initialize_retries_when_the_request_never_left(self):
+        ok = mock.Mock(status_code=200)
+        ok.json.return_value = {"status": True}
+        with mock.patch.object(
+            self.client.session, "request", side_effect=[requests.ConnectTimeout("connect"), ok]
+        ) as send:
+            response = self.client.initialize_payment("parent@example.com", 150, "ref-6")
+        self.assertTrue(response["status"])
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual(send.call_args.kwargs["json"]["amount"], 15000)
+
+    def test_read_timeout_opens_breaker(self):
+        self.stub.latency = 1
+        for _ in range(2):
+            with self.assertRaises(paystack.PaystackUnavailable):
+                self.client.verify_payment("ref-2")
+        self.assertEqual(self.client.breaker.state, "open")
+
+        calls = len(self.stub.requests)
+        with self.assertRaises(paystack.PaystackUnavailable):
+            self.client.verify_payment("ref-2")
+        self.assertEqual(len(self.stub.requests), calls)
+
+    def test_async_variant(self):
+        paystack._client = self.client
+        self.addCleanup(setattr, paystack, "_client", None)
+        response = async_to_sync(paystack.averify_payment)("ref-3")
+        self.assertEqual(response["data"]["status"], "success")
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    OUTBOX_KICK_ON_COMMIT=False,
+    PAYSTACK_SECRET_KEY="sk_test_stub",
+)
+class WalletFundingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = seed_family(label="funding", chores=0, transactions=0, goals=0)
+        cls.funding = Transaction.objects.create(
+            parent=cls.parent, type="wallet_funding", amount=Decimal("2500.00"),
+            description="Funding wallet via Paystack", status="pending", reference="fund-1",
+        )
+
+    def test_settles_once(self):
+        balance = self.parent.family_wallet.balance
+        self.assertTrue(Transaction.settle_wallet_funding("fund-1", Decimal("2500.00")))
+        self.assertFalse(Transaction.settle_wallet_funding("fund-1", Decimal("2500.00")))
+
+        self.parent.family_wallet.refresh_from_db()
+        self.assertEqual(self.parent.family_wallet.balance, balance + Decimal("2500.00"))
+        self.assertEqual(Transaction.objects.filter(parent=self.parent).count(), 1)
+
+    def test_webhook_checks_signature(self):
+        body = json.dumps({"event": "charge.success", "data": {"reference": "fund-1"}}).encode()
+        signature = hmac.new(b"sk_test_stub", body, hashlib.sha512).hexdigest()
+
+        with mock.patch("familywallet.views.verify_wallet_funding") as task:
+            rejected = self.client.post(
+                "/api/familywallet/paystack/webhook/", body, content_type="application/json",
+                HTTP_X_PAYSTACK_SIGNATURE="0" * 128,
+            )
+            accepted = self.client.post(
+                "/api/familywallet/paystack/webhook/", body, content_type="application/json",
+                HTTP_X_PAYSTACK_SIGNATURE=signature,
+            )
+
+        self.assertEqual(rejected.status_code, 401)
+        self.assertEqual(accepted.status_code, 200)
+        task.delay.assert_called_once_with("fund-1")
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    OUTBOX_KICK_ON_COMMIT=False,
+)
+class IdempotencyKeyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = seed_family(label="idem", children=1, chores=0, transactions=0, goals=0)
+        cls.child = cls.parent.children.get()
+        cls.token = str(WayaRefreshToken.for_user(cls.parent).access_token)
+
+    def transfer(self, amount, key):
+        return self.client.post(
+            "/api/familywallet/wallet/transfer/",
+            json.dumps({"child_id": str(self.child.id), "amount": amount}),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_replays_stored_response(self):
+        first = self.transfer("100.00", "transfer-1")
+        with self.assertNumQueries(0):
+            retry = self.transfer("100.00", "transfer-1")
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Transaction.objects.filter(parent=self.parent).count(), 1)
+
+    def test_rejects_key_reuse_with_different_body(self):
+        self.transfer("100.00", "transfer-2")
+        self.assertEqual(self.transfer("250.00", "transfer-2").status_code, 422)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    OUTBOX_KICK_ON_COMMIT=False,
+    OUTBOX_BATCH_SIZE=2,
+    TASK_DEBOUNCE_SECONDS=5,
+)
+class WalletStatsDebounceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = seed_family(label="debounce", chores=0, transactions=0, goals=0)
+
+    def test_burst_of_changes_recomputes_once(self):
+        wallet = self.parent.family_wallet
+        for _ in range(3):
+            wallet.add_funds(Decimal("10.00"), "Top up", self.parent)
+
+        with mock.patch("users.tasks.sync_wallet_stats_to_dashboard.apply_async") as apply_async:
+            # Drained across two batches, still one recompute
+            outbox.drain()
+
+        apply_async.assert_called_once_with(args=(str(self.parent.id),), countdown=5)
+
+    def test_queue_routing(self):
+        route = celery_app.amqp.router.route
+        self.assertEqual(route({}, "familywallet.tasks.verify_wallet_funding")["queue"].name, "money")
+        self.assertEqual(route({}, "users.tasks.send_email_task")["queue"].name, "email")
+        self.assertEqual(route({}, "users.tasks.sync_wallet_stats_to_dashboard")["queue"].name, "analytics")
+        self.assertEqual(route({}, "notifications.tasks.drain_outbox")["queue"].name, "default")
+        self.assertEqual(route({}, "notifications.tasks.drain_email_outbox")["queue"].name, "email")
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    OUTBOX_KICK_ON_COMMIT=False,
+)
+class AllowancePayoutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = seed_family(label="allowance", children=3, chores=0, transactions=0, goals=0)
+        cls.children = list(cls.parent.children.order_by('username'))
+
+    def test_monthly_schedule_keeps_payment_day(self):
+        allowance = Allowance(
+            frequency="monthly", next_payment_date=datetime(2027, 1, 31, 9, tzinfo=dt_timezone.utc), payment_day=31
+        )
+        dates = []
+        for _ in range(3):
+            allowance.next_payment_date = allowance.schedule_next_payment()
+            dates.append(allowance.next_payment_date.date().isoformat())
+        self.assertEqual(dates, ["2027-02-28", "2027-03-31", "2027-04-30"])
+
+    def test_first_payment_is_one_period_out(self):
+        allowance = Allowance.objects.create(
+            parent=self.parent, child=self.children[0], amount=Decimal("100.00"), frequency="weekly", status="active",
+        )
+        self.assertGreater(allowance.next_payment_date, timezone.now() + timedelta(days=6))
+        self.assertEqual(list(payouts.iter_due_batches(timezone.now())), [])
+
+    def test_backfill_does_not_pay_again_this_period(self):
+        now = timezone.now()
+        paid_monday = Allowance.objects.create(
+            parent=self.parent, child=self.children[0], amount=Decimal("100.00"), frequency="weekly",
+            status="active", last_paid_at=now - timedelta(days=2),
+        )
+        never_paid = Allowance.objects.create(
+            parent=self.parent, child=self.children[1], amount=Decimal("100.00"), frequency="monthly", status="active",
+        )
+        Allowance.objects.filter(created_at__gt=now - timedelta(days=1)).update(
+            created_at=now - timedelta(days=75), next_payment_date=None, payment_day=None
+        )
+
+        migration = import_module("familywallet.migrations.0006_allowance_payment_day_allowance_due_idx")
+        migration.schedule_existing_allowances(django_apps, None)
+
+        paid_monday.refresh_from_db()
+        never_paid.refresh_from_db()
+        self.assertEqual(paid_monday.next_payment_date, now + timedelta(days=5))
+        self.assertGreater(never_paid.next_payment_date, now)
+        self.assertEqual(never_paid.payment_day, (now - timedelta(days=75)).day)
+        self.assertEqual(list(payouts.iter_due_batches(now)), [])
+
+    def test_pays_due_allowances_once(self):
+        due = timezone.now() - timedelta(hours=1)
+        for child in self.children:
+            Allowance.objects.create(
+                parent=self.parent, child=child, amount=Decimal("100.00"), frequency="weekly",
+                status="active", next_payment_date=due,
+            )
+        Allowance.objects.create(
+            parent=self.parent, child=self.children[0], amount=Decimal("100.00"), frequency="weekly",
+            status="paused", next_payment_date=due,
+        )
+        balance = self.parent.family_wallet.balance
+        earned = dict(ChildWallet.objects.filter(child__in=self.children).values_list('child_id', 'total_earned'))
+
+        cutoff = timezone.now()
+        batches = list(payouts.iter_due_batches(cutoff, batch_size=2))
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+        self.assertEqual(sum(payouts.pay_batch(batch, cutoff.isoformat()) for batch in batches), 3)
+        self.assertEqual(sum(payouts.pay_batch(batch, cutoff.isoformat()) for batch in batches), 0)
+
+        self.parent.family_wallet.refresh_from_db()
+        self.assertEqual(self.parent.family_wallet.balance, balance - Decimal("300.00"))
+        self.assertEqual(
+            Transaction.objects.filter(parent=self.parent, type="allowance_payment").count(), 3
+        )
+        for wallet in ChildWallet.objects.filter(child__in=self.children):
+            self.assertEqual(wallet.total_earned, earned[wallet.child_id] + Decimal("100.00"))
+        for allowance in Allowance.objects.filter(status="active"):
+            self.assertEqual(allowance.next_payment_date, due + timedelta(weeks=1))
+
+    def test_insufficient_balance_stays_due(self):
+        wallet = self.parent.family_wallet
+        wallet.balance = Decimal("50.00")
+        wallet.save()
+        allowance = Allowance.objects.create(
+            parent=self.parent, child=self.children[0], amount=Decimal("100.00"), frequency="monthly",
+            status="active", next_payment_date=timezone.now() - timedelta(hours=1),
+        )
+        cutoff = timezone.now()
+        self.assertEqual(payouts.pay_batch([allowance.id], cutoff), 0)
+        self.assertEqual([[allowance.id]], list(payouts.iter_due_batches(cutoff)))
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    OUTBOX_KICK_ON_COMMIT=False,
+)
+class FamilyAggregateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = seed_family(label="aggregate", children=2, chores=0, transactions=20, goals=0)
+        cls.children = list(cls.parent.children.order_by('username'))
+
+    def assertAggregateFresh(self):
+        stored = FamilyAggregate.objects.get(pk=self.parent.id)
+        fresh, = FamilyAggregate.compute([self.parent.id])
+        for field in FamilyAggregate.FIELDS:
+            self.assertEqual(getattr(stored, field), getattr(fresh, field), field)
+
+    def test_mutation_paths_keep_aggregate_fresh(self):
+        wallet = self.parent.family_wallet
+        wallet.add_funds(Decimal("1000.00"), "Top up", self.parent)
+        wallet.create_reward_transaction(self.children[0].id, Decimal("150.00"), "Reward")
+
+        child_wallet = ChildWallet.objects.get(child=self.children[0])
+        child_wallet.earn(Decimal("200.00"))
+        child_wallet.spend(Decimal("50.00"))
+
+        pending = Transaction.objects.filter(parent=self.parent, status="pending").first()
+        pending.complete_transaction()
+        Transaction.objects.filter(parent=self.parent, status="paid").first().delete()
+        ChildWallet.objects.get(child=self.children[1]).delete()
+
+        self.assertAggregateFresh()
+
+    def test_transaction_update_keeps_aggregate_fresh(self):
+        parent = User.objects.get(pk=self.parent.pk)
+        pending = Transaction.objects.filter(parent=self.parent, status="pending").first()
+        update = TransactionViewSet.as_view({'patch': 'partial_update'})
+
+        request = APIRequestFactory().patch("/", {"amount": "55.00", "status": "paid"}, format="json")
+        force_authenticate(request, user=parent)
+        response = update(request, pk=pending.pk)
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertAggregateFresh()
+
+    def test_first_write_without_a_row_builds_it_from_the_source_tables(self):
+        FamilyAggregate.objects.filter(pk=self.parent.id).delete()
+        self.parent.family_wallet.add_funds(Decimal("25.00"), "Top up", self.parent)
+        self.assertAggregateFresh()
+
+    def test_recompute_command_repairs_drift(self):
+        FamilyAggregate.objects.filter(pk=self.parent.id).update(total_sent=0, children_count=7)
+        with self.assertRaises(CommandError):
+            call_command("recompute_family_aggregates", "--check", stdout=StringIO())
+        call_command("recompute_family_aggregates", stdout=StringIO())
+        self.assertAggregateFresh()
+
+
+class SerializerJoinTests(TestCase):
+    """Rendering a page must not walk any relation the serializer did not declare."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = seed_family(label="joins", children=2, chores=0, transactions=12, goals=0)
+
+    def assertRendersWithoutQueries(self, serializer_class):
+        page = list(serializer_class.optimize_queryset(Transaction.objects.filter(parent=self.parent))[:10])
+        with self.assertNumQueries(0):
+            data = serializer_class(page, many=True).data
+        self.assertEqual(len(data), 10)
+        return data
+
+    def test_transaction_serializer(self):
+        data = self.assertRendersWithoutQueries(TransactionSerializer)
+        self.assertEqual(data[0]["family_wallet_id"], self.parent.family_wallet.id)
+
+    def test_savings_activity_serializer(self):
+        self.assertRendersWithoutQueries(SavingsActivitySerializer)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    OUTBOX_KICK_ON_COMMIT=False,
+)
+class WalletProvisioningTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = User.objects.create_user(
+            "provision@example.com", "Provision Parent", password="x", role=User.ROLE_PARENT, terms_accepted=True
+        )
+
+    def test_child_creation_provisions_wallets(self):
+        Child.objects.create(parent=self.parent, username="provisionkid", name="Kid", pin="1234")
+
+        self.assertTrue(FamilyWallet.objects.filter(parent=self.parent).exists())
+        self.assertTrue(ChildWallet.objects.filter(child__parent=self.parent).exists())
+        self.assertEqual(FamilyAggregate.objects.get(pk=self.parent.id).children_count, 1)
+
+    def test_backfill_command(self):
+        # bulk_create sends no post_save, like rows created before provisioning existed
+        Child.objects.bulk_create([
+            Child(parent=self.parent, username=f"backfill{n}", name="Kid", pin="1234") for n in range(3)
+        ])
+        out = StringIO()
+        call_command("provision_wallets", stdout=out)
+        self.assertIn("Created 1 family wallets and 3 child wallets", out.getvalue())
+
+        call_command("provision_wallets", stdout=out)
+        self.assertIn("Created 0 family wallets and 0 child wallets", out.getvalue())
+        self.assertEqual(FamilyAggregate.objects.get(pk=self.parent.id).children_count, 3)
+
+    def test_set_pin(self):
+        Child.objects.bulk_create([
+            Child(parent=self.parent, username=f"pin{n}", name="Kid", pin="1234") for n in range(2)
+        ])
+        token = str(WayaRefreshToken.for_user(self.parent).access_token)
+        response = self.client.post(
+            "/api/familywallet/wallet/set_pin/", {"pin": "4321"}, HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+
+        self.assertEqual(response.json()["child_wallets_created"], 2)
+        self.assertTrue(FamilyWallet.objects.get(parent=self.parent).check_pin("4321"))
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    OUTBOX_KICK_ON_COMMIT=False,
+    WALLET_PIN_GRANT_SECONDS=300,
+)
+class WalletPaymentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = seed_family(label="payments", children=2, chores=10, transactions=0, goals=0)
+        chores = Chore.objects.filter(parent=cls.parent)
+        chores.update(status=Chore.STATUS_COMPLETED)
+        cls.chore_ids = [str(chore_id) for chore_id in chores.values_list('id', flat=True)]
+
+    def setUp(self):
+        cache.clear()
+        # Logging in after the clear caches the parent's active status again
+        self.token = str(WayaRefreshToken.for_user(self.parent).access_token)
+
+    def post(self, path, data):
+        return self.client.post(
+            f"/api/familywallet/wallet/{path}/", json.dumps(data), content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+
+    def test_pin_grant_skips_rehashing_until_pin_changes(self):
+        wallet = self.parent.family_wallet
+        with mock.patch.object(type(wallet), "check_pin", autospec=True, side_effect=type(wallet).check_pin) as check:
+            self.assertTrue(wallet.verify_pin(DEFAULT_PIN))
+            self.assertTrue(wallet.verify_pin(DEFAULT_PIN))
+            self.assertEqual(check.call_count, 1)
+            self.assertFalse(wallet.verify_pin("9999"))
+
+            self.post("set_pin", {"pin": "4321"})
+            wallet.refresh_from_db()
+            self.assertFalse(wallet.verify_pin(DEFAULT_PIN))
+            self.assertTrue(wallet.verify_pin("4321"))
+
+    def test_pay_chores_is_set_based(self):
+        balance = self.parent.family_wallet.balance
+        with CaptureQueriesContext(connection) as two:
+            first = self.post("pay_chores", {"pin": DEFAULT_PIN, "chore_ids": self.chore_ids[:2]})
+        with CaptureQueriesContext(connection) as six:
+            second = self.post("pay_chores", {"pin": DEFAULT_PIN, "chore_ids": self.chore_ids[2:8]})
+
+        self.assertEqual(first.status_code, 200, first.content)
+        self.assertEqual(second.status_code, 200, second.content)
+        self.assertEqual(len(two), len(six))
+
+        paid = Chore.objects.filter(id__in=self.chore_ids[:8]).aggregate(total=models.Sum("reward"))["total"]
+        self.parent.family_wallet.refresh_from_db()
+        self.assertEqual(self.parent.family_wallet.balance, balance - paid)
+        self.assertEqual(Transaction.objects.filter(parent=self.parent, type="chore_reward").count(), 8)
+
+        repeat = self.post("pay_chores", {"pin": DEFAULT_PIN, "chore_ids": self.chore_ids[:1]})
+        self.assertEqual(repeat.status_code, 400)
+        self.assertIn("already paid", repeat.json()["chore_ids"][0])
+
+    def test_pay_chores_rejects_unfinished_chores(self):
+        Chore.objects.filter(id=self.chore_ids[0]).update(status=Chore.STATUS_PENDING)
+        Chore.objects.filter(id=self.chore_ids[1]).update(status=Chore.STATUS_MISSED)
+        Chore.objects.filter(id=self.chore_ids[2]).update(status=Chore.STATUS_APPROVED)
+
+        response = self.post("pay_chores", {"pin": DEFAULT_PIN, "chore_ids": self.chore_ids[:3]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.json()["chore_ids"]), 2)
+        self.assertIn("cannot be paid", response.json()["chore_ids"][0])
+        self.assertFalse(Transaction.objects.filter(parent=self.parent, type="chore_reward").exists())
+
+        approved = self.post("pay_chores", {"pin": DEFAULT_PIN, "chore_ids": self.chore_ids[2:3]})
+        self.assertEqual(approved.status_code, 200, approved.content)
+
+    def test_make_payment_rechecks_balance_under_lock(self):
+        wallet = self.parent.family_wallet
+        child = self.parent.children.first()
+        data = {"pin": DEFAULT_PIN, "child_id": str(child.id), "chore_id": self.chore_ids[0]}
+
+        paid = self.post("make_payment", {**data, "amount": "10.00"})
+        self.assertEqual(paid.status_code, 200, paid.content)
+
+        # Another request spends the balance between validation and the debit
+        validate = MakePaymentSerializer.validate
+
+        def spend_after_validate(serializer, attrs):
+            attrs = validate(serializer, attrs)
+            FamilyWallet.objects.filter(pk=wallet.pk).update(balance=Decimal("5.00"))
+            return attrs
+
+        with mock.patch.object(MakePaymentSerializer, "validate", spend_after_validate):
+            response = self.post("make_payment", {**data, "amount": "10.00"})
+
+        self.assertEqual(response.status_code, 400)
+        wallet.refresh_from_db()
+        self.assertEqual(wallet.balance, Decimal("5.00"))
+        self.assertEqual(Transaction.objects.filter(parent=self.parent, type="chore_reward").count(), 1)
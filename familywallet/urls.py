@@ -5,6 +5,7 @@ from .views import (
     TransactionViewSet,
     AllowanceViewSet,
     WalletViewSet,
+    PaystackWebhookView,
 )
 
 urlpatterns = [
@@ -25,11 +26,14 @@ urlpatterns = [
     path('wallet/paystack/initiate/', FamilyWalletViewSet.as_view({'post': 'initiate_paystack_payment'}), name='wallet-paystack-initiate'),
     # Verify a Paystack payment after user completes the payment
     path('wallet/paystack/verify/', FamilyWalletViewSet.as_view({'post': 'verify_paystack_payment'}), name='wallet-paystack-verify'),
+    # Paystack event webhook (signed; queues verification)
+    path('paystack/webhook/', PaystackWebhookView.as_view(), name='paystack-webhook'),
 
 
     # WALLET PIN AND PAYMENT ENDPOINTS
     path('wallet/set_pin/', WalletViewSet.as_view({'post': 'set_pin'}), name='wallet-set-pin'),
     path('wallet/make_payment/', WalletViewSet.as_view({'post': 'make_payment'}), name='wallet-make-payment'),
+    path('wallet/pay_chores/', WalletViewSet.as_view({'post': 'pay_chores'}), name='wallet-pay-chores'),
 
     # CHILD WALLET ANALYSIS
     path('child-wallets/', ChildWalletViewSet.as_view({'get': 'list'}), name='child-wallets-list'),
@@ -1,17 +1,26 @@
 from rest_framework import viewsets, status, permissions, mixins
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from collections import defaultdict
+import hashlib
+import hmac
+import json
+import logging
 import uuid
 from .serializers import PaystackPaymentInitSerializer, PaystackPaymentVerifySerializer
 from rest_framework.decorators import action
 from django.db.models import Sum
-from utils.paystack import initialize_payment, verify_payment
+from utils.idempotency import idempotent
+from utils.querysets import OptimizedQuerysetMixin
+from utils.paystack import PaystackError, initialize_payment
+from django.conf import settings
+from .tasks import verify_wallet_funding
 
 
 from django.contrib.auth.hashers import make_password
 from .serializers import (
-    MakePaymentSerializer, WalletPinSerializer,
+    MakePaymentSerializer, PayChoresSerializer, WalletPinSerializer,
     FamilyWalletSerializer, ChildWalletSerializer,
     TransactionSerializer, DashboardStatsSerializer,
     AddFundsSerializer, CompleteTransactionSerializer,
@@ -22,8 +31,18 @@ from django.utils import timezone
 from django.db import transaction as db_transaction
 from datetime import timedelta
 from decimal import Decimal
-from .models import FamilyWallet, ChildWallet, Transaction, Allowance
-from children.models import Child
+from .models import FamilyWallet, ChildWallet, FamilyAggregate, Transaction, Allowance
+from .provisioning import provision_wallets
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_funding_verification(reference):
+    """Queue Paystack verification; if the broker is down the reconciliation sweep retries it."""
+    try:
+        verify_wallet_funding.delay(reference)
+    except Exception as e:
+        logger.warning(f"[PAYSTACK] Could not enqueue verification for {reference}: {e}")
 
 class IsParentPermission(permissions.BasePermission):
     """Allow access only to authenticated parents."""
@@ -52,21 +71,23 @@ class FamilyWalletViewSet(viewsets.ModelViewSet):
     def dashboard_stats(self, request):
         try:
             family_wallet = request.user.family_wallet
-            children_wallets = ChildWallet.objects.filter(child__parent=request.user)
-
-            stats = {
-                'family_wallet_balance': family_wallet.balance,
-                'total_rewards_sent': family_wallet.get_total_sent(),
-                'total_rewards_pending': family_wallet.get_total_pending(),
-                'children_count': children_wallets.count(),
-                'total_children_balance': children_wallets.aggregate(total=Sum('balance'))['total'] or Decimal('0.00')
-            }
-            serializer = DashboardStatsSerializer(stats)
-            return Response(serializer.data)
         except FamilyWallet.DoesNotExist:
             return Response({'error': 'Family wallet not found'}, status=status.HTTP_404_NOT_FOUND)
 
+        # Maintained by the wallet mutation paths; see FamilyAggregate
+        aggregate = FamilyAggregate.for_parent(request.user.id)
+        stats = {
+            'family_wallet_balance': family_wallet.balance,
+            'total_rewards_sent': aggregate.total_sent,
+            'total_rewards_pending': aggregate.total_pending,
+            'children_count': aggregate.children_count,
+            'total_children_balance': aggregate.total_children_balance,
+        }
+        serializer = DashboardStatsSerializer(stats)
+        return Response(serializer.data)
+
     @action(detail=False, methods=['post'])
+    @idempotent
     def add_funds(self, request):
         serializer = AddFundsSerializer(data=request.data)
         if serializer.is_valid():
@@ -124,6 +145,7 @@ class FamilyWalletViewSet(viewsets.ModelViewSet):
         return Response(breakdown_data)
 
     @action(detail=False, methods=['post'], url_path='transfer')
+    @idempotent
     def transfer(self, request):
         child_id = request.data.get('child_id')
         amount = request.data.get('amount')
@@ -138,9 +160,8 @@ class FamilyWalletViewSet(viewsets.ModelViewSet):
         except Exception:
             return Response({'error': 'Invalid amount provided.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            child = Child.objects.get(id=child_id, parent=request.user)
-        except Child.DoesNotExist:
+        # From the token's child_ids claim; the child row itself is never needed here
+        if not request.user.owns_child(child_id):
             return Response({'error': 'Child not found or does not belong to you.'}, status=status.HTTP_404_NOT_FOUND)
 
         family_wallet = request.user.family_wallet
@@ -149,7 +170,7 @@ class FamilyWalletViewSet(viewsets.ModelViewSet):
 
         try:
             transaction = family_wallet.create_reward_transaction(
-                child=child,
+                child_id=child_id,
                 amount=amount,
                 description='Manual fund transfer'
             )
@@ -264,17 +285,22 @@ class FamilyWalletViewSet(viewsets.ModelViewSet):
             amount = serializer.validated_data['amount']
             reference = str(uuid.uuid4())
 
-            response = initialize_payment(request.user.email, amount, reference)
+            try:
+                response = initialize_payment(request.user.email, amount, reference)
+            except PaystackError:
+                return Response({"error": "Payment provider unavailable. Please try again."}, status=503)
 
             if response.get("status"):
-                Transaction.objects.create(
-                    parent=request.user,
-                    type="wallet_funding",
-                    amount=amount,
-                    description="Funding wallet via Paystack",
-                    status="pending",
-                    reference=reference
-                )
+                with db_transaction.atomic():
+                    Transaction.objects.create(
+                        parent=request.user,
+                        type="wallet_funding",
+                        amount=amount,
+                        description="Funding wallet via Paystack",
+                        status="pending",
+                        reference=reference
+                    )
+                    FamilyAggregate.apply_transaction(request.user.id, amount, new_status="pending")
                 return Response({
                     "authorization_url": response["data"]["authorization_url"],
                     "reference": reference
@@ -284,6 +310,11 @@ class FamilyWalletViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'], url_path='paystack/verify')
     def verify_paystack_payment(self, request):
+        """
+        Called by the app after checkout. Verification runs in a worker (and usually the
+        webhook has already settled it), so this only reports the current state and
+        queues a verification if the payment is still pending.
+        """
         serializer = PaystackPaymentVerifySerializer(data=request.data)
         if serializer.is_valid():
             reference = serializer.validated_data['reference']
@@ -292,22 +323,47 @@ class FamilyWalletViewSet(viewsets.ModelViewSet):
                 parent=request.user,
                 reference=reference,
                 type="wallet_funding",
-                status="pending"
-            ).first()
+            ).only('status').first()
 
             if not tx:
-                return Response({"error": "Transaction not found or already processed."}, status=400)
+                return Response({"error": "Transaction not found."}, status=400)
+            if tx.status == 'paid':
+                return Response({"message": "Wallet funded successfully!", "status": tx.status}, status=200)
+            if tx.status != 'pending':
+                return Response({"error": "Verification failed.", "status": tx.status}, status=400)
+
+            enqueue_funding_verification(reference)
+            return Response({"message": "Payment verification in progress.", "status": tx.status}, status=202)
+        return Response(serializer.errors, status=400)
 
-            response = verify_payment(reference)
 
-            if response.get("data", {}).get("status") == "success":
-                wallet = request.user.family_wallet
-                wallet.add_funds(tx.amount, "Paystack Wallet Funding", request.user)
-                tx.complete_transaction()
-                return Response({"message": "Wallet funded successfully!"}, status=200)
+class PaystackWebhookView(APIView):
+    """
+    Paystack event webhook. Requests are authenticated by the HMAC-SHA512 signature of
+    the raw body (X-Paystack-Signature, keyed with the secret key). ``charge.success``
+    events queue verification of their reference; everything else is acknowledged and
+    ignored. Paystack retries non-2xx responses, so nothing slow happens here.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = []
+
+    def post(self, request):
+        body = request.body
+        expected = hmac.new(settings.PAYSTACK_SECRET_KEY.encode(), body, hashlib.sha512).hexdigest()
+        signature = request.headers.get('X-Paystack-Signature', '')
+        if not hmac.compare_digest(expected, signature):
+            return Response({"error": "Invalid signature."}, status=status.HTTP_401_UNAUTHORIZED)
 
-            return Response({"error": "Verification failed."}, status=400)
-        return Response(serializer.errors, status=400)
+        try:
+            event = json.loads(body)
+        except ValueError:
+            return Response({"error": "Invalid payload."}, status=status.HTTP_400_BAD_REQUEST)
+
+        reference = (event.get('data') or {}).get('reference')
+        if event.get('event') == 'charge.success' and reference:
+            enqueue_funding_verification(reference)
+        return Response(status=status.HTTP_200_OK)
 
 class ChildWalletViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ChildWalletSerializer
@@ -341,7 +397,7 @@ class ChildWalletViewSet(viewsets.ReadOnlyModelViewSet):
                 'total_earned': wallet.total_earned,
                 'savings_rate': wallet.savings_rate
             }
-            for wallet in ChildWallet.objects.filter(child__parent=user)
+            for wallet in ChildWallet.objects.filter(child__parent=user).select_related('child')
         ]
 
         return Response({
@@ -353,12 +409,12 @@ class ChildWalletViewSet(viewsets.ReadOnlyModelViewSet):
         })
 
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(OptimizedQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = TransactionSerializer
     permission_classes = [IsParentPermission]
 
     def get_queryset(self):
-        queryset = Transaction.objects.filter(parent=self.request.user).select_related('child')
+        queryset = Transaction.objects.filter(parent=self.request.user)
 
         status_filter = self.request.query_params.get('status')
         type_filter = self.request.query_params.get('type')
@@ -373,6 +429,26 @@ class TransactionViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def perform_create(self, serializer):
+        with db_transaction.atomic():
+            transaction_obj = serializer.save()
+            FamilyAggregate.apply_transaction(
+                transaction_obj.parent_id, transaction_obj.amount, new_status=transaction_obj.status
+            )
+        transaction_obj.push_dashboard_delta()
+
+    def perform_update(self, serializer):
+        with db_transaction.atomic():
+            # Old values read under the row lock, so a concurrent change is not counted twice
+            old = Transaction.objects.select_for_update().only('status', 'amount').get(pk=serializer.instance.pk)
+            transaction_obj = serializer.save()
+            FamilyAggregate.apply_transaction(transaction_obj.parent_id, old.amount, old_status=old.status)
+            FamilyAggregate.apply_transaction(
+                transaction_obj.parent_id, transaction_obj.amount, new_status=transaction_obj.status
+            )
+        if old.status != transaction_obj.status or old.amount != transaction_obj.amount:
+            transaction_obj.push_dashboard_delta(previous_status=old.status)
+
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
         transaction_obj = self.get_object()
@@ -431,7 +507,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def recent_activities(self, request):
         limit = int(request.query_params.get('limit', 10))
-        transactions = self.get_queryset().order_by('-created_at')[:limit]
+        transactions = self.filter_queryset(self.get_queryset()).order_by('-created_at')[:limit]
         serializer = self.get_serializer(transactions, many=True)
         return Response(serializer.data)
 
@@ -464,31 +540,26 @@ class WalletViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin):
     def set_pin(self, request):
         serializer = WalletPinSerializer(data=request.data)
         if serializer.is_valid():
-            # Automatically create the family wallet if it doesn't exist
-            wallet, created = FamilyWallet.objects.get_or_create(parent=request.user)
-
-            # Automatically create child wallets for each child
-            children = Child.objects.filter(parent=request.user)
-            child_wallets_created = 0
-            for child in children:
-                _, cw_created = ChildWallet.objects.get_or_create(child=child)
-                if cw_created:
-                    child_wallets_created += 1
+            # Create the family wallet and any missing child wallets in a few set-based queries
+            wallets_created, child_wallets_created = provision_wallets(parent_ids=[request.user.id])
 
             # Set PIN
             pin = serializer.validated_data['pin']
-            wallet.pin = make_password(pin)
-            wallet.save()
+            FamilyWallet.objects.filter(parent_id=request.user.id).update(
+                pin=make_password(pin), updated_at=timezone.now()
+            )
+            FamilyWallet.revoke_pin_grant(request.user.id)
 
             return Response({
                 'message': 'PIN set successfully',
-                'wallet_created': created,
+                'wallet_created': bool(wallets_created),
                 'child_wallets_created': child_wallets_created
             })
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)    
     
     
     @action(detail=False, methods=['post'])
+    @idempotent
     def make_payment(self, request):
         serializer = MakePaymentSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
@@ -499,6 +570,21 @@ class WalletViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin):
                 'amount': txn.amount
             })
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['post'])
+    @idempotent
+    def pay_chores(self, request):
+        serializer = PayChoresSerializer(data=request.data, context={'request': request})
+        if serializer.is_valid():
+            wallet, transactions = serializer.save()
+            return Response({
+                'message': f'{len(transactions)} chore rewards paid',
+                'transaction_ids': [txn.id for txn in transactions],
+                'total': serializer.validated_data['total'],
+                'new_balance': wallet.balance
+            })
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
     @action(detail=False, methods=['get'])
     def pin_status(self, request):
         try:
@@ -2,9 +2,15 @@ from django.db import models
 
 # Create your models here.
 import uuid
+from decimal import Decimal
 from django.db import models
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from children.models import Child
+from cache_utils import get_or_set_cache, invalidate_cache
+
+GOAL_SUMMARY_CACHE_TIMEOUT = 60 * 5
 
 class Goal(models.Model):
     STATUS_CHOICES = [
@@ -64,6 +70,37 @@ class Goal(models.Model):
                 self.trophy_type = 'bronze'
                 self.trophy_image = 'trophies/bronze_trophy.png'
             self.save()
+
+    @staticmethod
+    def summary_cache_key(child_id):
+        return f"goal_summary:{child_id}"
+
+    @classmethod
+    def get_summary(cls, child_id):
+        """
+        Cached goal summary for a child: total saved across all goals plus
+        active/achieved counts, computed in a single aggregate query.
+        """
+        def compute():
+            return cls.objects.filter(child_id=child_id).aggregate(
+                total_saved=Coalesce(
+                    Sum('contributions__amount'),
+                    Value(Decimal('0.00')),
+                    output_field=models.DecimalField(max_digits=12, decimal_places=2),
+                ),
+                # distinct: the join to contributions repeats each goal once per row
+                active_goals=Count('id', filter=Q(status='active'), distinct=True),
+                achieved_goals=Count('id', filter=Q(status='achieved'), distinct=True),
+            )
+
+        return get_or_set_cache(cls.summary_cache_key(child_id), GOAL_SUMMARY_CACHE_TIMEOUT, compute)
+
+    @classmethod
+    def invalidate_summary_cache(cls, child_id):
+        """Call after any goal or contribution change for this child."""
+        invalidate_cache(cls.summary_cache_key(child_id))
+
+
 class GoalTransaction(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     goal = models.ForeignKey(Goal, on_delete=models.CASCADE, related_name='contributions')
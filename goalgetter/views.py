@@ -10,6 +10,8 @@ from .models import Goal, GoalTransaction
 from .serializers import GoalSerializer, GoalTransactionSerializer, GoalSummarySerializer
 from children.models import Child
 from children.authentication import ChildJWTAuthentication  # Import your custom auth
+from familywallet.models import FamilyAggregate
+from utils.idempotency import idempotent
 
 
 class GoalViewSet(viewsets.ModelViewSet):
@@ -24,8 +26,18 @@ class GoalViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         # Use authenticated child, ignore client input for child id
         serializer.save(child=self.request.child)
+        Goal.invalidate_summary_cache(self.request.child.id)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        Goal.invalidate_summary_cache(self.request.child.id)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        Goal.invalidate_summary_cache(self.request.child.id)
 
     @action(detail=True, methods=['post'], url_path='contribute')
+    @idempotent
     def contribute(self, request, pk=None):
         goal = self.get_object()
 
@@ -52,6 +64,7 @@ class GoalViewSet(viewsets.ModelViewSet):
                 # Deduct amount
                 child_wallet.balance -= amount
                 child_wallet.save()
+                FamilyAggregate.apply(goal.child.parent_id, total_children_balance=-amount)
 
                 serializer = GoalTransactionSerializer(data={'goal': goal.id, 'amount': amount})
                 serializer.is_valid(raise_exception=True)
@@ -59,6 +72,9 @@ class GoalViewSet(viewsets.ModelViewSet):
 
                 goal.check_achievement()
 
+            # Invalidate only once the contribution is committed, so a concurrent
+            # summary read can't re-cache the pre-contribution totals.
+            Goal.invalidate_summary_cache(goal.child_id)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         except Exception as e:
@@ -73,17 +89,7 @@ class GoalSummaryView(APIView):
 
     def get(self, request):
         child = request.child
-        goals = Goal.objects.filter(child=child)
-
-        total_saved = sum((goal.saved_amount() for goal in goals), Decimal('0.00'))
-        active_goals = goals.filter(status='active').count()
-        achieved_goals = goals.filter(status='achieved').count()
-
-        data = {
-            'total_saved': total_saved,
-            'active_goals': active_goals,
-            'achieved_goals': achieved_goals,
-        }
+        data = Goal.get_summary(child.id)
 
         serializer = GoalSummarySerializer(data=data)
         serializer.is_valid(raise_exception=True)
@@ -1,3 +1,5 @@
+from collections import defaultdict
+from django.db.models import Count, Q
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
@@ -13,19 +15,28 @@ class InsightChoreView(GenericAPIView):
     def get(self, request):
         parent = request.user
 
-        total_chores = Chore.objects.filter(parent=parent).count()
-        total_completed = Chore.objects.filter(parent=parent, status=Chore.STATUS_COMPLETED).count()
-        total_pending = Chore.objects.filter(parent=parent, status=Chore.STATUS_PENDING).count()
+        counts = Chore.objects.filter(parent=parent).aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status=Chore.STATUS_COMPLETED)),
+            pending=Count('id', filter=Q(status=Chore.STATUS_PENDING)),
+        )
+        total_chores = counts['total']
+        total_completed = counts['completed']
+        total_pending = counts['pending']
+
+        # One query for every child's chores, grouped here instead of one query per child
+        chores_by_child = defaultdict(list)
+        for chore in Chore.objects.filter(parent=parent).only('assigned_to_id', 'title', 'reward', 'status'):
+            chores_by_child[chore.assigned_to_id].append(chore)
 
         children = Child.objects.filter(parent=parent)
         child_activities = []
 
         for child in children:
-            child_chores = Chore.objects.filter(parent=parent, assigned_to=child)
             activities = []
 
             total_earned = 0
-            for chore in child_chores:
+            for chore in chores_by_child[child.id]:
                 status = chore.status
                 amount = float(chore.reward)
 
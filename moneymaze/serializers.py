@@ -97,9 +97,9 @@ class QuizSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'questions']
 
 class QuizSubmissionSerializer(serializers.Serializer):
-    quiz_id = serializers.UUIDField()
+    quiz_id = serializers.IntegerField()
     answers = serializers.DictField(
-        child=serializers.UUIDField(),
+        child=serializers.IntegerField(),
         help_text="Mapping of question_id to answer_choice_id"
     )
 
@@ -108,20 +108,24 @@ class QuizSubmissionSerializer(serializers.Serializer):
         answers = data.get('answers')
 
         try:
-            quiz = Quiz.objects.get(id=quiz_id)
+            quiz = Quiz.objects.select_related('concept').get(id=quiz_id)
         except Quiz.DoesNotExist:
             raise serializers.ValidationError("Quiz does not exist.")
 
-        quiz_question_ids = set(quiz.questions.values_list('id', flat=True))
+        quiz_question_ids = {str(pk) for pk in quiz.questions.values_list('id', flat=True)}
         submitted_question_ids = set(answers.keys())
 
         if not submitted_question_ids.issubset(quiz_question_ids):
             raise serializers.ValidationError("One or more questions do not belong to the quiz.")
 
+        # One query for every submitted choice instead of one per answer
+        choices = {
+            choice.id: choice
+            for choice in AnswerChoice.objects.filter(id__in=answers.values())
+        }
         for question_id, answer_choice_id in answers.items():
-            try:
-                answer_choice = AnswerChoice.objects.get(id=answer_choice_id)
-            except AnswerChoice.DoesNotExist:
+            answer_choice = choices.get(answer_choice_id)
+            if answer_choice is None:
                 raise serializers.ValidationError(f"Answer choice {answer_choice_id} does not exist.")
 
             if str(answer_choice.question_id) != question_id:
@@ -129,6 +133,9 @@ class QuizSubmissionSerializer(serializers.Serializer):
                     f"Answer choice {answer_choice_id} does not belong to question {question_id}."
                 )
 
+        data['quiz'] = quiz
+        data['total_questions'] = len(quiz_question_ids)
+        data['correct_answers'] = sum(1 for choice in choices.values() if choice.is_correct)
         return data
 
 class QuizResultSerializer(serializers.ModelSerializer):
@@ -3,6 +3,7 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, generics
+from django.core.cache import cache
 from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta
@@ -18,6 +19,11 @@ from .serializers import (
     RewardSerializer, QuestionSerializer, AnswerChoiceSerializer,
     DashboardSerializer, ConceptSectionSerializer, WeeklyStreakSerializer
 )
+from waya_backend.async_views import AsyncAPIView
+
+# The curriculum only changes through the admin, so a short TTL is enough
+TOTAL_CONCEPTS_CACHE_KEY = "moneymaze:total_concepts"
+TOTAL_CONCEPTS_CACHE_TIMEOUT = 300
 
 
 class ConceptListView(generics.ListAPIView):
@@ -51,31 +57,15 @@ class SubmitQuizView(APIView):
     def post(self, request):
         serializer = QuizSubmissionSerializer(data=request.data)
         if serializer.is_valid():
-            quiz_id = serializer.validated_data['quiz_id']
-            answers = serializer.validated_data['answers']
-
-            try:
-                quiz = Quiz.objects.get(id=quiz_id)
-            except Quiz.DoesNotExist:
-                return Response({"detail": "Quiz not found."}, status=status.HTTP_404_NOT_FOUND)
+            quiz = serializer.validated_data['quiz']
 
             child = request.user
             if not child:
                 return Response({"detail": "Child not found."}, status=status.HTTP_400_BAD_REQUEST)
 
-            total_questions = quiz.questions.count()
-            correct_answers = 0
-
-            for question in quiz.questions.all():
-                selected_choice_id = answers.get(str(question.id))
-                if not selected_choice_id:
-                    continue
-                try:
-                    selected_choice = AnswerChoice.objects.get(id=selected_choice_id, question=question)
-                    if selected_choice.is_correct:
-                        correct_answers += 1
-                except AnswerChoice.DoesNotExist:
-                    continue
+            # Answers were checked against the quiz in one query by the serializer
+            total_questions = serializer.validated_data['total_questions']
+            correct_answers = serializer.validated_data['correct_answers']
 
             score = (correct_answers / total_questions) * 100 if total_questions > 0 else 0
             passed = score >= 70
@@ -98,20 +88,23 @@ class SubmitQuizView(APIView):
                     concept_progress.progress_percentage = 100
                     concept_progress.save()
 
+                    # One INSERT each however big the curriculum; rows the child already
+                    # has are left as they are (unique on child + concept / reward)
                     next_level = quiz.concept.level + 1
-                    next_concepts = Concept.objects.filter(level=next_level)
-                    for next_concept in next_concepts:
-                        ConceptProgress.objects.get_or_create(
-                            child=child,
-                            concept=next_concept,
-                            defaults={'unlocked': True}
-                        )
-
-                    rewards = Reward.objects.filter(concept=quiz.concept)
-                    for reward in rewards:
-                        RewardEarned.objects.get_or_create(
-                            child=child, reward=reward
-                        )
+                    ConceptProgress.objects.bulk_create(
+                        [
+                            ConceptProgress(child=child, concept_id=concept_id, unlocked=True)
+                            for concept_id in Concept.objects.filter(level=next_level).values_list('id', flat=True)
+                        ],
+                        ignore_conflicts=True,
+                    )
+                    RewardEarned.objects.bulk_create(
+                        [
+                            RewardEarned(child=child, reward_id=reward_id)
+                            for reward_id in Reward.objects.filter(concept_id=quiz.concept_id).values_list('id', flat=True)
+                        ],
+                        ignore_conflicts=True,
+                    )
                 else:
                     concept_progress.save()
 
@@ -134,19 +127,22 @@ class RewardListView(generics.ListAPIView):
             return RewardEarned.objects.none()
         return RewardEarned.objects.filter(child=child)
 
-class DashboardView(APIView):
+class DashboardView(AsyncAPIView):
     serializer_class = DashboardSerializer
     authentication_classes = [ChildJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
+    async def get(self, request):
         child = request.user
         if not child:
             return Response({"detail": "Child not found."}, status=status.HTTP_400_BAD_REQUEST)
 
-        total_concepts = Concept.objects.count()
-        completed_concepts = ConceptProgress.objects.filter(child=child, completed=True).count()
-        total_rewards = RewardEarned.objects.filter(child=child).count()
+        total_concepts = await cache.aget(TOTAL_CONCEPTS_CACHE_KEY)
+        if total_concepts is None:
+            total_concepts = await Concept.objects.acount()
+            await cache.aset(TOTAL_CONCEPTS_CACHE_KEY, total_concepts, TOTAL_CONCEPTS_CACHE_TIMEOUT)
+        completed_concepts = await ConceptProgress.objects.filter(child=child, completed=True).acount()
+        total_rewards = await RewardEarned.objects.filter(child=child).acount()
 
         progress_percentage = round((completed_concepts / total_concepts) * 100, 2) if total_concepts else 0
 
@@ -2,11 +2,18 @@ from django.contrib import admin
 
 # Register your models here.
 from django.contrib import admin
-from .models import  Reward
+from .models import  Reward, OutboxEvent
 from users.models import User
 from children.models import Child
 
 # Register models from settings_waya
 @admin.register(Reward)
 class RewardAdmin(admin.ModelAdmin):
-    list_display = ('user', 'reward_approval_required', 'max_daily_reward', 'allow_savings')
\ No newline at end of file
+    list_display = ('user', 'reward_approval_required', 'max_daily_reward', 'allow_savings')
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'status', 'attempts', 'available_at', 'created_at', 'processed_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('created_at', 'processed_at')
@@ -0,0 +1,81 @@
+# notifications/coalescing.py
+"""
+Notification coalescing.
+
+Events covered by a rule update the parent's newest unread notification with the same
+group key inside NOTIFICATION_COALESCE_WINDOW_MINUTES ("3 chores completed by Ada")
+instead of inserting a new row each time. The updated row takes the event's time as
+its ``created_at``, so it moves back to the top of the feed, which seeks on
+(parent, -created_at). Events without a rule are always inserted.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification
+
+
+class CoalescingRule:
+    def __init__(self, group_key, title, message):
+        self.group_key = group_key  # context -> str
+        self.title = title          # (count, context) -> str
+        self.message = message      # (count, context) -> str
+
+
+RULES = {
+    "chore_completed": CoalescingRule(
+        group_key=lambda ctx: f"child:{ctx['child_id']}",
+        title=lambda count, ctx: "Chore Completed" if count == 1 else "Chores Completed",
+        message=lambda count, ctx: (
+            f"{ctx['child_name']} completed '{ctx['chore_title']}'" if count == 1
+            else f"{count} chores completed by {ctx['child_name']}"
+        ),
+    ),
+}
+
+
+def notify(parent_id, type, context, related_id=None):
+    """
+    Create or coalesce a notification of ``type`` for ``parent_id``.
+
+    ``context`` feeds the rule's group key and text. Returns ``(notification, created)``.
+    """
+    rule = RULES[type]
+    group_key = rule.group_key(context)
+    window = timedelta(minutes=settings.NOTIFICATION_COALESCE_WINDOW_MINUTES)
+
+    with transaction.atomic():
+        existing = (
+            Notification.objects.select_for_update()
+            .filter(
+                parent_id=parent_id,
+                type=type,
+                group_key=group_key,
+                is_read=False,
+                updated_at__gte=timezone.now() - window,
+            )
+            .order_by('-updated_at')
+            .first()
+        )
+        if existing is None:
+            notification = Notification.objects.create(
+                parent_id=parent_id,
+                type=type,
+                title=rule.title(1, context),
+                message=rule.message(1, context),
+                related_id=related_id,
+                group_key=group_key,
+            )
+            return notification, True
+
+        existing.aggregate_count += 1
+        existing.title = rule.title(existing.aggregate_count, context)
+        existing.message = rule.message(existing.aggregate_count, context)
+        existing.related_id = related_id
+        existing.created_at = timezone.now()
+        existing.save(update_fields=[
+            'aggregate_count', 'title', 'message', 'related_id', 'created_at', 'updated_at',
+        ])
+        return existing, False
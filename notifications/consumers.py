@@ -1,19 +1,81 @@
+import asyncio
 import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from notifications import dashboard, presence
+
+
 class NotificationConsumer(AsyncWebsocketConsumer):
     async def connect(self):
+        # scope is populated by notifications.middleware.JWTAuthMiddleware
         user = self.scope["user"]
+        child = self.scope.get("child")
         if user.is_authenticated:
             self.group_name = f"user_{user.id}"
-            await self.channel_layer.group_add(self.group_name, self.channel_name)
-            await self.accept()
+        elif child is not None:
+            self.group_name = f"child_{child.id}"
         else:
             await self.close()
+            return
+
+        self.dashboard_group = None
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await sync_to_async(presence.connected)(self.group_name, self.channel_name)
+        self.heartbeat_task = asyncio.create_task(self.keep_presence_alive())
 
     async def disconnect(self, close_code):
+        if hasattr(self, "heartbeat_task"):
+            self.heartbeat_task.cancel()
         if hasattr(self, "group_name"):
+            await self.unsubscribe_dashboard()
             await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            await sync_to_async(presence.disconnected)(self.group_name, self.channel_name)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            data = json.loads(text_data or "{}")
+        except json.JSONDecodeError:
+            return
+        if not isinstance(data, dict) or data.get("stream") != dashboard.STREAM:
+            return
+
+        if data.get("action") == "subscribe":
+            await self.subscribe_dashboard()
+        elif data.get("action") == "unsubscribe":
+            await self.unsubscribe_dashboard()
+
+    async def subscribe_dashboard(self):
+        # Dashboards belong to parents; child sockets only receive their own notifications.
+        user = self.scope["user"]
+        if not user.is_authenticated or self.dashboard_group:
+            return
+        self.dashboard_group = dashboard.dashboard_group(user.id)
+        await self.channel_layer.group_add(self.dashboard_group, self.channel_name)
+        await sync_to_async(presence.joined)(self.dashboard_group, self.channel_name)
+        await self.send(text_data=json.dumps({"stream": dashboard.STREAM, "event": "subscribed"}))
+
+    async def unsubscribe_dashboard(self):
+        if not self.dashboard_group:
+            return
+        group, self.dashboard_group = self.dashboard_group, None
+        await self.channel_layer.group_discard(group, self.channel_name)
+        await sync_to_async(presence.left)(group, self.channel_name)
+
+    async def keep_presence_alive(self):
+        # Renew this socket's presence entries while it is open; if this worker dies
+        # they lapse on their own.
+        while True:
+            await asyncio.sleep(settings.PRESENCE_TTL_SECONDS / 2)
+            groups = [self.group_name] + ([self.dashboard_group] if self.dashboard_group else [])
+            await sync_to_async(presence.heartbeat)(groups, self.channel_name)
 
     async def send_notification(self, event):
-        await self.send(text_data=json.dumps(event["content"]))
\ No newline at end of file
+        await self.send(text_data=json.dumps(event["content"]))
+
+    async def send_notifications(self, event):
+        # Several notifications for this group batched into one channel-layer message
+        for content in event["contents"]:
+            await self.send(text_data=json.dumps(content))
@@ -0,0 +1,38 @@
+# notifications/dashboard.py
+"""
+Live dashboard deltas.
+
+Parents subscribe over the notifications socket (``{"action": "subscribe", "stream":
+"dashboard"}``) and join ``dashboard_<parent_id>``. Wallet and chore mutations call
+``push_delta()``, which sends a small event after the surrounding transaction commits,
+so the dashboard can patch its state instead of polling the aggregate endpoints.
+"""
+import uuid
+from decimal import Decimal
+
+from django.db import transaction
+
+from notifications.dispatch import dispatcher
+
+STREAM = "dashboard"
+
+
+def dashboard_group(parent_id):
+    return f"dashboard_{parent_id}"
+
+
+def _jsonable(value):
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+def push_delta(parent_id, event, **data):
+    """
+    Queue ``event`` for the parent's dashboard subscribers once the current transaction
+    commits (immediately when called outside one). Skipped by the dispatcher when no
+    dashboard is subscribed.
+    """
+    content = {"stream": STREAM, "event": event}
+    content.update({key: _jsonable(value) for key, value in data.items()})
+    transaction.on_commit(lambda: dispatcher.send(dashboard_group(parent_id), content))
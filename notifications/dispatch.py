@@ -0,0 +1,175 @@
+# notifications/dispatch.py
+"""
+Non-blocking realtime dispatch for sync (WSGI) code.
+
+``async_to_sync(channel_layer.group_send)`` builds an event-loop bridge per call and
+blocks the worker thread on Redis. Instead, ``dispatcher.send()`` drops the message on
+an in-process queue and returns immediately. A single daemon thread owns a long-lived
+event loop (and therefore one persistent channel-layer connection pool), drains the
+queue in small batches, merges notifications addressed to the same group into one
+channel-layer message and sends the groups concurrently.
+
+Realtime pushes are best-effort: the persisted Notification row remains the source of
+truth, so a full queue drops messages rather than blocking the request, and groups with
+no live socket (see notifications.presence) are skipped without touching the channel layer.
+"""
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from notifications import presence
+
+logger = logging.getLogger(__name__)
+
+
+class RealtimeDispatcher:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Counters are bumped from request threads (drops) and the sender thread
+        self._stats_lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._latencies_ms = deque(maxlen=500)
+        self._sent_messages = 0
+        self._sent_notifications = 0
+        self._dropped = 0
+        self._skipped_offline = 0
+        self._errors = 0
+
+    def send(self, group, content):
+        """Queue ``content`` for ``group``; never blocks the caller."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((group, content))
+        except queue.Full:
+            self._count("_dropped")
+            logger.warning(f"[REALTIME] Queue full, dropped notification for {group}")
+
+    def _count(self, name, n=1):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def stats(self):
+        with self._stats_lock:
+            recent = list(self._latencies_ms)
+            counters = {
+                "sent_messages": self._sent_messages,
+                "sent_notifications": self._sent_notifications,
+                "dropped": self._dropped,
+                "skipped_offline": self._skipped_offline,
+                "errors": self._errors,
+            }
+        latencies = sorted(recent)
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            **counters,
+            "send_latency_ms": {
+                "last": recent[-1] if recent else 0,
+                "avg": round(sum(latencies) / len(latencies), 2) if latencies else 0,
+                "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0,
+            },
+        }
+
+    def _ensure_started(self):
+        # Re-create the queue and sender after a fork (gunicorn preload, Celery prefork);
+        # a sender thread that died in this process is restarted on the same queue, so
+        # the messages waiting in it are still sent.
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._queue = queue.Queue(maxsize=settings.REALTIME_QUEUE_MAXSIZE)
+            self._thread = threading.Thread(target=self._run, name="realtime-dispatcher", daemon=True)
+            self._thread.start()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + settings.REALTIME_BATCH_WINDOW_MS / 1000
+        while len(batch) < settings.REALTIME_MAX_BATCH:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            channel_layer = get_channel_layer()
+        except Exception as e:
+            channel_layer = None
+            logger.error(f"[REALTIME] Channel layer unavailable, realtime pushes disabled: {e}")
+
+        while True:
+            # Nothing may escape this loop: a dead sender thread would leave the queue
+            # filling up until the next send() restarts it
+            try:
+                self._send_batch(loop, channel_layer, self._next_batch())
+            except Exception as e:
+                self._count("_errors")
+                logger.error(f"[REALTIME] Batch failed: {e}")
+
+    def _send_batch(self, loop, channel_layer, batch):
+        if channel_layer is None:
+            self._count("_dropped", len(batch))
+            return
+
+        by_group = defaultdict(list)
+        for group, content in batch:
+            by_group[group].append(content)
+
+        if settings.REALTIME_SKIP_OFFLINE:
+            online = presence.online_groups(by_group)
+            offline = [group for group in by_group if group not in online]
+            self._count("_skipped_offline", sum(len(by_group.pop(group)) for group in offline))
+            if not by_group:
+                return
+
+        started = time.monotonic()
+        try:
+            loop.run_until_complete(self._send_groups(channel_layer, by_group))
+        except Exception as e:
+            self._count("_errors")
+            logger.error(f"[REALTIME] Batch send failed: {e}")
+        elapsed_ms = round((time.monotonic() - started) * 1000, 2)
+        with self._stats_lock:
+            self._latencies_ms.append(elapsed_ms)
+
+    async def _send_groups(self, channel_layer, by_group):
+        groups = list(by_group.items())
+        results = await asyncio.gather(
+            *(channel_layer.group_send(group, self._message(contents)) for group, contents in groups),
+            return_exceptions=True,
+        )
+        for (group, contents), result in zip(groups, results):
+            if isinstance(result, Exception):
+                self._count("_errors")
+                logger.warning(f"[REALTIME] group_send to {group} failed: {result}")
+            else:
+                with self._stats_lock:
+                    self._sent_messages += 1
+                    self._sent_notifications += len(contents)
+
+    @staticmethod
+    def _message(contents):
+        if len(contents) == 1:
+            return {"type": "send_notification", "content": contents[0]}
+        return {"type": "send_notifications", "contents": contents}
+
+
+dispatcher = RealtimeDispatcher()
@@ -0,0 +1,64 @@
+# notifications/middleware.py
+"""
+JWT authentication for WebSocket connections.
+
+Browsers cannot set an Authorization header on a WebSocket handshake, so the access
+token is read from the ``token`` query-string parameter (an ``Authorization: Bearer``
+header is honoured for native clients). Parent tokens populate ``scope["user"]``; child
+tokens (issued by ChildRefreshToken) populate ``scope["child"]``.
+"""
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from children.models import Child
+
+User = get_user_model()
+
+
+def _get_token(scope):
+    query = parse_qs(scope.get("query_string", b"").decode())
+    if query.get("token"):
+        return query["token"][0]
+
+    headers = dict(scope.get("headers", []))
+    auth_header = headers.get(b"authorization", b"").decode()
+    if auth_header.startswith("Bearer "):
+        return auth_header.split(" ")[1]
+    return None
+
+
+@database_sync_to_async
+def _get_user(user_id):
+    return User.objects.filter(id=user_id, is_active=True).first()
+
+
+@database_sync_to_async
+def _get_child(child_id):
+    return Child.objects.filter(id=child_id).first()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    async def __call__(self, scope, receive, send):
+        scope["user"] = AnonymousUser()
+        scope["child"] = None
+
+        raw_token = _get_token(scope)
+        if raw_token:
+            try:
+                token = AccessToken(raw_token)
+            except TokenError:
+                token = None
+
+            if token is not None:
+                if token.get("child_id"):
+                    scope["child"] = await _get_child(token["child_id"])
+                elif token.get("user_id"):
+                    scope["user"] = await _get_user(token["user_id"]) or AnonymousUser()
+
+        return await super().__call__(scope, receive, send)
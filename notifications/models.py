@@ -3,16 +3,25 @@ from django.db import models
 # Create your models here.
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+import logging
 import uuid
 
+logger = logging.getLogger(__name__)
+
 User = get_user_model()
 
+UNREAD_COUNT_CACHE_TIMEOUT = 60 * 60
+
 class Notification(models.Model):
     TYPE_CHOICES = [
         ('task_completed', 'Task Completed'),
         ('reward_requested', 'Reward Requested'),
         ('chore_reminder', 'Chore Reminder'),
         ('weekly_summary', 'Weekly Summary'),
+        ('chore_completed', 'Chore Completed'),
     ]
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -25,9 +34,125 @@ class Notification(models.Model):
 
     related_id = models.UUIDField(null=True, blank=True)
 
+    # Coalescing: similar events inside a window update one row (see notifications.coalescing).
+    group_key = models.CharField(max_length=100, blank=True)
+    aggregate_count = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['parent', '-created_at'], name='notif_parent_created_idx'),
+            models.Index(
+                fields=['parent'],
+                condition=Q(is_read=False),
+                name='notif_parent_unread_idx',
+            ),
+            models.Index(
+                fields=['parent', 'group_key', '-updated_at'],
+                condition=Q(is_read=False),
+                name='notif_unread_group_idx',
+            ),
+            models.Index(
+                fields=['created_at'],
+                condition=Q(is_read=True),
+                name='notif_read_created_idx',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.title} → {self.parent.username}"
 
+    @staticmethod
+    def unread_cache_key(parent_id):
+        return f"notifications:unread:{parent_id}"
+
+    @classmethod
+    def _unread_version_key(cls, parent_id):
+        return f"{cls.unread_cache_key(parent_id)}:version"
+
+    @classmethod
+    def _unread_version(cls, parent_id):
+        return cache.get(cls._unread_version_key(parent_id), 0)
+
+    @classmethod
+    def invalidate_unread_count(cls, parent_id):
+        """
+        Move the parent's counter to a new version. A rebuild already counting rows
+        writes to the old version, which nobody reads, so it cannot overwrite the
+        new count with one taken before this change.
+        """
+        key = cls._unread_version_key(parent_id)
+        try:
+            cache.add(key, 0, timeout=UNREAD_COUNT_CACHE_TIMEOUT * 2)
+            cache.incr(key)
+            cache.touch(key, UNREAD_COUNT_CACHE_TIMEOUT * 2)
+        except Exception as e:
+            logger.error(f"[CACHE-ERROR] Key: {key} — {str(e)}")
+
+    @classmethod
+    def unread_count(cls, parent_id):
+        """
+        Unread badge count. Served from a Redis counter kept in step with creates and
+        mark-read calls; rebuilt from the partial unread index on a miss. The rebuild
+        only fills a missing key (``cache.add``) of the version it read before counting,
+        so neither an ``incr`` that landed meanwhile nor an invalidation is overwritten.
+        """
+        count_unread = lambda: cls.objects.filter(parent_id=parent_id, is_read=False).count()
+        try:
+            version = cls._unread_version(parent_id)
+            key = f"{cls.unread_cache_key(parent_id)}:{version}"
+            value = cache.get(key)
+            if value is not None:
+                return value
+            value = count_unread()
+            if not cache.add(key, value, UNREAD_COUNT_CACHE_TIMEOUT):
+                value = cache.get(key, value)
+            # Outlives every counter of its version, so an old version is never read again
+            cache.touch(cls._unread_version_key(parent_id), UNREAD_COUNT_CACHE_TIMEOUT * 2)
+            return value
+        except Exception as e:
+            logger.error(f"[CACHE-ERROR] Key: {cls.unread_cache_key(parent_id)} — {str(e)}")
+            return count_unread()
+
+    @classmethod
+    def adjust_unread_count(cls, parent_id, delta):
+        """
+        Apply ``delta`` to a cached unread counter. If there is none, or it would go
+        negative, the counter is invalidated instead, so a rebuild counting rows from
+        before this change cannot store its result.
+        """
+        try:
+            key = f"{cls.unread_cache_key(parent_id)}:{cls._unread_version(parent_id)}"
+            if cache.incr(key, delta) < 0:
+                cls.invalidate_unread_count(parent_id)
+        except ValueError:
+            cls.invalidate_unread_count(parent_id)
+        except Exception as e:
+            logger.error(f"[CACHE-ERROR] Key: {cls.unread_cache_key(parent_id)} — {str(e)}")
+            cls.invalidate_unread_count(parent_id)
+
+    @classmethod
+    def mark_read(cls, parent_id, notification_id):
+        """
+        Mark one notification read with a conditional UPDATE, so repeated calls only
+        decrement the counter once. Returns True if the row changed.
+        """
+        updated = cls.objects.filter(id=notification_id, parent_id=parent_id, is_read=False).update(is_read=True)
+        if updated:
+            cls.adjust_unread_count(parent_id, -updated)
+        return bool(updated)
+
+    @classmethod
+    def mark_all_read(cls, parent_id):
+        """
+        Mark every unread notification read in one UPDATE and invalidate the counter.
+        Setting it to 0 instead would lose the increment of a notification committed
+        meanwhile; the next read rebuilds it from the partial unread index.
+        """
+        updated = cls.objects.filter(parent_id=parent_id, is_read=False).update(is_read=True)
+        cls.invalidate_unread_count(parent_id)
+        return updated
+
 
 class Reward(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="reward")
@@ -36,4 +161,52 @@ class Reward(models.Model):
     allow_savings = models.BooleanField(default=True)
 
     def __str__(self):
-        return f"Reward for {self.user.full_name if hasattr(self.user, 'full_name') else self.user.email}"
\ No newline at end of file
+        return f"Reward for {self.user.full_name if hasattr(self.user, 'full_name') else self.user.email}"
+
+class OutboxEvent(models.Model):
+    """
+    Side effect recorded in the same DB transaction as the change that caused it.
+    Rows are drained after commit by the outbox Celery worker (see notifications.outbox).
+    While a worker delivers a row it is ``processing`` and ``available_at`` holds the end
+    of the worker's claim.
+    """
+    KIND_REALTIME = 'realtime'
+    KIND_EMAIL = 'email'
+    KIND_CACHE_WARM = 'cache_warm'
+
+    KIND_CHOICES = [
+        (KIND_REALTIME, 'Realtime (Channels)'),
+        (KIND_EMAIL, 'Email'),
+        (KIND_CACHE_WARM, 'Cache Warm'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['available_at']
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} ({self.status}, attempts={self.attempts})"
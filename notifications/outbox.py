@@ -0,0 +1,264 @@
+# notifications/outbox.py
+"""
+Transactional outbox.
+
+Views and model methods call ``enqueue()`` inside their own ``atomic()`` block, so
+the side effect is only recorded if the change commits. The ``drain_outbox`` Celery
+task then delivers pending rows in batches, retrying failures with exponential
+backoff. Nothing here talks to Redis or the mail provider on the request thread.
+
+Email events are drained by ``drain_email_outbox`` on the "email" queue instead, so a
+slow mail provider cannot hold up realtime and cache-warm events on "default".
+
+Emails in a batch share one mail backend connection (EMAIL_BACKEND), opened on the
+first email and closed after the batch.
+"""
+import contextvars
+import logging
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import partial
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from utils.debounce import debounce
+
+from . import presence
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# Named cache warmers (Celery tasks) that may be requested through a KIND_CACHE_WARM
+# event. They are debounced per argument list, so a burst of events costs one run.
+CACHE_WARMERS = {
+    'wallet_stats': 'users.tasks.sync_wallet_stats_to_dashboard',
+}
+
+DRAIN_KICK_CACHE_KEY = "outbox:drain_kick"
+DRAIN_TRAILING_CACHE_KEY = "outbox:drain_trailing"
+
+_handlers = {}
+
+_email_connection = contextvars.ContextVar("outbox_email_connection", default=None)
+
+
+def handler(kind):
+    """Register the delivery function for an outbox event kind."""
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(kind, payload):
+    """
+    Record a side effect in the caller's transaction and schedule a drain once it commits.
+    """
+    event = OutboxEvent.objects.create(kind=kind, payload=payload)
+    transaction.on_commit(partial(kick_drain, kind))
+    return event
+
+
+def _drain_task(kind):
+    from notifications import tasks
+    return tasks.drain_email_outbox if kind == OutboxEvent.KIND_EMAIL else tasks.drain_outbox
+
+
+def kick_drain(kind=None):
+    """
+    Ask a worker to drain the outbox now instead of waiting for the periodic sweep.
+
+    At most one kick is published per OUTBOX_KICK_INTERVAL, so a burst of writes costs a
+    single broker round-trip. A commit that lands inside the interval schedules one
+    trailing drain for the end of it (shared by the rest of the burst), so no event
+    waits for the periodic sweep. ``kind`` picks the drain task (email or the rest),
+    each throttled on its own. Set OUTBOX_KICK_ON_COMMIT=False to rely on the sweep only.
+    """
+    if not settings.OUTBOX_KICK_ON_COMMIT:
+        return
+    interval = settings.OUTBOX_KICK_INTERVAL
+    try:
+        task = _drain_task(kind)
+        if cache.add(f"{DRAIN_KICK_CACHE_KEY}:{task.name}", 1, timeout=interval):
+            task.delay()
+        elif cache.add(f"{DRAIN_TRAILING_CACHE_KEY}:{task.name}", 1, timeout=interval):
+            task.apply_async(countdown=interval)
+    except Exception as e:
+        # The periodic sweep will still deliver the event.
+        logger.warning(f"[OUTBOX] Could not kick drain: {e}")
+
+
+def _backoff(attempts):
+    delay = min(settings.OUTBOX_MAX_BACKOFF_SECONDS, settings.OUTBOX_BASE_BACKOFF_SECONDS * 2 ** (attempts - 1))
+    return timedelta(seconds=delay + random.uniform(0, delay / 2))
+
+
+def _of_kinds(queryset, kinds, exclude_kinds):
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+    if exclude_kinds:
+        queryset = queryset.exclude(kind__in=exclude_kinds)
+    return queryset
+
+
+def _claim(batch_size, kinds, exclude_kinds):
+    """
+    Mark up to ``batch_size`` due events ``processing`` until OUTBOX_CLAIM_SECONDS from
+    now and commit, so no row lock or transaction stays open while they are delivered.
+    Events whose claim ran out (the worker died mid-batch) are due again.
+    """
+    with transaction.atomic():
+        now = timezone.now()
+        events = list(
+            _of_kinds(OutboxEvent.objects.select_for_update(skip_locked=True), kinds, exclude_kinds)
+            .filter(
+                status__in=[OutboxEvent.STATUS_PENDING, OutboxEvent.STATUS_PROCESSING],
+                available_at__lte=now,
+            )
+            .order_by('available_at')[:batch_size]
+        )
+        if events:
+            OutboxEvent.objects.filter(id__in=[event.id for event in events]).update(
+                status=OutboxEvent.STATUS_PROCESSING,
+                available_at=now + timedelta(seconds=settings.OUTBOX_CLAIM_SECONDS),
+            )
+    return events
+
+
+def drain(batch_size=None, kinds=None, exclude_kinds=None):
+    """
+    Deliver pending events whose ``available_at`` has passed, optionally only those of
+    ``kinds`` or all but ``exclude_kinds``.
+
+    Each batch is claimed in a short transaction with ``select_for_update(skip_locked=True)``
+    so several workers can drain in parallel without delivering the same event twice, then
+    delivered outside any transaction and marked done, failed or due again for a retry.
+    Returns the number of events processed (delivered or failed).
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    processed = 0
+
+    while True:
+        events = _claim(batch_size, kinds, exclude_kinds)
+        if not events:
+            break
+
+        with _shared_email_connection():
+            for event in events:
+                event.attempts += 1
+                try:
+                    _handlers[event.kind](event.payload)
+                except Exception as e:
+                    event.last_error = str(e)
+                    if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                        event.status = OutboxEvent.STATUS_FAILED
+                        logger.error(f"[OUTBOX] Giving up on {event.kind} event {event.id}: {e}")
+                    else:
+                        event.status = OutboxEvent.STATUS_PENDING
+                        event.available_at = timezone.now() + _backoff(event.attempts)
+                        logger.warning(f"[OUTBOX] Retrying {event.kind} event {event.id} (attempt {event.attempts}): {e}")
+                else:
+                    event.status = OutboxEvent.STATUS_DONE
+                    event.processed_at = timezone.now()
+
+        OutboxEvent.objects.bulk_update(
+            events, ['status', 'attempts', 'available_at', 'last_error', 'processed_at']
+        )
+
+        processed += len(events)
+        if len(events) < batch_size:
+            break
+
+    return processed
+
+
+def purge_delivered(older_than=None):
+    """Delete delivered events so the outbox table stays small."""
+    older_than = older_than or timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+    deleted, _ = OutboxEvent.objects.filter(
+        status=OutboxEvent.STATUS_DONE,
+        processed_at__lt=timezone.now() - older_than,
+    ).delete()
+    return deleted
+
+
+@handler(OutboxEvent.KIND_REALTIME)
+def _deliver_realtime(payload):
+    if settings.REALTIME_SKIP_OFFLINE and not presence.is_online(payload["group"]):
+        return
+    channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(
+        payload["group"],
+        {
+            "type": "send_notification",
+            "content": payload["content"],
+        }
+    )
+
+
+@contextmanager
+def _shared_email_connection():
+    """Let every email in a drain batch go out over one backend connection."""
+    state = {"connection": None}
+    token = _email_connection.set(state)
+    try:
+        yield
+    finally:
+        _email_connection.reset(token)
+        if state["connection"] is not None:
+            try:
+                state["connection"].close()
+            except Exception as e:
+                logger.warning(f"[OUTBOX] Error closing mail connection: {e}")
+
+
+def _mail_connection():
+    state = _email_connection.get()
+    if state is None:
+        return get_connection(fail_silently=False)
+    if state["connection"] is None:
+        connection = get_connection(fail_silently=False)
+        # Opened explicitly so the backend keeps it open between messages
+        connection.open()
+        state["connection"] = connection
+    return state["connection"]
+
+
+@handler(OutboxEvent.KIND_EMAIL)
+def _deliver_email(payload):
+    connection = _mail_connection()
+    message = EmailMultiAlternatives(
+        payload["subject"],
+        payload["message"],
+        settings.DEFAULT_FROM_EMAIL,
+        payload["recipient_list"],
+        connection=connection,
+    )
+    if payload.get("html_message"):
+        message.attach_alternative(payload["html_message"], "text/html")
+    try:
+        message.send()
+    except Exception:
+        # Drop a possibly broken connection; the next email in the batch reconnects
+        state = _email_connection.get()
+        if state is not None and state["connection"] is connection:
+            state["connection"] = None
+            try:
+                connection.close()
+            except Exception:
+                pass
+        raise
+
+
+@handler(OutboxEvent.KIND_CACHE_WARM)
+def _deliver_cache_warm(payload):
+    warmer = import_string(CACHE_WARMERS[payload["warmer"]])
+    debounce(warmer, *payload.get("args", []))
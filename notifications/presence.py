@@ -0,0 +1,142 @@
+# notifications/presence.py
+"""
+Socket presence kept in the shared cache (Redis).
+
+Each realtime group (``user_<id>`` / ``child_<id>``) maps its live sockets (by channel
+name) to the time their entry expires, PRESENCE_TTL_SECONDS after the socket last
+connected or sent a heartbeat. Expired entries are ignored by every read and pruned by
+every write, so a worker that dies without running ``disconnect`` leaves nothing behind
+once its sockets' entries lapse, even while other sockets of the same group stay open.
+
+The global count (``connection_count()``) is kept per process: each web process
+publishes its own number of open sockets under its own key, refreshed by the heartbeat,
+and the count sums the processes whose entry has not lapsed.
+
+Writes to a group's map are read-modify-write. Two sockets of one group changing it at
+the same moment can drop or restore an entry, which the next heartbeat (or the TTL)
+corrects; the group never stays online longer than PRESENCE_TTL_SECONDS after its last
+socket is gone.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CONNECTIONS_CACHE_KEY = "presence:connections"
+
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_local_connections = 0
+_local_lock = threading.Lock()
+
+
+def presence_cache_key(group):
+    return f"presence:{group}"
+
+
+def _process_connections_key(process_id):
+    return f"{CONNECTIONS_CACHE_KEY}:{process_id}"
+
+
+def _live(members, now):
+    return {member: expires for member, expires in (members or {}).items() if expires > now}
+
+
+def _update_members(key, add=None, remove=None):
+    ttl = settings.PRESENCE_TTL_SECONDS
+    now = time.time()
+    members = _live(cache.get(key), now)
+    if remove is not None:
+        members.pop(remove, None)
+    if add is not None:
+        members[add] = now + ttl
+    if members:
+        cache.set(key, members, timeout=ttl)
+    else:
+        cache.delete(key)
+
+
+def _publish_connections(delta=0):
+    global _local_connections
+    with _local_lock:
+        _local_connections = max(_local_connections + delta, 0)
+        count = _local_connections
+    cache.set(_process_connections_key(PROCESS_ID), count, timeout=settings.PRESENCE_TTL_SECONDS)
+    _update_members(CONNECTIONS_CACHE_KEY, add=PROCESS_ID)
+
+
+def connected(group, socket_id):
+    """A new socket joined ``group``; counts towards ``connection_count()``."""
+    try:
+        _update_members(presence_cache_key(group), add=socket_id)
+        _publish_connections(1)
+    except Exception as e:
+        logger.error(f"[PRESENCE] Could not record connect for {group}: {e}")
+
+
+def disconnected(group, socket_id):
+    try:
+        _update_members(presence_cache_key(group), remove=socket_id)
+        _publish_connections(-1)
+    except Exception as e:
+        logger.error(f"[PRESENCE] Could not record disconnect for {group}: {e}")
+
+
+def joined(group, socket_id):
+    """An already counted socket joined another ``group`` (e.g. a dashboard subscription)."""
+    try:
+        _update_members(presence_cache_key(group), add=socket_id)
+    except Exception as e:
+        logger.error(f"[PRESENCE] Could not record join for {group}: {e}")
+
+
+def left(group, socket_id):
+    try:
+        _update_members(presence_cache_key(group), remove=socket_id)
+    except Exception as e:
+        logger.error(f"[PRESENCE] Could not record leave for {group}: {e}")
+
+
+def heartbeat(groups, socket_id):
+    """Renew ``socket_id``'s entry in each of ``groups`` and this process's connection count."""
+    try:
+        for group in groups:
+            _update_members(presence_cache_key(group), add=socket_id)
+        _publish_connections()
+    except Exception as e:
+        logger.error(f"[PRESENCE] Could not refresh {socket_id}: {e}")
+
+
+def online_groups(groups):
+    """
+    Return the subset of ``groups`` with at least one live socket, in one cache round-trip.
+    If the cache is unreachable every group is treated as online so nothing is lost.
+    """
+    groups = list(groups)
+    try:
+        members = cache.get_many([presence_cache_key(group) for group in groups])
+    except Exception as e:
+        logger.error(f"[PRESENCE] Lookup failed, assuming online: {e}")
+        return set(groups)
+    now = time.time()
+    return {group for group in groups if _live(members.get(presence_cache_key(group)), now)}
+
+
+def is_online(group):
+    return group in online_groups([group])
+
+
+def connection_count():
+    try:
+        processes = _live(cache.get(CONNECTIONS_CACHE_KEY), time.time())
+        counts = cache.get_many([_process_connections_key(process_id) for process_id in processes])
+        return sum(counts.values())
+    except Exception as e:
+        logger.error(f"[PRESENCE] Could not read connection count: {e}")
+        return None
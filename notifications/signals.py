@@ -0,0 +1,13 @@
+# notifications/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from notifications.models import Notification
+
+
+@receiver(post_save, sender=Notification)
+def notification_created_handler(sender, instance, created, **kwargs):
+    # Bump the unread badge only once the row is visible to readers.
+    if created and not instance.is_read:
+        transaction.on_commit(lambda: Notification.adjust_unread_count(instance.parent_id, 1))
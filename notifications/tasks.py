@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from notifications import outbox
+from notifications.models import Notification, OutboxEvent
+
+
+@shared_task(ignore_result=True)
+def drain_outbox():
+    """
+    Deliver pending outbox events other than email. Kicked after commit by
+    outbox.enqueue() and also run periodically by beat as a safety net.
+    """
+    processed = outbox.drain(exclude_kinds=[OutboxEvent.KIND_EMAIL])
+    outbox.purge_delivered()
+    return processed
+
+
+@shared_task(ignore_result=True)
+def drain_email_outbox():
+    """
+    Deliver pending email outbox events. Routed to the "email" queue
+    (CELERY_TASK_ROUTES); kicked and swept like drain_outbox.
+    """
+    return outbox.drain(kinds=[OutboxEvent.KIND_EMAIL])
+
+
+@shared_task(ignore_result=True)
+def purge_read_notifications():
+    """
+    Delete read notifications older than NOTIFICATION_RETENTION_DAYS in chunks of
+    NOTIFICATION_PURGE_BATCH_SIZE, so no single statement holds long locks.
+    """
+    cutoff = timezone.now() - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+    batch_size = settings.NOTIFICATION_PURGE_BATCH_SIZE
+    deleted = 0
+
+    while True:
+        ids = list(
+            Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        count, _ = Notification.objects.filter(id__in=ids).delete()
+        deleted += count
+        if len(ids) < batch_size:
+            break
+
+    return deleted
@@ -0,0 +1,575 @@
+import json
+import os
+import queue
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from children.models import Child
+from children.tokens import ChildRefreshToken
+from notifications import coalescing, dashboard, outbox, presence, tasks
+from notifications.dispatch import RealtimeDispatcher
+from notifications.middleware import JWTAuthMiddleware
+from notifications.routing import websocket_urlpatterns
+from notifications.tasks import purge_read_notifications
+from notifications.models import Notification, OutboxEvent
+from users.models import User
+from users.tokens import WayaRefreshToken
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def _parent(label):
+    return User.objects.create_user(f"{label}@example.com", f"{label.title()} Parent", "Passw0rd!", terms_accepted=True)
+
+
+def _realtime_event(**kwargs):
+    return OutboxEvent.objects.create(
+        kind=OutboxEvent.KIND_REALTIME, payload={"group": "parent_x", "content": {}}, **kwargs
+    )
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE,
+    OUTBOX_KICK_ON_COMMIT=False,
+    OUTBOX_MAX_ATTEMPTS=3,
+    OUTBOX_BASE_BACKOFF_SECONDS=5,
+)
+class OutboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def deliver_with(self, func):
+        return mock.patch.dict(outbox._handlers, {OutboxEvent.KIND_REALTIME: func})
+
+    def test_rolled_back_transaction_leaves_no_event(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic():
+                    outbox.enqueue(OutboxEvent.KIND_REALTIME, {"group": "parent_x", "content": {}})
+                    raise RuntimeError("rollback")
+            except RuntimeError:
+                pass
+
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertEqual(callbacks, [])
+
+    def test_failed_delivery_is_retried_with_backoff(self):
+        event = _realtime_event()
+        before = timezone.now()
+
+        with self.deliver_with(mock.Mock(side_effect=ConnectionError("layer down"))):
+            self.assertEqual(outbox.drain(), 1)
+
+        event.refresh_from_db()
+        self.assertEqual(event.status, OutboxEvent.STATUS_PENDING)
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(event.last_error, "layer down")
+        self.assertGreaterEqual(event.available_at, before + timedelta(seconds=5))
+
+        # Not due yet, so a second drain leaves it alone
+        deliver = mock.Mock()
+        with self.deliver_with(deliver):
+            self.assertEqual(outbox.drain(), 0)
+        deliver.assert_not_called()
+
+    def test_event_fails_after_max_attempts(self):
+        event = _realtime_event(attempts=2)
+
+        with self.deliver_with(mock.Mock(side_effect=ConnectionError("layer down"))):
+            outbox.drain()
+
+        event.refresh_from_db()
+        self.assertEqual(event.status, OutboxEvent.STATUS_FAILED)
+        self.assertEqual(event.attempts, 3)
+
+    def test_batches_are_claimed_with_skip_locked(self):
+        _realtime_event()
+        manager = OutboxEvent.objects
+        with mock.patch.object(manager, 'select_for_update', wraps=manager.select_for_update) as claim, \
+                self.deliver_with(mock.Mock()):
+            outbox.drain()
+        claim.assert_called_with(skip_locked=True)
+
+    @override_settings(OUTBOX_CLAIM_SECONDS=60)
+    def test_events_are_claimed_before_delivery_and_reclaimed_after_a_crash(self):
+        event = _realtime_event()
+        seen = []
+
+        def deliver(payload):
+            claimed = OutboxEvent.objects.get(pk=event.pk)
+            seen.append((
+                claimed.status,
+                claimed.available_at > timezone.now() + timedelta(seconds=50),
+                len(connection.atomic_blocks),
+            ))
+
+        # The test case's own atomic blocks; delivery must not run inside another one
+        outer_blocks = len(connection.atomic_blocks)
+        with self.deliver_with(deliver):
+            outbox.drain()
+        self.assertEqual(seen, [(OutboxEvent.STATUS_PROCESSING, True, outer_blocks)])
+        event.refresh_from_db()
+        self.assertEqual(event.status, OutboxEvent.STATUS_DONE)
+
+        # A worker that died mid-batch leaves its claim; once it runs out the event is due again
+        stuck = _realtime_event(status=OutboxEvent.STATUS_PROCESSING, available_at=timezone.now() - timedelta(seconds=1))
+        deliver = mock.Mock()
+        with self.deliver_with(deliver):
+            self.assertEqual(outbox.drain(), 1)
+        deliver.assert_called_once_with(stuck.payload)
+        stuck.refresh_from_db()
+        self.assertEqual(stuck.status, OutboxEvent.STATUS_DONE)
+
+    @override_settings(OUTBOX_KICK_ON_COMMIT=True, OUTBOX_KICK_INTERVAL=2)
+    def test_kick_inside_interval_schedules_one_trailing_drain(self):
+        with mock.patch('notifications.tasks.drain_outbox.delay') as delay, \
+                mock.patch('notifications.tasks.drain_outbox.apply_async') as apply_async:
+            for _ in range(3):
+                outbox.kick_drain()
+
+        delay.assert_called_once_with()
+        apply_async.assert_called_once_with(countdown=2)
+
+    def test_email_events_are_drained_by_the_email_task(self):
+        _realtime_event()
+        email = OutboxEvent.objects.create(kind=OutboxEvent.KIND_EMAIL, payload={})
+        deliver_email = mock.Mock()
+
+        with mock.patch.dict(outbox._handlers, {
+            OutboxEvent.KIND_REALTIME: mock.Mock(), OutboxEvent.KIND_EMAIL: deliver_email,
+        }):
+            self.assertEqual(tasks.drain_outbox(), 1)
+            deliver_email.assert_not_called()
+            self.assertEqual(tasks.drain_email_outbox(), 1)
+
+        deliver_email.assert_called_once_with({})
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEvent.STATUS_DONE)
+
+    @override_settings(OUTBOX_KICK_ON_COMMIT=True)
+    def test_enqueue_kicks_the_drain_for_its_kind(self):
+        with mock.patch('notifications.tasks.drain_outbox.delay') as delay, \
+                mock.patch('notifications.tasks.drain_email_outbox.delay') as email_delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            outbox.enqueue(OutboxEvent.KIND_EMAIL, {})
+
+        email_delay.assert_called_once_with()
+        delay.assert_not_called()
+
+
+@skipUnlessDBFeature('has_select_for_update_skip_locked')
+@override_settings(CACHES=LOCMEM_CACHE, OUTBOX_KICK_ON_COMMIT=False)
+class OutboxClaimTests(TransactionTestCase):
+    def test_drain_skips_events_locked_by_another_worker(self):
+        locked = _realtime_event()
+        free = _realtime_event()
+        processed = []
+
+        def drain_elsewhere():
+            try:
+                processed.append(outbox.drain())
+            finally:
+                connection.close()
+
+        with mock.patch.dict(outbox._handlers, {OutboxEvent.KIND_REALTIME: mock.Mock()}):
+            with transaction.atomic():
+                OutboxEvent.objects.select_for_update().get(id=locked.id)
+                worker = threading.Thread(target=drain_elsewhere)
+                worker.start()
+                worker.join()
+
+        self.assertEqual(processed, [1])
+        locked.refresh_from_db()
+        free.refresh_from_db()
+        self.assertEqual(locked.status, OutboxEvent.STATUS_PENDING)
+        self.assertEqual(free.status, OutboxEvent.STATUS_DONE)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, OUTBOX_KICK_ON_COMMIT=False)
+class UnreadNotificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.parent = _parent("badge")
+        self.auth = f"Bearer {WayaRefreshToken.for_user(self.parent).access_token}"
+
+    def notify(self, n=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(n):
+                Notification.objects.create(parent=self.parent, type='chore_reminder', title="t", message=f"m{i}")
+
+    def unread_count(self):
+        response = self.client.get('/api/parents/notifications/unread-count/', HTTP_AUTHORIZATION=self.auth)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['unread_count']
+
+    def test_counter_follows_creates_and_mark_read(self):
+        self.notify(3)
+        self.assertEqual(self.unread_count(), 3)
+
+        self.notify(2)
+        notification = Notification.objects.filter(parent=self.parent).first()
+        self.assertTrue(Notification.mark_read(self.parent.id, notification.id))
+        self.assertFalse(Notification.mark_read(self.parent.id, notification.id))
+        self.assertEqual(self.unread_count(), 4)
+
+    def test_read_all(self):
+        self.notify(3)
+        self.assertEqual(self.unread_count(), 3)
+
+        response = self.client.patch('/api/parents/notifications/read-all/', HTTP_AUTHORIZATION=self.auth)
+
+        self.assertEqual(response.json(), {"success": True, "updated": 3})
+        self.assertEqual(self.unread_count(), 0)
+
+    def test_read_all_does_not_pin_the_counter_to_zero(self):
+        self.notify(2)
+        self.unread_count()
+        Notification.mark_all_read(self.parent.id)
+
+        # A notification whose commit raced the UPDATE must still show up in the badge
+        self.notify(1)
+        self.assertEqual(self.unread_count(), 1)
+
+    def test_rebuild_does_not_overwrite_a_change_committed_while_counting(self):
+        self.notify(2)
+        add = LocMemCache.add
+        raced = []
+
+        def commit_before_store(backend, key, *args, **kwargs):
+            # The rebuild has counted 2 rows; a third commits before it stores the count
+            if not raced and not key.endswith(':version') and 'notifications:unread' in key:
+                raced.append(key)
+                self.notify(1)
+            return add(backend, key, *args, **kwargs)
+
+        with mock.patch.object(LocMemCache, 'add', autospec=True, side_effect=commit_before_store):
+            self.unread_count()
+
+        self.assertTrue(raced)
+        self.assertEqual(self.unread_count(), 3)
+
+    def test_cursor_feed_pages_newest_first(self):
+        self.notify(25)
+        now = timezone.now()
+        for minutes, notification in enumerate(Notification.objects.order_by('message')):
+            Notification.objects.filter(id=notification.id).update(created_at=now - timedelta(minutes=minutes))
+
+        first = self.client.get('/api/parents/notifications/', HTTP_AUTHORIZATION=self.auth).json()
+        second = self.client.get(first['next'], HTTP_AUTHORIZATION=self.auth).json()
+
+        self.assertNotIn('count', first)
+        self.assertEqual(len(first['results']), 20)
+        self.assertEqual(len(second['results']), 5)
+        self.assertIsNone(second['next'])
+        created = [n['created_at'] for n in first['results'] + second['results']]
+        self.assertEqual(created, sorted(created, reverse=True))
+
+
+@override_settings(CACHES=LOCMEM_CACHE, OUTBOX_KICK_ON_COMMIT=False, NOTIFICATION_COALESCE_WINDOW_MINUTES=30)
+class CoalescingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.parent = _parent("coalesce")
+        self.context = {"child_id": "c1", "child_name": "Ada", "chore_title": "Dishes"}
+
+    def notify(self, **context):
+        return coalescing.notify(self.parent.id, "chore_completed", {**self.context, **context})
+
+    def test_events_inside_the_window_update_one_row(self):
+        first, created = self.notify()
+        self.assertTrue(created)
+        self.assertEqual((first.title, first.message), ("Chore Completed", "Ada completed 'Dishes'"))
+
+        self.notify(chore_title="Laundry")
+        coalesced, created = self.notify(chore_title="Bins")
+
+        self.assertFalse(created)
+        self.assertEqual(coalesced.id, first.id)
+        self.assertEqual(Notification.objects.count(), 1)
+        coalesced.refresh_from_db()
+        self.assertEqual(coalesced.aggregate_count, 3)
+        self.assertEqual((coalesced.title, coalesced.message), ("Chores Completed", "3 chores completed by Ada"))
+
+    def test_new_row_outside_the_window_or_after_read(self):
+        first, _ = self.notify()
+        Notification.objects.filter(id=first.id).update(updated_at=timezone.now() - timedelta(minutes=31))
+        _, created = self.notify()
+        self.assertTrue(created)
+
+        Notification.mark_all_read(self.parent.id)
+        _, created = self.notify()
+        self.assertTrue(created)
+
+        _, created = self.notify(child_id="c2", child_name="Ben")
+        self.assertTrue(created)
+        self.assertEqual(Notification.objects.count(), 4)
+
+    def test_coalesced_row_moves_to_the_top_of_the_feed(self):
+        first, _ = self.notify()
+        Notification.objects.filter(id=first.id).update(created_at=timezone.now() - timedelta(minutes=5))
+        Notification.objects.create(parent=self.parent, type='chore_reminder', title="t", message="m")
+
+        self.notify()
+
+        auth = f"Bearer {WayaRefreshToken.for_user(self.parent).access_token}"
+        feed = self.client.get('/api/parents/notifications/', HTTP_AUTHORIZATION=auth).json()['results']
+        self.assertEqual(feed[0]['id'], str(first.id))
+
+
+@override_settings(CACHES=LOCMEM_CACHE, NOTIFICATION_RETENTION_DAYS=1, NOTIFICATION_PURGE_BATCH_SIZE=2)
+class PurgeReadNotificationsTests(TestCase):
+    def test_purges_old_read_notifications_in_chunks(self):
+        parent = _parent("purge")
+        for i in range(7):
+            Notification.objects.create(parent=parent, type='chore_reminder', title="t", message=f"m{i}")
+        old = timezone.now() - timedelta(days=2)
+        messages = [f"m{i}" for i in range(5)]
+        Notification.objects.filter(message__in=messages).update(is_read=True, created_at=old)
+        Notification.objects.filter(message="m5").update(created_at=old)   # unread
+        Notification.objects.filter(message="m6").update(is_read=True)     # recent
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(purge_read_notifications(), 5)
+
+        deletes = [q for q in queries if q['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 3)
+        self.assertEqual(
+            sorted(Notification.objects.values_list('message', flat=True)), ["m5", "m6"]
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHE, PRESENCE_TTL_SECONDS=100)
+class PresenceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(presence, '_local_connections', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_counts_follow_connect_and_disconnect(self):
+        presence.connected("user_1", "socket-a")
+        presence.connected("user_1", "socket-b")
+        presence.connected("child_2", "socket-c")
+
+        self.assertEqual(presence.connection_count(), 3)
+        self.assertEqual(presence.online_groups(["user_1", "child_2", "user_3"]), {"user_1", "child_2"})
+
+        presence.disconnected("user_1", "socket-a")
+        presence.disconnected("child_2", "socket-c")
+
+        self.assertEqual(presence.connection_count(), 1)
+        self.assertTrue(presence.is_online("user_1"))
+        self.assertFalse(presence.is_online("child_2"))
+
+    def test_heartbeat_keeps_the_connection_count_alive(self):
+        start = time.time()
+        with mock.patch('time.time', return_value=start):
+            presence.connected("user_1", "socket-a")
+            presence.connected("user_2", "socket-b")
+        with mock.patch('time.time', return_value=start + 75):
+            presence.heartbeat(["user_1"], "socket-a")
+            presence.heartbeat(["user_2"], "socket-b")
+        with mock.patch('time.time', return_value=start + 150):
+            self.assertEqual(presence.connection_count(), 2)
+            self.assertEqual(presence.online_groups(["user_1", "user_2"]), {"user_1", "user_2"})
+            presence.disconnected("user_1", "socket-a")
+            self.assertEqual(presence.connection_count(), 1)
+
+    def test_sockets_of_a_dead_worker_expire(self):
+        start = time.time()
+        with mock.patch('time.time', return_value=start):
+            presence.connected("user_1", "socket-a")
+        with mock.patch('time.time', return_value=start + 101):
+            self.assertFalse(presence.is_online("user_1"))
+            self.assertEqual(presence.connection_count(), 0)
+
+    def test_dead_socket_lapses_while_another_keeps_the_group_online(self):
+        start = time.time()
+        with mock.patch('time.time', return_value=start):
+            presence.connected("user_1", "dead-worker-socket")
+            presence.connected("user_1", "live-socket")
+        # Only the live socket keeps sending heartbeats
+        for elapsed in (50, 100, 150):
+            with mock.patch('time.time', return_value=start + elapsed):
+                presence.heartbeat(["user_1"], "live-socket")
+
+        with mock.patch('time.time', return_value=start + 150):
+            members = cache.get(presence.presence_cache_key("user_1"))
+            self.assertEqual(set(members), {"live-socket"})
+            presence.disconnected("user_1", "live-socket")
+            self.assertFalse(presence.is_online("user_1"))
+
+
+@override_settings(REALTIME_SKIP_OFFLINE=True, REALTIME_BATCH_WINDOW_MS=1)
+class RealtimeDispatcherTests(SimpleTestCase):
+    def setUp(self):
+        self.layer = mock.Mock()
+        self.layer.group_send = mock.AsyncMock()
+        patcher = mock.patch('notifications.dispatch.get_channel_layer', return_value=self.layer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.dispatcher = RealtimeDispatcher()
+
+    def wait_for_sends(self, count):
+        deadline = time.monotonic() + 5
+        while self.layer.group_send.await_count < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.layer.group_send.await_count, count)
+
+    def test_a_failing_batch_does_not_stop_the_sender(self):
+        lookups = [RuntimeError("cache down"), {"user_1"}]
+        with mock.patch('notifications.dispatch.presence.online_groups', side_effect=lookups):
+            self.dispatcher.send("user_1", {"message": "lost"})
+            deadline = time.monotonic() + 5
+            while self.dispatcher.stats()["errors"] < 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            thread = self.dispatcher._thread
+            self.dispatcher.send("user_1", {"message": "sent"})
+            self.wait_for_sends(1)
+
+        self.assertIs(self.dispatcher._thread, thread)
+        self.assertTrue(thread.is_alive())
+        self.assertEqual(self.dispatcher.stats()["errors"], 1)
+        self.layer.group_send.assert_awaited_once_with(
+            "user_1", {"type": "send_notification", "content": {"message": "sent"}}
+        )
+
+    def test_restarted_sender_keeps_the_waiting_messages(self):
+        dead = threading.Thread(target=lambda: None)
+        dead.start()
+        dead.join()
+        self.dispatcher._pid = os.getpid()
+        self.dispatcher._queue = waiting = queue.Queue()
+        self.dispatcher._thread = dead
+        waiting.put(("user_1", {"message": "waiting"}))
+
+        with mock.patch('notifications.dispatch.presence.online_groups', side_effect=lambda groups: set(groups)):
+            self.dispatcher.send("user_2", {"message": "new"})
+            self.wait_for_sends(2)
+
+        self.assertIs(self.dispatcher._queue, waiting)
+        sent = {call.args[0] for call in self.layer.group_send.await_args_list}
+        self.assertEqual(sent, {"user_1", "user_2"})
+
+
+class JWTAuthMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = _parent("socket")
+        cls.child = Child.objects.create(parent=cls.parent, username="socket-kid", name="Kid", pin="1234")
+
+    def scope_for(self, query_string=b"", headers=()):
+        seen = {}
+
+        async def inner(scope, receive, send):
+            seen.update(scope)
+
+        scope = {"type": "websocket", "query_string": query_string, "headers": list(headers)}
+        async_to_sync(JWTAuthMiddleware(inner))(scope, None, None)
+        return seen
+
+    def test_parent_token_from_query_string(self):
+        token = WayaRefreshToken.for_user(self.parent).access_token
+        scope = self.scope_for(query_string=f"token={token}".encode())
+        self.assertEqual(scope["user"], self.parent)
+        self.assertIsNone(scope["child"])
+
+    def test_child_token_from_header(self):
+        token = ChildRefreshToken.for_child(self.child).access_token
+        scope = self.scope_for(headers=[(b"authorization", f"Bearer {token}".encode())])
+        self.assertEqual(scope["child"], self.child)
+        self.assertIsInstance(scope["user"], AnonymousUser)
+
+    def test_bad_token_or_inactive_parent_is_anonymous(self):
+        self.assertIsInstance(self.scope_for(query_string=b"token=garbage")["user"], AnonymousUser)
+
+        token = WayaRefreshToken.for_user(self.parent).access_token
+        User.objects.filter(id=self.parent.id).update(is_active=False)
+        scope = self.scope_for(query_string=f"token={token}".encode())
+        self.assertIsInstance(scope["user"], AnonymousUser)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE,
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+)
+class DashboardStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(presence, '_local_connections', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.parent = _parent("stream")
+        self.group = dashboard.dashboard_group(self.parent.id)
+
+    def test_push_delta_is_sent_after_commit(self):
+        with mock.patch('notifications.dashboard.dispatcher.send') as send:
+            with self.captureOnCommitCallbacks(execute=True):
+                dashboard.push_delta(self.parent.id, "wallet.balance", balance=Decimal("12.50"))
+                send.assert_not_called()
+
+        send.assert_called_once_with(
+            self.group, {"stream": "dashboard", "event": "wallet.balance", "balance": "12.50"}
+        )
+
+    async def open_socket(self):
+        # asgiref's communicator: channels.testing needs daphne, which we don't deploy
+        token = await sync_to_async(lambda: str(WayaRefreshToken.for_user(self.parent).access_token))()
+        socket = ApplicationCommunicator(JWTAuthMiddleware(URLRouter(websocket_urlpatterns)), {
+            "type": "websocket",
+            "path": "/ws/notifications/",
+            "query_string": f"token={token}".encode(),
+            "headers": [],
+            "subprotocols": [],
+        })
+        await socket.send_input({"type": "websocket.connect"})
+        self.assertEqual((await socket.receive_output())["type"], "websocket.accept")
+        return socket
+
+    async def send_json(self, socket, data):
+        await socket.send_input({"type": "websocket.receive", "text": json.dumps(data)})
+
+    async def receive_json(self, socket):
+        return json.loads((await socket.receive_output())["text"])
+
+    async def test_subscribe_and_unsubscribe(self):
+        socket = await self.open_socket()
+        layer = get_channel_layer()
+
+        await self.send_json(socket, {"stream": "dashboard", "action": "subscribe"})
+        self.assertEqual(await self.receive_json(socket), {"stream": "dashboard", "event": "subscribed"})
+        # The subscription joins a group but is not a second connection
+        self.assertTrue(presence.is_online(self.group))
+        self.assertEqual(presence.connection_count(), 1)
+
+        await layer.group_send(
+            self.group, {"type": "send_notification", "content": {"stream": "dashboard", "event": "ping"}}
+        )
+        self.assertEqual(await self.receive_json(socket), {"stream": "dashboard", "event": "ping"})
+
+        await self.send_json(socket, {"stream": "dashboard", "action": "unsubscribe"})
+        await self.send_json(socket, {"stream": "dashboard", "action": "unsubscribe"})
+        self.assertTrue(await socket.receive_nothing())  # lets the consumer handle both
+        await layer.group_send(self.group, {"type": "send_notification", "content": {"event": "ignored"}})
+        self.assertTrue(await socket.receive_nothing())
+        self.assertFalse(presence.is_online(self.group))
+        self.assertEqual(presence.connection_count(), 1)
+
+        await socket.send_input({"type": "websocket.disconnect", "code": 1000})
+        await socket.wait()
+        self.assertEqual(presence.connection_count(), 0)
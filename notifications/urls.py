@@ -5,7 +5,10 @@ from .views import (
     PasswordResetView,
     RewardView,
     NotificationListView, 
-    MarkNotificationReadView
+    MarkNotificationReadView,
+    MarkAllNotificationsReadView,
+    UnreadNotificationCountView,
+    RealtimeStatsView,
 )
 
 urlpatterns = [
@@ -15,4 +18,7 @@ urlpatterns = [
     path('rewards/', RewardView.as_view(), name='reward'),
     path("", NotificationListView.as_view(), name="notification-list"),
     path("<uuid:id>/read/", MarkNotificationReadView.as_view(), name="notification-read"),    
+    path("read-all/", MarkAllNotificationsReadView.as_view(), name="notification-read-all"),
+    path("unread-count/", UnreadNotificationCountView.as_view(), name="notification-unread-count"),
+    path("realtime/stats/", RealtimeStatsView.as_view(), name="realtime-stats"),
 ]
\ No newline at end of file
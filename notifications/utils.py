@@ -1,10 +1,29 @@
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from django.db import transaction
+
+from notifications import coalescing, outbox
+from notifications.dispatch import dispatcher
+from notifications.models import OutboxEvent
+
+
+def build_notification_content(message, chore_id=None):
+    content = {
+        "title": "Chore Completed" if chore_id else "Notification",
+        "message": message,
+    }
+
+    if chore_id:
+        content["choreId"] = str(chore_id)
+
+    return content
+
 
 def notify_parent_realtime(user, message, chore_id=None):
     """
     Sends a real-time WebSocket notification to the parent user.
 
+    The push is handed to the background dispatcher (notifications.dispatch), so this
+    returns immediately instead of blocking the request on Redis.
+
     :param user: The Django user instance (must be authenticated).
     :param message: The message content.
     :param chore_id: Optional chore ID to include in the notification.
@@ -12,22 +31,47 @@ def notify_parent_realtime(user, message, chore_id=None):
     if not user or not user.is_authenticated:
         return
 
-    channel_layer = get_channel_layer()
-    content = {
-        "title": "Chore Completed" if chore_id else "Notification",
-        "message": message,
-    }
+    dispatcher.send(f"user_{user.id}", build_notification_content(message, chore_id))
 
-    if chore_id:
-        content["choreId"] = str(chore_id)
 
-    async_to_sync(channel_layer.group_send)(
-        f"user_{user.id}",
-        {
-            "type": "send_notification",
-            "content": content
-        }
-    )
+def queue_parent_realtime(parent_id, message, chore_id=None):
+    """
+    Outbox-backed variant of notify_parent_realtime: the message is recorded in the
+    caller's transaction and pushed by the outbox worker after commit.
+    """
+    return outbox.enqueue(OutboxEvent.KIND_REALTIME, {
+        "group": f"user_{parent_id}",
+        "content": build_notification_content(message, chore_id),
+    })
+
+
+def queue_email(subject, message, recipient_list, html_message=None):
+    """
+    Send an email from the outbox worker once the caller's transaction commits, with
+    retries; the request never waits on the mail provider.
+    """
+    payload = {"subject": subject, "message": message, "recipient_list": list(recipient_list)}
+    if html_message:
+        payload["html_message"] = html_message
+    return outbox.enqueue(OutboxEvent.KIND_EMAIL, payload)
+
+
+def notify_chore_completed(chore):
+    """
+    Persist the parent's "chore completed" notification and queue its realtime push
+    in one transaction. Completions by the same child close together share one row.
+    """
+    child = chore.assigned_to
+    with transaction.atomic():
+        notification, _ = coalescing.notify(
+            chore.parent_id,
+            "chore_completed",
+            {"child_id": child.id, "child_name": child.username, "chore_title": chore.title},
+            related_id=chore.id,
+        )
+        queue_parent_realtime(chore.parent_id, notification.message, chore.id)
+    return notification
+
 
 def send_notification(user, message):
     """
@@ -1,10 +1,16 @@
+from asgiref.sync import sync_to_async
 from rest_framework import generics, status, permissions
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.views import APIView
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 from children.models import Child
 from children.serializers import ChildSerializer
 from .models import Notification, Reward
+from . import presence
+from .dispatch import dispatcher
+from waya_backend.async_views import AsyncViewMixin
 from .serializers import (
     UserProfileSerializer,
     NotificationRewardSerializer,  # Use the renamed serializer here
@@ -68,14 +74,27 @@ class RewardView(generics.RetrieveUpdateAPIView):
 
 
 # ---- Notification List View ----
-class NotificationListView(generics.ListAPIView):
+class NotificationCursorPagination(CursorPagination):
+    # Seeks on the (parent, -created_at) index instead of counting and offsetting.
+    ordering = "-created_at"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class NotificationListView(AsyncViewMixin, generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationCursorPagination
+
+    async def get(self, request, *args, **kwargs):
+        # DRF pagination and serialization are sync: one thread hop for the page query
+        return await sync_to_async(self.list)(request, *args, **kwargs)
 
     def get_queryset(self):
         user = self.request.user
         unread = self.request.query_params.get("unread")
-        qs = Notification.objects.filter(parent=user).order_by("-created_at")
+        qs = Notification.objects.filter(parent=user)
         if unread and unread.lower() == "true":
             qs = qs.filter(is_read=False)
         return qs
@@ -90,8 +109,42 @@ class MarkNotificationReadView(generics.UpdateAPIView):
 
     def patch(self, request, *args, **kwargs):
         notification = self.get_object()
-        if notification.parent != request.user:
+        if notification.parent_id != request.user.id:
             return Response({"error": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
-        notification.is_read = True
-        notification.save()
+        Notification.mark_read(request.user.id, notification.id)
         return Response({"success": True})
+
+
+# ---- Mark All Notifications as Read View ----
+class MarkAllNotificationsReadView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def patch(self, request, *args, **kwargs):
+        updated = Notification.mark_all_read(request.user.id)
+        return Response({"success": True, "updated": updated})
+
+
+# ---- Unread Notification Count View ----
+class UnreadNotificationCountView(APIView):
+    """
+    Unread badge count, polled by the frontend. Answered from the cached counter.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        return Response({"unread_count": Notification.unread_count(request.user.id)})
+
+
+# ---- Realtime Dispatch Stats View ----
+class RealtimeStatsView(APIView):
+    """
+    Queue depth, group-send volume and latency of this process's realtime dispatcher,
+    plus the number of live sockets across all workers.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            **dispatcher.stats(),
+            "connections": presence.connection_count(),
+        })
@@ -2,8 +2,7 @@ import uuid
 from django.db import models
 from children.models import Child
 from django.utils import timezone
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from notifications import dashboard
 
 
 class Chore(models.Model):
@@ -45,9 +44,13 @@ class Chore(models.Model):
 
     def save(self, *args, **kwargs):
         is_new = self._state.adding
+        status_changed = is_new
+        previous_status = None
         if not is_new:
             old = Chore.objects.filter(pk=self.pk).first()
             if old and old.status != self.status:
+                status_changed = True
+                previous_status = old.status
                 if self.status == self.STATUS_COMPLETED:
                     self.completed_at = timezone.now()
                 else:
@@ -57,26 +60,17 @@ class Chore(models.Model):
                 self.completed_at = timezone.now()
         super().save(*args, **kwargs)
 
+        if status_changed:
+            dashboard.push_delta(
+                self.parent_id,
+                "chore.status",
+                chore_id=self.id,
+                child_id=self.assigned_to_id,
+                reward=self.reward,
+                previous_status=previous_status,
+                status=self.status,
+            )
+
     def __str__(self):
         return f"{self.title} ({self.status}) for {self.assigned_to}"
 
-
-def notify_parent_realtime(user, message, chore_id):
-    """
-    Sends a real-time notification to the parent when a chore is completed.
-    """
-    channel_layer = get_channel_layer()
-    try:
-        async_to_sync(channel_layer.group_send)(
-            f"user_{user.id}",
-            {
-                "type": "send_notification",
-                "content": {
-                    "title": "Chore Completed",
-                    "message": message,
-                    "choreId": str(chore_id),
-                }
-            }
-        )
-    except Exception as e:
-        pass
@@ -24,7 +24,7 @@ class IsParentOrChildViewingOwnChores(permissions.BasePermission):
                 return False  # Parent must supply childId
             try:
                 child = Child.objects.get(id=child_id)
-                if child.parent == request.user:
+                if child.parent_id == request.user.id:
                     request._view_child = child  # cache if needed
                     return True
             except Child.DoesNotExist:
@@ -38,7 +38,7 @@ class IsParentOfChore(permissions.BasePermission):
     Allows only the parent who owns the chore to access it.
     """
     def has_object_permission(self, request, view, obj):
-        return obj.parent == request.user
+        return obj.parent_id == request.user.id
 # taskmaster/permissions.py
 from rest_framework.permissions import BasePermission
 
@@ -2,7 +2,8 @@
 
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from taskmaster.models import Chore, notify_parent_realtime
+from taskmaster.models import Chore
+from notifications.utils import notify_parent_realtime
 
 @receiver(post_save, sender=Chore)
 def chore_status_change_handler(sender, instance, created, **kwargs):
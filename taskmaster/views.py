@@ -2,10 +2,10 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.exceptions import PermissionDenied
+from django.db import transaction as db_transaction
 
 from .models import Chore
-from children.models import Child
-from notifications.models import Notification
+from notifications.utils import notify_chore_completed
 from .serializers import (
     ChoreCreateUpdateSerializer,
     ChoreReadSerializer,
@@ -13,7 +13,6 @@ from .serializers import (
     ChoreStatusUpdateSerializer,
 )
 from .permissions import IsParentOfChore, IsChildAssignedToChore, IsParentOrChildViewingOwnChores
-from .models import notify_parent_realtime
 
 from children.authentication import ChildJWTAuthentication  # Your custom child auth
 
@@ -43,7 +42,7 @@ class ChoreListView(generics.ListAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        queryset = Chore.objects.filter(parent=user)
+        queryset = Chore.objects.filter(parent=user).select_related('assigned_to', 'parent')
 
         status_param = self.request.query_params.get("status")
         child_id = self.request.query_params.get("assignedTo")
@@ -87,23 +86,14 @@ class ChoreStatusUpdateView(generics.UpdateAPIView):
 
     def patch(self, request, *args, **kwargs):
         try:
-            instance = self.get_object()
-            previous_status = instance.status
-            response = super().patch(request, *args, **kwargs)
+            with db_transaction.atomic():
+                instance = self.get_object()
+                previous_status = instance.status
+                response = super().patch(request, *args, **kwargs)
 
-            if instance.status == Chore.STATUS_COMPLETED and previous_status != Chore.STATUS_COMPLETED:
-                Notification.objects.create(
-                    parent=instance.parent,
-                    type="chore_completed",
-                    title="Chore Completed",
-                    message=f"{instance.assigned_to.username} completed '{instance.title}'",
-                    related_id=instance.id
-                )
-                notify_parent_realtime(
-                    instance.parent,
-                    f"{instance.assigned_to.username} completed '{instance.title}'",
-                    instance.id
-                )
+                # super().patch() saves a fresh copy of the chore, so read the new status from the response
+                if response.data.get("status") == Chore.STATUS_COMPLETED and previous_status != Chore.STATUS_COMPLETED:
+                    notify_chore_completed(instance)
 
             return response
         except Chore.DoesNotExist:
@@ -165,11 +155,9 @@ class ChildChoreListView(generics.ListAPIView):
         # Otherwise, assume a parent with childId query param
         child_id = self.request.query_params.get("childId")
         if child_id:
-            try:
-                child_obj = Child.objects.get(id=child_id, parent=user)
-            except Child.DoesNotExist:
+            if not user.owns_child(child_id):
                 raise PermissionDenied("Child not found or does not belong to you.")
-            return Chore.objects.filter(assigned_to=child_obj)
+            return Chore.objects.filter(assigned_to_id=child_id)
 
         # If no child or no permission, return empty queryset
         return Chore.objects.none()
@@ -187,22 +175,13 @@ class ChildChoreStatusUpdateView(generics.UpdateAPIView):
         return chore
 
     def patch(self, request, *args, **kwargs):
-        instance = self.get_object()
-        previous_status = instance.status
-        response = super().patch(request, *args, **kwargs)
-
-        if instance.status == Chore.STATUS_COMPLETED and previous_status != Chore.STATUS_COMPLETED:
-            Notification.objects.create(
-                parent=instance.parent,
-                type="chore_completed",
-                title="Chore Completed",
-                message=f"{instance.assigned_to.username} completed '{instance.title}'",
-                related_id=instance.id
-            )
-            notify_parent_realtime(
-                instance.parent,
-                f"{instance.assigned_to.username} completed '{instance.title}'",
-                instance.id
-            )
+        with db_transaction.atomic():
+            instance = self.get_object()
+            previous_status = instance.status
+            response = super().patch(request, *args, **kwargs)
+
+            # super().patch() saves a fresh copy of the chore, so read the new status from the response
+            if response.data.get("status") == Chore.STATUS_COMPLETED and previous_status != Chore.STATUS_COMPLETED:
+                notify_chore_completed(instance)
 
         return response
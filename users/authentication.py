@@ -0,0 +1,39 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from users.models import User
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that builds ``request.user`` from the token's claims (see
+    users.tokens.WayaRefreshToken) instead of selecting the user row.
+
+    Only ``id``, ``role`` and ``is_active`` are set; every other column is deferred and
+    loaded in one query the first time a view reads it. Tokens issued without a role
+    claim go through the normal database lookup.
+
+    Deactivation is checked against User.is_active_cached, which User.save keeps current,
+    so a user deactivated in the admin loses access on their next request.
+    """
+    def get_user(self, validated_token):
+        if 'role' not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if not User.is_active_cached(user_id):
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        user = User.from_db(
+            None,
+            ['id', 'role', 'is_active'],
+            [User._meta.pk.to_python(user_id), validated_token['role'], True],
+        )
+        user.token_child_ids = frozenset(validated_token.get('child_ids', ()))
+        return user
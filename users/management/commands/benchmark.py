@@ -0,0 +1,200 @@
+import json
+import random
+import re
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from children.models import Child
+from children.tokens import ChildRefreshToken
+from users.models import User
+from users.tokens import WayaRefreshToken
+
+# (name, actor, path, weight): roughly the read mix of the parent and child apps.
+SCENARIO = [
+    ("parent.chore_list", "parent", "/api/taskmaster/chores/", 12),
+    ("parent.chore_summary", "parent", "/api/taskmaster/chores/summary/", 6),
+    ("parent.chore_insights", "parent", "/api/insighttracker/chores/insights/", 4),
+    ("parent.dashboard_stats", "parent", "/api/familywallet/wallet/dashboard_stats/", 8),
+    ("parent.wallet_summary", "parent", "/api/familywallet/wallet/wallet_summary/", 8),
+    ("parent.reward_pie_chart", "parent", "/api/familywallet/wallet/reward_pie_chart/", 4),
+    ("parent.transactions", "parent", "/api/familywallet/transactions/", 6),
+    ("parent.wallet_analysis", "parent", "/api/familywallet/child-wallets/analysis/", 3),
+    ("parent.notifications", "parent", "/api/parents/notifications/", 6),
+    ("parent.unread_count", "parent", "/api/parents/notifications/unread-count/", 15),
+    ("child.earning_meter", "child", "/api/earningmeter/dashboard/", 8),
+    ("child.earning_totals", "child", "/api/earningmeter/totals/", 6),
+    ("child.chores", "child", "/api/taskmaster/children/chores/", 8),
+    ("child.goal_summary", "child", "/api/goalgetter/goals/summary/", 6),
+    ("child.moneymaze_dashboard", "child", "/api/moneymaze/dashboard/", 4),
+    ("child.concepts", "child", "/api/moneymaze/concepts/", 3),
+]
+
+
+# Connection setup reported by RequestMetricsMiddleware in the Server-Timing header
+DB_CONNECT_RE = re.compile(r'db-connect;dur=([\d.]+);desc="(\d+) new"')
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a weighted mix of parent and child API calls against a running server and "
+        "write per-endpoint p50/p95/p99 latency and requests/second to a JSON file. "
+        "Compare runs with DB_CONNECTION_MODE=none and persistent to see connection setup cost."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--label', required=True, help="Label passed to seed_families; selects the families to use.")
+        parser.add_argument('--requests', type=int, default=2000, help="Total requests to send.")
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--warmup', type=int, default=50, help="Requests sent first and not measured.")
+        parser.add_argument('--timeout', type=float, default=30.0)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', default=None, help="Result file (default: benchmark-<timestamp>.json).")
+
+    def handle(self, *args, **options):
+        actors = self._load_actors(options['label'])
+        rng = random.Random(options['seed'])
+        names = [step[0] for step in SCENARIO]
+        weights = [step[3] for step in SCENARIO]
+        steps = {step[0]: step for step in SCENARIO}
+
+        # Pre-draw every request so worker threads share no random state.
+        plan = []
+        for _ in range(options['warmup'] + options['requests']):
+            name, actor, path, _ = steps[rng.choices(names, weights)[0]]
+            family = rng.choice(actors)
+            token = family['parent_token'] if actor == 'parent' else rng.choice(family['child_tokens'])
+            plan.append((name, path, token))
+
+        local = threading.local()
+
+        def session():
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+            return local.session
+
+        def call(item):
+            name, path, token = item
+            url = options['base_url'].rstrip('/') + path
+            started = time.perf_counter()
+            connect_ms, connects = 0.0, 0
+            try:
+                response = session().get(url, headers={'Authorization': f'Bearer {token}'}, timeout=options['timeout'])
+                ok = response.status_code < 400
+                match = DB_CONNECT_RE.search(response.headers.get('Server-Timing', ''))
+                if match:
+                    connect_ms, connects = float(match.group(1)), int(match.group(2))
+            except requests.RequestException:
+                ok = False
+            return name, (time.perf_counter() - started) * 1000, ok, connect_ms, connects
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            list(pool.map(call, plan[:options['warmup']]))
+
+            latencies = defaultdict(list)
+            errors = defaultdict(int)
+            connect_ms = defaultdict(float)
+            connects = defaultdict(int)
+            started = time.perf_counter()
+            for name, elapsed_ms, ok, connect_time, new_connections in pool.map(call, plan[options['warmup']:]):
+                latencies[name].append(elapsed_ms)
+                connect_ms[name] += connect_time
+                connects[name] += new_connections
+                if not ok:
+                    errors[name] += 1
+            wall = time.perf_counter() - started
+
+        endpoints = {}
+        for name in names:
+            values = sorted(latencies.get(name, []))
+            if not values:
+                continue
+            endpoints[name] = {
+                'count': len(values),
+                'errors': errors[name],
+                'p50_ms': round(percentile(values, 50), 2),
+                'p95_ms': round(percentile(values, 95), 2),
+                'p99_ms': round(percentile(values, 99), 2),
+                'rps': round(len(values) / wall, 2),
+                'db_connects': connects[name],
+                'db_connect_ms_per_request': round(connect_ms[name] / len(values), 2),
+            }
+
+        all_values = sorted(v for values in latencies.values() for v in values)
+        result = {
+            'commit': self._git_commit(),
+            'started_at': timezone.now().isoformat(),
+            'base_url': options['base_url'],
+            'families': len(actors),
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'duration_s': round(wall, 3),
+            'total': {
+                'count': len(all_values),
+                'errors': sum(errors.values()),
+                'p50_ms': round(percentile(all_values, 50), 2),
+                'p95_ms': round(percentile(all_values, 95), 2),
+                'p99_ms': round(percentile(all_values, 99), 2),
+                'rps': round(len(all_values) / wall, 2),
+                'db_connects': sum(connects.values()),
+                'db_connect_ms_per_request': round(sum(connect_ms.values()) / max(len(all_values), 1), 2),
+            },
+            'endpoints': endpoints,
+        }
+
+        output = options['output'] or timezone.now().strftime('benchmark-%Y%m%d%H%M%S.json')
+        with open(output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+        self.stdout.write(
+            f"{'endpoint':32} {'count':>6} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8} {'conn':>6} {'conn_ms':>8}"
+        )
+        for name, stats in list(endpoints.items()) + [('TOTAL', result['total'])]:
+            self.stdout.write(
+                f"{name:32} {stats['count']:>6} {stats['errors']:>4} {stats['p50_ms']:>8} "
+                f"{stats['p95_ms']:>8} {stats['p99_ms']:>8} {stats['rps']:>8} "
+                f"{stats['db_connects']:>6} {stats['db_connect_ms_per_request']:>8}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+    def _load_actors(self, label):
+        """Mint access tokens locally so the benchmark does not measure password hashing."""
+        parents = list(User.objects.filter(email__startswith=label))
+        if not parents:
+            raise CommandError(f"No families with label '{label}'. Run seed_families first.")
+
+        children = defaultdict(list)
+        for child in Child.objects.filter(parent__in=parents):
+            children[child.parent_id].append(str(ChildRefreshToken.for_child(child).access_token))
+
+        return [
+            {
+                'parent_token': str(WayaRefreshToken.for_user(parent).access_token),
+                'child_tokens': children[parent.id],
+            }
+            for parent in parents
+            if children[parent.id]
+        ]
+
+    @staticmethod
+    def _git_commit():
+        try:
+            return subprocess.check_output(
+                ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+            ).strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from waya_backend.seed import DEFAULT_PASSWORD, DEFAULT_PIN, seed_curriculum, seed_families
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic families (children, wallets, chores, transactions, goals, quiz progress) for load testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('count', type=int, help="Number of families to create.")
+        parser.add_argument('--children', type=int, default=3)
+        parser.add_argument('--chores', type=int, default=200, help="Chores per family.")
+        parser.add_argument('--transactions', type=int, default=2000, help="Transactions per family.")
+        parser.add_argument('--goals', type=int, default=10, help="Goals per family.")
+        parser.add_argument(
+            '--label',
+            default=None,
+            help="Prefix for parent emails and child usernames; the benchmark command selects families by it. "
+                 "Defaults to a timestamped 'bench' label.",
+        )
+        parser.add_argument('--batch', type=int, default=50, help="Families per transaction.")
+
+    def handle(self, *args, **options):
+        label = options['label'] or timezone.now().strftime('bench%Y%m%d%H%M%S')
+        count = options['count']
+        started = timezone.now()
+
+        seed_curriculum()
+        created = 0
+        while created < count:
+            size = min(options['batch'], count - created)
+            with transaction.atomic():
+                seed_families(
+                    size,
+                    children=options['children'],
+                    chores=options['chores'],
+                    transactions=options['transactions'],
+                    goals=options['goals'],
+                    label=f"{label}x{created // options['batch']}x",
+                )
+            created += size
+            self.stdout.write(f"  {created}/{count} families")
+
+        elapsed = (timezone.now() - started).total_seconds()
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {count} families with label '{label}' in {elapsed:.1f}s "
+            f"(password '{DEFAULT_PASSWORD}', child PIN '{DEFAULT_PIN}')."
+        ))
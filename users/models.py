@@ -1,3 +1,4 @@
+import logging
 import uuid
 from datetime import timedelta
 from django.db import models
@@ -5,6 +6,11 @@ from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseU
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.conf import settings
+from django.core.cache import cache
+
+from cache_utils import get_or_set_cache
+
+logger = logging.getLogger(__name__)
 
 class UserManager(BaseUserManager):
     def create_user(self, email, full_name, password=None, **extra_fields):
@@ -72,6 +78,48 @@ class User(AbstractBaseUser, PermissionsMixin):
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
+        if 'is_active' in self.__dict__:
+            self.cache_active_status()
+
+    @staticmethod
+    def active_cache_key(user_id):
+        return f"users:active:{user_id}"
+
+    @classmethod
+    def is_active_cached(cls, user_id):
+        """
+        Whether the user may still use their tokens. Kept in the cache by save() (so a
+        deactivation in the admin applies at once) and login, read from the database on a miss.
+        """
+        return get_or_set_cache(
+            cls.active_cache_key(user_id),
+            settings.USER_ACTIVE_CACHE_SECONDS,
+            lambda: cls.objects.filter(id=user_id, is_active=True).exists(),
+        )
+
+    def cache_active_status(self):
+        try:
+            cache.set(self.active_cache_key(self.id), self.is_active, settings.USER_ACTIVE_CACHE_SECONDS)
+        except Exception as e:
+            logger.error(f"[CACHE-ERROR] Key: {self.active_cache_key(self.id)} — {str(e)}")
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Users built from token claims (users.authentication) defer every other column;
+        # load them together on first access instead of one query per attribute.
+        if fields is not None and hasattr(self, 'token_child_ids'):
+            deferred = self.get_deferred_fields()
+            if set(fields) <= deferred:
+                fields = deferred
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+    def owns_child(self, child_id):
+        """
+        Whether ``child_id`` is one of this parent's children. Answered from the token's
+        child_ids claim when possible, otherwise (e.g. a child added after login) from the database.
+        """
+        if str(child_id) in getattr(self, 'token_child_ids', ()):
+            return True
+        return self.children.filter(id=child_id).exists()
 
     def __str__(self):
         return f"{self.full_name} ({self.role.capitalize()})"
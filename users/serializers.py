@@ -117,14 +117,11 @@ class PasswordResetRequestSerializer(serializers.Serializer):
         # Change this to match your frontend route for resetting passwords
         reset_link = f"https://{domain}/auth/reset-password-confirm/?uidb64={uid}&token={token}"
 
-        try:
-            send_email(
-                subject="Reset Your Waya Password",
-                message=f"Hello {user.full_name},\n\nClick the link to reset your password:\n{reset_link}\n\nIf you didn't request this, ignore this email.",
-                to_email=user.email
-            )
-        except Exception as e:
-            raise serializers.ValidationError({"email": f"Failed to send reset email: {str(e)}"})
+        send_email(
+            subject="Reset Your Waya Password",
+            message=f"Hello {user.full_name},\n\nClick the link to reset your password:\n{reset_link}\n\nIf you didn't request this, ignore this email.",
+            to_email=user.email
+        )
 
         return {}
 
@@ -1,3 +1,184 @@
-from django.test import TestCase
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from children.models import Child
+from children.permissions import IsParentOfChild
+from familywallet.models import Transaction
+from familywallet.permissions import IsFamilyMemberForTransaction, IsOwnerOfWallet
+from notifications import outbox
+from notifications.models import OutboxEvent
+from taskmaster.models import Chore
+from taskmaster.permissions import IsParentOfChore, IsParentOrChildViewingOwnChores
+from users.authentication import ClaimsJWTAuthentication
+from users.models import User
+from users.tokens import WayaRefreshToken
+from waya_backend.seed import seed_family
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    OUTBOX_KICK_ON_COMMIT=False,
+)
+class TransactionalEmailTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(f"mail{n}@example.com", f"Mail Parent {n}", "Passw0rd!", terms_accepted=True)
+            for n in range(3)
+        ]
+
+    def test_password_reset_email_is_queued(self):
+        response = self.client.post('/api/users/password-reset/', {'email': 'mail0@example.com'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail.outbox, [])
+        self.assertTrue(OutboxEvent.objects.filter(kind=OutboxEvent.KIND_EMAIL).exists())
+
+    def test_drain_sends_batch_over_one_connection(self):
+        for user in self.users:
+            self.client.post('/api/users/password-reset/', {'email': user.email})
+
+        with mock.patch('notifications.outbox.get_connection', wraps=outbox.get_connection) as get_connection:
+            outbox.drain()
+
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [u.email for u in self.users])
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    OUTBOX_KICK_ON_COMMIT=False,
+)
+class ClaimsJWTAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = seed_family(label="claims", children=2, chores=4, transactions=4, goals=0)
+        cls.other = seed_family(label="claims-other", children=1, chores=2, transactions=2, goals=0)
+
+    def setUp(self):
+        cache.clear()
+
+    def authenticate(self, token):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f"Bearer {token}")
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+
+    def test_user_is_built_from_claims(self):
+        token = WayaRefreshToken.for_user(self.parent).access_token
+        child_ids = {str(child_id) for child_id in self.parent.children.values_list('id', flat=True)}
+
+        with self.assertNumQueries(0):
+            user = self.authenticate(token)
+            self.assertEqual((user.id, user.role, user.is_active), (self.parent.id, User.ROLE_PARENT, True))
+            self.assertEqual(user.token_child_ids, child_ids)
+
+        # Deferred columns come back together in one query
+        with self.assertNumQueries(1):
+            self.assertEqual((user.email, user.full_name), (self.parent.email, self.parent.full_name))
+
+    def test_deactivated_user_is_refused_at_once(self):
+        token = WayaRefreshToken.for_user(self.parent).access_token
+        self.authenticate(token)
+
+        self.parent.is_active = False
+        self.parent.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+        self.parent.is_active = True
+        self.parent.save()
+        self.assertEqual(self.authenticate(token).id, self.parent.id)
+
+    def test_status_is_read_from_the_database_on_a_miss(self):
+        token = WayaRefreshToken.for_user(self.parent).access_token
+        User.objects.filter(id=self.parent.id).update(is_active=False)
+        cache.clear()
+
+        with self.assertNumQueries(1), self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_token_without_role_falls_back_to_the_database(self):
+        token = RefreshToken.for_user(self.parent).access_token
+
+        with self.assertNumQueries(1):
+            user = self.authenticate(token)
+        self.assertFalse(hasattr(user, 'token_child_ids'))
+        self.assertEqual(user.email, self.parent.email)
+
+    def test_owns_child_uses_the_claim_then_the_database(self):
+        user = self.authenticate(WayaRefreshToken.for_user(self.parent).access_token)
+        known = self.parent.children.first()
+        later = Child.objects.create(parent=self.parent, username="claims-late", name="Late", pin="1234")
+        stranger = self.other.children.first()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(user.owns_child(known.id))
+        with self.assertNumQueries(1):
+            self.assertTrue(user.owns_child(later.id))
+        self.assertFalse(user.owns_child(stranger.id))
+
+    def test_ownership_permissions_compare_ids(self):
+        user = self.authenticate(WayaRefreshToken.for_user(self.parent).access_token)
+        request = SimpleNamespace(user=user)
+        child = self.parent.children.first()
+        chore = Chore.objects.filter(parent=self.parent).first()
+        wallet = self.parent.family_wallet
+        transaction = Transaction.objects.filter(parent=self.parent).first()
+        others = (
+            self.other.children.first(), Chore.objects.filter(parent=self.other).first(),
+            self.other.family_wallet, Transaction.objects.filter(parent=self.other).first(),
+        )
+        checks = [IsParentOfChild(), IsParentOfChore(), IsOwnerOfWallet(), IsFamilyMemberForTransaction()]
+
+        with self.assertNumQueries(0):
+            for permission, own, other in zip(checks, (child, chore, wallet, transaction), others):
+                self.assertTrue(permission.has_object_permission(request, None, own), permission)
+                self.assertFalse(permission.has_object_permission(request, None, other), permission)
+
+    def test_transaction_permission_for_the_child_involved(self):
+        transaction = Transaction.objects.filter(parent=self.parent, child__isnull=False).first()
+        request = SimpleNamespace(user=SimpleNamespace(id=None), child=transaction.child)
+        permission = IsFamilyMemberForTransaction()
+
+        self.assertTrue(permission.has_object_permission(request, None, transaction))
+        request.child = self.other.children.first()
+        self.assertFalse(permission.has_object_permission(request, None, transaction))
+
+    def test_transfer_checks_ownership_from_the_claim(self):
+        token = WayaRefreshToken.for_user(self.parent).access_token
+
+        def transfer(child):
+            return self.client.post(
+                "/api/familywallet/wallet/transfer/", {"child_id": str(child.id), "amount": "5.00"},
+                content_type="application/json", HTTP_AUTHORIZATION=f"Bearer {token}",
+            )
+
+        own = self.parent.children.first()
+        with CaptureQueriesContext(connection) as queries:
+            response = transfer(own)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertFalse([q for q in queries if 'FROM "children_child"' in q['sql']])
+
+        self.assertEqual(transfer(self.other.children.first()).status_code, 404)
+
+    def test_parent_viewing_child_chores(self):
+        user = self.authenticate(WayaRefreshToken.for_user(self.parent).access_token)
+        permission = IsParentOrChildViewingOwnChores()
+
+        def allowed(child_id=None):
+            query = f"?childId={child_id}" if child_id else ""
+            request = Request(APIRequestFactory().get(f"/{query}"))
+            request.user = user
+            return permission.has_permission(request, None)
+
+        self.assertTrue(allowed(self.parent.children.first().id))
+        self.assertFalse(allowed(self.other.children.first().id))
+        self.assertFalse(allowed())
@@ -0,0 +1,22 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class WayaRefreshToken(RefreshToken):
+    """
+    Parent refresh token carrying the claims that ClaimsJWTAuthentication and the
+    permission classes authorize from, so API requests don't need to load the user row:
+
+    - ``role``: the user's role
+    - ``child_ids``: ids of the parent's children at login
+
+    Access tokens minted from it, including on refresh, copy both claims. Children added
+    after login are missing from ``child_ids``; User.owns_child falls back to the database.
+    """
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['role'] = user.role
+        token['child_ids'] = [str(child_id) for child_id in user.children.values_list('id', flat=True)]
+        # The row was just loaded; spare the first API request the is_active lookup
+        user.cache_active_status()
+        return token
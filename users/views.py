@@ -4,7 +4,6 @@ import requests
 from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 from django.http import HttpResponseRedirect, JsonResponse
 #from django.shortcuts import get_object_or_404
 from django.urls import reverse
@@ -17,7 +16,7 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from users.models import User
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
+from users.tokens import WayaRefreshToken
 from dj_rest_auth.registration.views import SocialLoginView
 from allauth.socialaccount.helpers import complete_social_login
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
@@ -62,28 +61,12 @@ class UserRegistrationView(generics.CreateAPIView):
                 verification_link = f"https://{domain}/auth/verify-email/?uidb64={uidb64}&token={token}"
 
 
-                try:
-                    # Django's SMTP email system (commented out)
-                    # send_mail(
-                    #     subject="Verify Your Waya Account",
-                    #     message=f"Click the link to verify your email: {verification_link}",
-                    #     from_email=settings.DEFAULT_FROM_EMAIL,
-                    #     recipient_list=[user.email],
-                    #     fail_silently=False,
-                    # )
-
-                    # SendGrid implementation
-                    send_email(
-                        subject="Verify Your Waya Account",
-                        message=f"Click the link to verify your email: {verification_link}",
-                        to_email=user.email
-                    )
-
-                except Exception as e:
-                    return Response(
-                        {"error": "User created but failed to send verification email.", "details": str(e)},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                    )
+                # Queued; delivered by the outbox worker after commit
+                send_email(
+                    subject="Verify Your Waya Account",
+                    message=f"Click the link to verify your email: {verification_link}",
+                    to_email=user.email
+                )
 
             return Response(
                 {'message': 'Registration successful! Check your email to verify your account.'},
@@ -112,7 +95,7 @@ class UserLoginView(generics.GenericAPIView):
         #             status=status.HTTP_403_FORBIDDEN
         #         )
 
-        refresh = RefreshToken.for_user(user)
+        refresh = WayaRefreshToken.for_user(user)
             # Make sure this dictionary perfectly matches your UserLoginResponseSerializer
         response_data = {
                 'id': str(user.id),
@@ -145,7 +128,7 @@ def post(self, request):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        refresh = RefreshToken.for_user(user)
+        refresh = WayaRefreshToken.for_user(user)
         return Response({
             'id': str(user.id),
             'name': user.full_name,
@@ -379,11 +362,10 @@ class ResendVerificationEmailView(generics.GenericAPIView):  # ✅ use GenericAP
         uid = urlsafe_base64_encode(force_bytes(user.pk))
         verify_url = f"http://domain/api/auth/verify-email/{uid}/{token}/"
 
-        send_mail(
+        send_email(
             subject="Resend: Verify your Email",
             message=f"Click the link to verify your account: {verify_url}",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email]
+            to_email=user.email
         )
 
         return Response({'message': 'Verification email resent!'}, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -0,0 +1,38 @@
+# utils/debounce.py
+"""
+Debounced Celery tasks.
+
+``debounce(task, *args)`` schedules ``task`` to run once, TASK_DEBOUNCE_SECONDS from
+now, for a given set of arguments. Further calls with the same arguments inside that
+window are dropped: the scheduled run has not started yet, so it will see their
+changes. N wallet changes in a few seconds therefore cost one recompute.
+
+Only use it for tasks that recompute state from the database (cache warmers,
+aggregates), never for tasks whose arguments carry the work itself.
+"""
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+def _cache_key(task, args):
+    digest = hashlib.sha256(json.dumps(args, default=str).encode()).hexdigest()
+    return f"debounce:{task.name}:{digest}"
+
+
+def debounce(task, *args, window=None):
+    """Schedule ``task(*args)`` unless a run with the same args is already pending. Returns True if scheduled."""
+    window = settings.TASK_DEBOUNCE_SECONDS if window is None else window
+    try:
+        # add() is atomic: exactly one caller per window wins and publishes the task
+        if not cache.add(_cache_key(task, args), 1, timeout=window):
+            return False
+    except Exception as e:
+        logger.warning(f"[DEBOUNCE] Cache unavailable, scheduling {task.name} without debounce: {e}")
+    task.apply_async(args=args, countdown=window)
+    return True
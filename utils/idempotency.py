@@ -0,0 +1,103 @@
+# utils/idempotency.py
+"""
+``Idempotency-Key`` support for money-moving endpoints.
+
+A client that may retry a POST sends a unique ``Idempotency-Key`` header. The first
+request with a key runs the view and stores its status and body in the cache for
+IDEMPOTENCY_TTL_SECONDS, together with a fingerprint of the request body. A retry with
+the same key gets the stored response back (marked ``Idempotent-Replayed: true``)
+without running the view again. Keys are scoped to the caller and endpoint.
+
+- Same key, different body: 422, the key was reused for another request.
+- Same key while the first request is still running: 409, retry later.
+- 5xx responses and exceptions are not stored, so the request can be retried.
+
+Requests without the header behave exactly as before. If the cache is unreachable the
+view runs unprotected rather than failing the request.
+"""
+import functools
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def _cache_key(request, key):
+    principal = getattr(request.user, "pk", None) or "anonymous"
+    scope = f"{principal}:{request.method}:{request.path}:{key}"
+    return "idempotency:" + hashlib.sha256(scope.encode()).hexdigest()
+
+
+def _replay(stored, fingerprint):
+    if stored["fingerprint"] != fingerprint:
+        return Response(
+            {"detail": f"{HEADER} was already used for a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    if stored.get("in_progress"):
+        return Response(
+            {"detail": "A request with this Idempotency-Key is still being processed."},
+            status=status.HTTP_409_CONFLICT,
+        )
+    return Response(stored["data"], status=stored["status"], headers={"Idempotent-Replayed": "true"})
+
+
+def idempotent(view_method):
+    """Decorator for APIView handlers and viewset actions; apply below ``@action``."""
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        cache_key = _cache_key(request, key)
+        fingerprint = hashlib.sha256(request.body).hexdigest()
+        try:
+            # add() is atomic, so only one of two concurrent first attempts runs the view
+            claimed = cache.add(
+                cache_key,
+                {"fingerprint": fingerprint, "in_progress": True},
+                settings.IDEMPOTENCY_LOCK_TIMEOUT,
+            )
+            stored = None if claimed else cache.get(cache_key)
+        except Exception as e:
+            logger.error(f"[IDEMPOTENCY] Cache unavailable, running {request.path} unprotected: {e}")
+            return view_method(self, request, *args, **kwargs)
+
+        if stored is not None:
+            return _replay(stored, fingerprint)
+        if not claimed:
+            # Expired between add() and get(); treat as a fresh request without a lock
+            logger.warning(f"[IDEMPOTENCY] Lost lock for {request.path}, running without replay protection")
+            return view_method(self, request, *args, **kwargs)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            cache.delete(cache_key)
+            raise
+
+        if response.status_code >= 500:
+            cache.delete(cache_key)
+        else:
+            cache.set(
+                cache_key,
+                {"fingerprint": fingerprint, "status": response.status_code, "data": response.data},
+                settings.IDEMPOTENCY_TTL_SECONDS,
+            )
+        return response
+
+    return wrapper
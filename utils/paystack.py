@@ -1,29 +1,204 @@
 # utils/paystack.py
+"""
+Paystack API client.
+
+One pooled ``requests.Session`` per process keeps connections to Paystack alive
+between calls. Every call has a connect/read timeout and is retried with exponential
+backoff and full jitter: reads (GET) on connection errors, timeouts, 429 and 5xx;
+writes (``POST /transaction/initialize``) only when the request never reached Paystack
+(connect failure) or was rate limited, since a repeat after a read timeout would be
+refused as a duplicate reference.
+
+Every call goes through a circuit breaker: after PAYSTACK_BREAKER_THRESHOLD consecutive
+failed calls, calls fail fast with PaystackUnavailable for
+PAYSTACK_BREAKER_RESET_SECONDS, then a single probe is let through.
+``ainitialize_payment`` / ``averify_payment`` run the same client in a worker thread for
+use from async views.
+
+Point PAYSTACK_BASE_URL at utils.paystack_stub to simulate latency and failures.
+"""
+import logging
+import os
+import random
+import threading
+import time
+
 import requests
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _never_sent(exc):
+    """Whether a request failed before any of it reached Paystack."""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class PaystackError(Exception):
+    pass
+
+
+class PaystackUnavailable(PaystackError):
+    """Paystack could not be reached, kept failing, or the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        """Whether a call may go out now. While half-open only one probe is allowed."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._opened_at is not None or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+
+
+class PaystackClient:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._session = None
+        self.breaker = CircuitBreaker(
+            threshold=settings.PAYSTACK_BREAKER_THRESHOLD,
+            reset_timeout=settings.PAYSTACK_BREAKER_RESET_SECONDS,
+        )
+
+    @property
+    def session(self):
+        # Pools must not be shared across fork (gunicorn --preload, Celery prefork)
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=settings.PAYSTACK_POOL_SIZE,
+                        max_retries=0,
+                    )
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+                    self._pid = os.getpid()
+        return self._session
+
+    def request(self, method, path, **kwargs):
+        if not self.breaker.allow():
+            raise PaystackUnavailable("Paystack circuit breaker is open")
+
+        url = settings.PAYSTACK_BASE_URL.rstrip("/") + path
+        headers = {"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
+        timeout = (settings.PAYSTACK_CONNECT_TIMEOUT, settings.PAYSTACK_READ_TIMEOUT)
+        attempts = settings.PAYSTACK_MAX_RETRIES + 1
+        idempotent = method in ("GET", "HEAD")
+
+        for attempt in range(attempts):
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, headers=headers, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                error = f"{type(exc).__name__}: {exc}"
+                retryable = idempotent or _never_sent(exc)
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    self.breaker.record_success()
+                    try:
+                        return response.json()
+                    except ValueError:
+                        raise PaystackError(f"Paystack returned non-JSON response ({response.status_code})")
+                error = f"HTTP {response.status_code}"
+                retryable = idempotent or response.status_code == 429
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            logger.warning(
+                f"[PAYSTACK] {method} {path} failed ({error}) after {elapsed_ms:.0f}ms, "
+                f"attempt {attempt + 1}/{attempts}"
+            )
+            if not retryable:
+                break
+            if attempt + 1 < attempts:
+                backoff = min(settings.PAYSTACK_RETRY_BACKOFF * 2 ** attempt, settings.PAYSTACK_RETRY_BACKOFF_MAX)
+                time.sleep(random.uniform(0, backoff))
+
+        self.breaker.record_failure()
+        raise PaystackUnavailable(f"Paystack {method} {path} failed: {error}")
+
+    def initialize_payment(self, email, amount, reference, callback_url=None):
+        data = {
+            "email": email,
+            "amount": int(amount * 100),  # Convert to kobo
+            "reference": reference,
+        }
+        if callback_url:
+            data["callback_url"] = callback_url
+        # Not retried once it may have reached Paystack: the repeat would fail as a duplicate
+        # reference although the first attempt initialized the payment
+        return self.request("POST", "/transaction/initialize", json=data)
+
+    def verify_payment(self, reference):
+        return self.request("GET", f"/transaction/verify/{reference}")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PaystackClient()
+    return _client
+
 
 def initialize_payment(email, amount, reference, callback_url=None):
-    url = "https://api.paystack.co/transaction/initialize"
-    headers = {
-        "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-        "Content-Type": "application/json",
-    }
-    data = {
-        "email": email,
-        "amount": int(amount * 100),  # Convert to kobo
-        "reference": reference,
-    }
-    if callback_url:
-        data["callback_url"] = callback_url
-
-    response = requests.post(url, json=data, headers=headers)
-    return response.json()
+    return get_client().initialize_payment(email, amount, reference, callback_url)
 
 
 def verify_payment(reference):
-    url = f"https://api.paystack.co/transaction/verify/{reference}"
-    headers = {
-        "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-    }
-    response = requests.get(url, headers=headers)
-    return response.json()
+    return get_client().verify_payment(reference)
+
+
+# Run in the default thread pool rather than the single sync thread, so slow Paystack
+# calls from async views don't queue behind each other.
+ainitialize_payment = sync_to_async(initialize_payment, thread_sensitive=False)
+averify_payment = sync_to_async(verify_payment, thread_sensitive=False)
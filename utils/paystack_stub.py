@@ -0,0 +1,136 @@
+# utils/paystack_stub.py
+"""
+Local stand-in for the Paystack API, for tests and load runs.
+
+Serves ``POST /transaction/initialize`` and ``GET /transaction/verify/<reference>``
+with Paystack-shaped JSON. ``latency`` delays every response, ``fail_next`` answers
+the next N requests with a 503 and ``error_rate`` fails a random share of requests.
+``verify_status`` is the transaction status reported by verify ("success", "failed",
+"abandoned", ...).
+
+In tests::
+
+    with PaystackStub(latency=0.2) as stub, override_settings(PAYSTACK_BASE_URL=stub.url):
+        ...
+
+From a shell (then set PAYSTACK_BASE_URL=http://127.0.0.1:8010)::
+
+    python -m utils.paystack_stub --port 8010 --latency 0.3 --error-rate 0.05
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class PaystackStub:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0, verify_status="success"):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.verify_status = verify_status
+        self.fail_next = 0
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="paystack-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _should_fail(self):
+        with self._lock:
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return True
+        return random.random() < self.error_rate
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path != "/transaction/initialize":
+                    return self._reply(404, {"status": False, "message": "Not found"})
+                reference = body.get("reference")
+                self._respond({
+                    "status": True,
+                    "message": "Authorization URL created",
+                    "data": {
+                        "authorization_url": f"{stub.url}/checkout/{reference}",
+                        "access_code": f"stub_{reference}",
+                        "reference": reference,
+                    },
+                }, body)
+
+            def do_GET(self):
+                prefix = "/transaction/verify/"
+                if not self.path.startswith(prefix):
+                    return self._reply(404, {"status": False, "message": "Not found"})
+                reference = self.path[len(prefix):]
+                self._respond({
+                    "status": True,
+                    "message": "Verification successful",
+                    "data": {"status": stub.verify_status, "reference": reference, "currency": "NGN"},
+                })
+
+            def _respond(self, payload, body=None):
+                stub.requests.append((self.command, self.path, body))
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if stub._should_fail():
+                    return self._reply(503, {"status": False, "message": "Service unavailable"})
+                self._reply(200, payload)
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local Paystack API stub.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each response.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503.")
+    parser.add_argument("--verify-status", default="success")
+    args = parser.parse_args()
+
+    stub = PaystackStub(args.host, args.port, args.latency, args.error_rate, args.verify_status)
+    print(f"Paystack stub listening on {stub.url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
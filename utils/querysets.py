@@ -0,0 +1,40 @@
+# utils/querysets.py
+"""
+Serializers that declare the joins they need.
+
+A serializer using SerializerJoinsMixin lists the relations it reads
+(``select_related_fields`` / ``prefetch_related_fields``) and any values it expects as
+annotations (``annotations``). ``optimize_queryset()`` applies them, and views using
+OptimizedQuerysetMixin call it for whatever serializer they render, so a list page
+costs the same number of queries whatever its size. Keep the declaration next to the
+fields that need it; the serializer tests render with ``assertNumQueries(0)`` to catch
+a field that walks a relation the declaration misses.
+"""
+
+
+class SerializerJoinsMixin:
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    annotations = {}
+
+    @classmethod
+    def optimize_queryset(cls, queryset):
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        if cls.annotations:
+            queryset = queryset.annotate(**cls.annotations)
+        return queryset
+
+
+class OptimizedQuerysetMixin:
+    """
+    For generic views and viewsets: apply the serializer's declared joins wherever DRF
+    filters the queryset (list, retrieve and every ``get_object()`` action).
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        optimize = getattr(self.get_serializer_class(), 'optimize_queryset', None)
+        return optimize(queryset) if optimize else queryset
@@ -9,8 +9,7 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
-
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'waya_backend.settings')
 
-application = get_asgi_application()
+# HTTP and WebSocket routing (JWT-authenticated sockets) live in waya_backend.routing.
+from waya_backend.routing import application  # noqa: E402,F401
@@ -0,0 +1,48 @@
+# waya_backend/async_views.py
+"""
+Async request handlers for DRF views.
+
+DRF's APIView.dispatch is synchronous. AsyncViewMixin replaces it so that ``async def``
+handlers run on the event loop when served over ASGI (waya_backend.asgi): the usual
+authentication, permission and throttle checks (which may query the database) run in
+one worker thread, then the handler awaits the async ORM and cache, leaving the loop
+free to serve other requests while it waits. Under WSGI, Django runs the same view
+through ``async_to_sync``, so behaviour is identical.
+
+Every handler on a view using the mixin must be ``async def``; Django refuses to mix.
+"""
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from rest_framework.views import APIView
+
+
+class AsyncViewMixin:
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                # OPTIONS and method-not-allowed stay sync in DRF
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncAPIView(AsyncViewMixin, APIView):
+    pass
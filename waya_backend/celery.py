@@ -1,8 +1,51 @@
 import os
+import time
+from datetime import datetime
+
 from celery import Celery
+from celery.signals import before_task_publish, task_postrun, task_prerun
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'waya_backend.settings')
 
 app = Celery('waya_backend')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
+
+
+# Per-task latency (waya_backend.metrics.record_task). The publish time travels in a
+# message header so the worker can tell queue wait from run time.
+_started = {}
+
+
+@before_task_publish.connect
+def _stamp_published_at(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault('published_at', time.time())
+
+
+@task_prerun.connect
+def _task_started(task_id=None, **kwargs):
+    _started[task_id] = (time.time(), time.perf_counter())
+
+
+@task_postrun.connect
+def _task_finished(task_id=None, task=None, state=None, **kwargs):
+    started = _started.pop(task_id, None)
+    if started is None or task is None:
+        return
+    started_at, started_counter = started
+    runtime = time.perf_counter() - started_counter
+
+    wait = None
+    published_at = getattr(task.request, 'published_at', None)
+    if published_at is not None:
+        ready_at = float(published_at)
+        eta = task.request.eta
+        if eta:
+            # Countdowns (e.g. debounced tasks) are not queue wait
+            eta = datetime.fromisoformat(eta) if isinstance(eta, str) else eta
+            ready_at = max(ready_at, eta.timestamp())
+        wait = max(0.0, started_at - ready_at)
+
+    from waya_backend import metrics
+    metrics.record_task(task.name, runtime, wait, state)
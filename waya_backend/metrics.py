@@ -0,0 +1,365 @@
+# waya_backend/metrics.py
+"""
+Per-request instrumentation.
+
+RequestMetricsMiddleware opens a RequestStats for each request in a context variable,
+so work done in sync_to_async threads (async views, the async ORM) is charged to the
+right request. Database queries are counted by a QueryCounter installed on every
+connection, new connections (and the time spent opening them) by a wrapper around
+``connect()``, and cache calls through InstrumentedRedisClient (the django-redis
+CLIENT_CLASS); see instrument_db(). When the response is ready the
+totals are recorded against the resolved view name in an in-process registry, which
+``metrics_view`` renders in the Prometheus text format. Each worker process keeps its
+own registry, so scrape every worker (or sum them in Prometheus).
+
+Celery tasks are timed by signal handlers in waya_backend.celery and recorded through
+record_task(). Those totals live in Redis, so every worker process and host adds to the
+same series and any web process can render them.
+"""
+import contextvars
+import functools
+import hmac
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django_redis import get_redis_connection
+from django_redis.client import DefaultClient
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Statements kept per request so a budget warning can show the offending SQL.
+MAX_RECORDED_QUERIES = 200
+
+TASK_METRICS_KEY = "waya:task_metrics"
+
+_current = contextvars.ContextVar("request_stats", default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.db_connects = 0
+        self.db_connect_time = 0.0
+        self.cache_gets = 0
+        self.cache_hits = 0
+        self.cache_sets = 0
+        self.sql = []
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def current_stats():
+    """The RequestStats of the request being served on this thread, if any."""
+    return _current.get()
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+class QueryCounter:
+    """Execute wrapper that times every statement run for the current request."""
+
+    def __call__(self, execute, sql, params, many, context):
+        stats = _current.get()
+        if stats is None:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats.queries += 1
+            stats.db_time += time.perf_counter() - started
+            if len(stats.sql) < MAX_RECORDED_QUERIES:
+                stats.sql.append(sql)
+
+
+def _install_query_counter(connection, **kwargs):
+    if not any(isinstance(wrapper, QueryCounter) for wrapper in connection.execute_wrappers):
+        # Inserted first so ``connection.execute_wrapper()`` blocks still pop their own wrapper
+        connection.execute_wrappers.insert(0, QueryCounter())
+
+
+def instrument_db():
+    """
+    Count queries on every database connection, in any thread, and time every new
+    connection (TCP, TLS, authentication, session setup). Reused persistent
+    connections cost nothing here.
+    """
+    connection_created.connect(_install_query_counter, dispatch_uid="waya_query_counter")
+    for connection in connections.all(initialized_only=True):
+        _install_query_counter(connection)
+
+    original = BaseDatabaseWrapper.connect
+    if getattr(original, "_instrumented", False):
+        return
+
+    @functools.wraps(original)
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return original(self)
+        finally:
+            stats = _current.get()
+            if stats is not None:
+                stats.db_connects += 1
+                stats.db_connect_time += time.perf_counter() - started
+
+    connect._instrumented = True
+    BaseDatabaseWrapper.connect = connect
+
+
+class InstrumentedRedisClient(DefaultClient):
+    """django-redis client that counts cache gets, hits and sets for the current request."""
+
+    def get(self, key, default=None, version=None, client=None):
+        value = super().get(key, default=default, version=version, client=client)
+        stats = _current.get()
+        if stats is not None:
+            stats.cache_gets += 1
+            if value is not default:
+                stats.cache_hits += 1
+        return value
+
+    def get_many(self, keys, version=None, client=None):
+        values = super().get_many(keys, version=version, client=client)
+        stats = _current.get()
+        if stats is not None:
+            stats.cache_gets += len(keys)
+            stats.cache_hits += len(values)
+        return values
+
+    def set(self, key, value, timeout=None, version=None, client=None, nx=False, xx=False):
+        stats = _current.get()
+        if stats is not None:
+            stats.cache_sets += 1
+        return super().set(key, value, timeout=timeout, version=version, client=client, nx=nx, xx=xx)
+
+    def set_many(self, data, timeout=None, version=None, client=None):
+        stats = _current.get()
+        if stats is not None:
+            stats.cache_sets += len(data)
+        return super().set_many(data, timeout=timeout, version=version, client=client)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.db_time = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+        self.db_connect_time = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.db_connects = defaultdict(int)
+        self.cache_gets = defaultdict(int)
+        self.cache_hits = defaultdict(int)
+        self.cache_sets = defaultdict(int)
+        self.budget_exceeded = defaultdict(int)
+
+    def record(self, view, stats, elapsed, over_budget):
+        with self._lock:
+            self.latency[view].observe(elapsed)
+            self.db_time[view].observe(stats.db_time)
+            self.queries[view].observe(stats.queries)
+            if stats.db_connects:
+                self.db_connects[view] += stats.db_connects
+                self.db_connect_time[view].observe(stats.db_connect_time)
+            self.cache_gets[view] += stats.cache_gets
+            self.cache_hits[view] += stats.cache_hits
+            self.cache_sets[view] += stats.cache_sets
+            if over_budget:
+                self.budget_exceeded[view] += 1
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            self._render_histogram(lines, "waya_request_duration_seconds", "Request latency by view.", self.latency)
+            self._render_histogram(lines, "waya_request_db_seconds", "Database time per request by view.", self.db_time)
+            self._render_histogram(lines, "waya_request_queries", "Database queries per request by view.", self.queries)
+            self._render_histogram(
+                lines, "waya_db_connect_seconds", "Time spent opening database connections per request by view.",
+                self.db_connect_time,
+            )
+            self._render_counter(lines, "waya_db_connections_opened_total", "New database connections by view.", self.db_connects)
+            self._render_counter(lines, "waya_cache_gets_total", "Cache reads by view.", self.cache_gets)
+            self._render_counter(lines, "waya_cache_hits_total", "Cache hits by view.", self.cache_hits)
+            self._render_counter(lines, "waya_cache_sets_total", "Cache writes by view.", self.cache_sets)
+            self._render_counter(
+                lines, "waya_query_budget_exceeded_total", "Requests over their query budget by view.",
+                self.budget_exceeded,
+            )
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histogram(lines, name, help_text, histograms, label="view"):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for view, histogram in sorted(histograms.items()):
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                lines.append(f'{name}_bucket{{{label}="{view}",le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{label}="{view}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{name}_sum{{{label}="{view}"}} {histogram.sum}')
+            lines.append(f'{name}_count{{{label}="{view}"}} {histogram.count}')
+
+    @staticmethod
+    def _render_counter(lines, name, help_text, counters, label="view"):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for view, value in sorted(counters.items()):
+            if isinstance(view, tuple):
+                labels = ",".join(f'{key}="{val}"' for key, val in zip(label, view))
+            else:
+                labels = f'{label}="{view}"'
+            lines.append(f'{name}{{{labels}}} {value}')
+
+
+registry = MetricsRegistry()
+
+
+def _bucket_index(buckets, value):
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            return i
+    return len(buckets)
+
+
+def record_task(name, runtime, wait, state):
+    """
+    Add one finished task run: ``runtime`` in the worker, ``wait`` between publish (or
+    ETA) and start, both in seconds, and its final state. One pipelined Redis round
+    trip; failures are logged and dropped, never raised into the task.
+    """
+    key = f"{TASK_METRICS_KEY}:{name}"
+    try:
+        pipe = get_redis_connection("default").pipeline(transaction=False)
+        pipe.sadd(TASK_METRICS_KEY, name)
+        pipe.hincrbyfloat(key, "runtime_sum", runtime)
+        pipe.hincrby(key, f"runtime_{_bucket_index(LATENCY_BUCKETS, runtime)}", 1)
+        if wait is not None:
+            pipe.hincrbyfloat(key, "wait_sum", wait)
+            pipe.hincrby(key, f"wait_{_bucket_index(LATENCY_BUCKETS, wait)}", 1)
+        pipe.hincrby(key, f"state_{state}", 1)
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"[METRICS] Could not record task {name}: {e}")
+
+
+def _task_histogram(fields, prefix):
+    histogram = Histogram(LATENCY_BUCKETS)
+    running = 0
+    for i in range(len(LATENCY_BUCKETS)):
+        running += int(fields.get(f"{prefix}_{i}", 0))
+        histogram.counts[i] = running
+    histogram.count = running + int(fields.get(f"{prefix}_{len(LATENCY_BUCKETS)}", 0))
+    histogram.sum = float(fields.get(f"{prefix}_sum", 0))
+    return histogram
+
+
+def render_task_metrics():
+    """Celery task series from Redis, in the same exposition format as the registry."""
+    try:
+        redis = get_redis_connection("default")
+        names = sorted(name.decode() for name in redis.smembers(TASK_METRICS_KEY))
+        pipe = redis.pipeline(transaction=False)
+        for name in names:
+            pipe.hgetall(f"{TASK_METRICS_KEY}:{name}")
+        hashes = pipe.execute()
+    except Exception as e:
+        logger.debug(f"[METRICS] Task metrics unavailable: {e}")
+        return ""
+
+    runtime, wait, states = {}, {}, {}
+    for name, raw in zip(names, hashes):
+        fields = {field.decode(): value.decode() for field, value in raw.items()}
+        runtime[name] = _task_histogram(fields, "runtime")
+        wait[name] = _task_histogram(fields, "wait")
+        for field, value in fields.items():
+            if field.startswith("state_"):
+                states[(name, field[len("state_"):])] = int(value)
+
+    lines = []
+    MetricsRegistry._render_histogram(
+        lines, "waya_task_duration_seconds", "Celery task run time by task.", runtime, label="task"
+    )
+    MetricsRegistry._render_histogram(
+        lines, "waya_task_queue_wait_seconds", "Time from publish (or ETA) to start by task.", wait, label="task"
+    )
+    MetricsRegistry._render_counter(
+        lines, "waya_task_runs_total", "Finished Celery task runs by task and state.", states, label=("task", "state")
+    )
+    return "\n".join(lines) + "\n"
+
+
+def view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.view_name or match._func_path
+
+
+def query_budget(view):
+    return settings.QUERY_BUDGETS.get(view, settings.QUERY_BUDGET_DEFAULT)
+
+
+def server_timing(stats, elapsed):
+    parts = [
+        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"',
+        f'db-connect;dur={stats.db_connect_time * 1000:.1f};desc="{stats.db_connects} new"',
+        f'cache;desc="{stats.cache_hits}/{stats.cache_gets} hits, {stats.cache_sets} sets"',
+        f"total;dur={elapsed * 1000:.1f}",
+    ]
+    return ", ".join(parts)
+
+
+def _metrics_authorized(request):
+    token = settings.METRICS_TOKEN
+    sent = request.headers.get("Authorization", "")
+    if token and hmac.compare_digest(sent.encode(), f"Bearer {token}".encode()):
+        return True
+    # Behind the Nginx proxy every request arrives from 127.0.0.1, so the address alone
+    # is only trusted when the token requirement is switched off (local development).
+    return not settings.METRICS_REQUIRE_TOKEN and request.META.get("REMOTE_ADDR") in settings.INTERNAL_IPS
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Scrapers must send ``Authorization: Bearer <METRICS_TOKEN>``;
+    with METRICS_REQUIRE_TOKEN=False, INTERNAL_IPS may scrape without it.
+    """
+    if not _metrics_authorized(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render() + render_task_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
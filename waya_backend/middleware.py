@@ -1,6 +1,17 @@
+import logging
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.utils.deprecation import MiddlewareMixin
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from waya_backend import metrics
+
+logger = logging.getLogger(__name__)
 
 EXEMPT_PATHS = [
     '/admin/',
@@ -17,29 +28,115 @@ EXEMPT_PATHS = [
     '/api/child/login/',  # child login endpoint
 ]
 
+# Compiled once: a single anchored alternation instead of a startswith() per prefix.
+EXEMPT_PATHS_RE = re.compile("|".join(re.escape(path) for path in EXEMPT_PATHS))
+
+
+def _bearer_claims(request):
+    """
+    Verified claims of the request's Bearer access token, or None if there is no token.
+    An invalid token also yields None; DRF rejects it later.
+    """
+    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not auth_header.startswith('Bearer '):
+        return None
+    try:
+        return AccessToken(auth_header.split(' ', 1)[1]).payload
+    except TokenError:
+        return None
+
+
 class RoleRequiredMiddleware(MiddlewareMixin):
     """
     Only allow authenticated parent users to access non-exempt views 
     **if** they have selected a role.
     Child users are skipped.
+
+    API requests are judged from their JWT claims, so no session or user row is loaded;
+    the user is only resolved for session-authenticated (non-API) requests.
     """
     def process_request(self, request):
-        path = request.path_info
-
-        # Skip middleware check for unauthenticated users
-        if not request.user.is_authenticated:
+        # Skip for exempt paths before touching authentication at all
+        if EXEMPT_PATHS_RE.match(request.path_info):
             return None
 
-        # Skip for child users if you've marked them (e.g., request.user.is_child)
-        if hasattr(request.user, 'is_child') and request.user.is_child:
-            return None
+        claims = _bearer_claims(request)
+        if claims is not None:
+            # Child tokens carry child_id; tokens without a role claim are left to DRF
+            if claims.get('child_id') or 'role' not in claims:
+                return None
+            role = claims['role']
+        else:
+            # Skip middleware check for unauthenticated users
+            if not request.user.is_authenticated:
+                return None
 
-        # Skip for exempt paths
-        if any(path.startswith(exempt) for exempt in EXEMPT_PATHS):
-            return None
+            # Skip for child users if you've marked them (e.g., request.user.is_child)
+            if getattr(request.user, 'is_child', False):
+                return None
+            role = getattr(request.user, 'role', None)
 
         # Redirect parent users who haven't selected a role yet
-        if not getattr(request.user, 'role', None):
+        if not role:
             return redirect(reverse('complete_role'))
 
         return None
+
+
+class RequestMetricsMiddleware:
+    """
+    Records query count, DB time, new DB connections and their setup time, cache
+    gets/sets/hits and latency per resolved view,
+    adds a ``Server-Timing`` header and warns when a view goes over its query budget
+    (settings.QUERY_BUDGETS). Totals are exported by waya_backend.metrics.metrics_view.
+    Works in both WSGI and ASGI stacks.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        if settings.REQUEST_METRICS_ENABLED:
+            metrics.instrument_db()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.REQUEST_METRICS_ENABLED:
+            return self.get_response(request)
+
+        stats, token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self._record(request, response, stats)
+
+    async def __acall__(self, request):
+        if not settings.REQUEST_METRICS_ENABLED:
+            return await self.get_response(request)
+
+        stats, token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self._record(request, response, stats)
+
+    def _record(self, request, response, stats):
+        elapsed = stats.elapsed
+        view = metrics.view_name(request)
+        budget = metrics.query_budget(view)
+        over_budget = stats.queries > budget
+        if over_budget:
+            logger.warning(
+                f"[QUERY-BUDGET] {view} ran {stats.queries} queries (budget {budget}) "
+                f"for {request.method} {request.path}:\n" + "\n".join(stats.sql[:20])
+            )
+
+        metrics.registry.record(view, stats, elapsed, over_budget)
+        response["Server-Timing"] = metrics.server_timing(stats, elapsed)
+        return response
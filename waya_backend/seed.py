@@ -0,0 +1,199 @@
+# waya_backend/seed.py
+"""
+Realistic fixture data for query-budget tests and load benchmarks.
+
+Everything is written with ``bulk_create`` so a full family (3 children, 200 chores,
+2,000 transactions, 10 goals, quiz progress) seeds in about a second. Used by the
+query-budget tests and the ``seed_families`` / ``benchmark`` management commands. Model ``save()`` hooks
+(cache invalidation, dashboard pushes, PIN hashing) are deliberately bypassed.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from children.models import Child
+from familywallet.models import ChildWallet, FamilyAggregate, FamilyWallet, Transaction
+from goalgetter.models import Goal, GoalTransaction
+from moneymaze.models import (
+    AnswerChoice, Concept, ConceptDescription, ConceptProgress, ConceptSection, Question, Quiz,
+    QuizResult, Reward,
+)
+from taskmaster.models import Chore
+from users.models import User
+
+DEFAULT_PASSWORD = "Passw0rd!"
+DEFAULT_PIN = "1234"
+
+SECTIONS_PER_CONCEPT = 3
+DESCRIPTIONS_PER_SECTION = 2
+QUESTIONS_PER_QUIZ = 5
+CHOICES_PER_QUESTION = 4
+
+
+def seed_curriculum():
+    """
+    Create one concept per level, each with sections, descriptions, a quiz and a reward.
+    Idempotent: returns the existing concepts if the curriculum is already seeded.
+    """
+    existing = list(Concept.objects.order_by('level'))
+    if existing:
+        return existing
+
+    concepts = Concept.objects.bulk_create([
+        Concept(title=title, level=level) for level, title in Concept.LEVEL_CHOICES
+    ])
+    sections = ConceptSection.objects.bulk_create([
+        ConceptSection(concept=concept, title=f"{concept.title} part {order}", content="...", order=order)
+        for concept in concepts
+        for order in range(1, SECTIONS_PER_CONCEPT + 1)
+    ])
+    ConceptDescription.objects.bulk_create([
+        ConceptDescription(section=section, text="...", order=order)
+        for section in sections
+        for order in range(1, DESCRIPTIONS_PER_SECTION + 1)
+    ])
+    quizzes = Quiz.objects.bulk_create([
+        Quiz(concept=concept, title=f"{concept.title} quiz") for concept in concepts
+    ])
+    questions = Question.objects.bulk_create([
+        Question(quiz=quiz, text=f"Question {n}")
+        for quiz in quizzes
+        for n in range(1, QUESTIONS_PER_QUIZ + 1)
+    ])
+    AnswerChoice.objects.bulk_create([
+        AnswerChoice(question=question, text=f"Choice {n}", is_correct=(n == 1))
+        for question in questions
+        for n in range(1, CHOICES_PER_QUESTION + 1)
+    ])
+    Reward.objects.bulk_create([
+        Reward(concept=concept, name=f"{concept.title} badge") for concept in concepts
+    ])
+    return concepts
+
+
+def seed_families(count, children=3, chores=200, transactions=2000, goals=10, label="seed"):
+    """
+    Create ``count`` parents, each with a funded family wallet and ``children`` children
+    (with wallets), and spread ``chores``, ``transactions`` and ``goals`` across them.
+    Every child has passed the level 1 quiz and unlocked level 2, so seed_curriculum()
+    must have run first. Returns the list of parent users.
+    """
+    rng = random.Random(label)
+    now = timezone.now()
+    password = make_password(DEFAULT_PASSWORD)
+    pin = make_password(DEFAULT_PIN)
+
+    parents = User.objects.bulk_create([
+        User(
+            email=f"{label}{n}@example.com",
+            full_name=f"Seed Parent {n}",
+            password=password,
+            role=User.ROLE_PARENT,
+            is_verified=True,
+            terms_accepted=True,
+        )
+        for n in range(count)
+    ])
+    FamilyWallet.objects.bulk_create([
+        FamilyWallet(parent=parent, balance=Decimal("500000.00"), pin=pin) for parent in parents
+    ])
+
+    kids = Child.objects.bulk_create([
+        Child(parent=parent, username=f"{label}{n}kid{c}", name=f"Kid {c}", pin=pin)
+        for n, parent in enumerate(parents)
+        for c in range(children)
+    ])
+    ChildWallet.objects.bulk_create([
+        ChildWallet(
+            child=kid,
+            balance=Decimal("1500.00"),
+            total_earned=Decimal("2000.00"),
+            total_spent=Decimal("500.00"),
+            savings_rate=Decimal("10.00"),
+        )
+        for kid in kids
+    ])
+
+    kids_by_parent = {}
+    for kid in kids:
+        kids_by_parent.setdefault(kid.parent_id, []).append(kid)
+
+    chore_rows = []
+    for parent in parents:
+        family = kids_by_parent[parent.id]
+        for n in range(chores):
+            status = rng.choice([Chore.STATUS_PENDING, Chore.STATUS_COMPLETED, Chore.STATUS_APPROVED, Chore.STATUS_MISSED])
+            chore_rows.append(Chore(
+                parent=parent,
+                assigned_to=family[n % len(family)],
+                title=f"Chore {n}",
+                reward=Decimal(rng.randint(50, 500)),
+                due_date=(now + timedelta(days=rng.randint(-30, 30))).date(),
+                status=status,
+                completed_at=now if status in (Chore.STATUS_COMPLETED, Chore.STATUS_APPROVED) else None,
+            ))
+    Chore.objects.bulk_create(chore_rows, batch_size=1000)
+
+    transaction_rows = []
+    for parent in parents:
+        family = kids_by_parent[parent.id]
+        for n in range(transactions):
+            transaction_rows.append(Transaction(
+                parent=parent,
+                child=family[n % len(family)],
+                type=rng.choice(["chore_reward", "chore_reward", "allowance_payment"]),
+                amount=Decimal(rng.randint(50, 1000)),
+                description=f"Seed transaction {n}",
+                status=rng.choice(["paid", "paid", "pending", "cancelled"]),
+            ))
+    created = Transaction.objects.bulk_create(transaction_rows, batch_size=1000)
+    # auto_now_add ignores explicit values, so spread the history out afterwards
+    for n, tx in enumerate(created):
+        tx.created_at = now - timedelta(days=n % 60, minutes=n)
+    Transaction.objects.bulk_update(created, ["created_at"], batch_size=1000)
+    # bulk_create bypasses the mutation paths that maintain the aggregates
+    FamilyAggregate.recompute([parent.id for parent in parents])
+
+    goal_rows = []
+    for parent in parents:
+        family = kids_by_parent[parent.id]
+        for n in range(goals):
+            goal_rows.append(Goal(
+                child=family[n % len(family)],
+                title=f"Goal {n}",
+                target_amount=Decimal("5000.00"),
+                target_duration_months=6,
+                status=rng.choice(["active", "active", "achieved"]),
+            ))
+    created_goals = Goal.objects.bulk_create(goal_rows)
+    GoalTransaction.objects.bulk_create([
+        GoalTransaction(goal=goal, amount=Decimal(rng.randint(100, 1000)))
+        for goal in created_goals
+        for _ in range(3)
+    ])
+
+    concepts = {concept.level: concept for concept in Concept.objects.select_related('quiz')}
+    if concepts:
+        ConceptProgress.objects.bulk_create([
+            progress
+            for kid in kids
+            for progress in (
+                ConceptProgress(child=kid, concept=concepts[1], progress_percentage=100, completed=True, unlocked=True),
+                ConceptProgress(child=kid, concept=concepts[2], unlocked=True),
+            )
+        ])
+        QuizResult.objects.bulk_create([
+            QuizResult(child=kid, quiz=concepts[1].quiz, score=Decimal("80.00"), passed=True)
+            for kid in kids
+        ])
+
+    return parents
+
+
+def seed_family(**kwargs):
+    """Seed the curriculum and a single family; returns the parent user."""
+    seed_curriculum()
+    return seed_families(1, **kwargs)[0]
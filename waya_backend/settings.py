@@ -116,6 +116,32 @@ MIDDLEWARE = [
     'allauth.account.middleware.AccountMiddleware',
 ]
 
+# Request instrumentation (waya_backend/metrics.py); first so it times the whole stack
+REQUEST_METRICS_ENABLED = config('REQUEST_METRICS_ENABLED', default=True, cast=bool)
+MIDDLEWARE.insert(0, 'waya_backend.middleware.RequestMetricsMiddleware')
+
+# Max DB queries per request, keyed by resolved view name; anything over is logged
+# and counted in waya_query_budget_exceeded_total.
+QUERY_BUDGET_DEFAULT = config('QUERY_BUDGET_DEFAULT', default=30, cast=int)
+# Also enforced by the query-budget test suite (waya_backend/tests.py).
+QUERY_BUDGETS = {
+    'earning-meter-dashboard': 6,
+    'chore-insights': 4,
+    'child-wallets-analysis': 6,
+    'submit-quiz': 16,
+    'goal-summary': 3,
+    'chore-list': 3,
+    'wallet-dashboard-stats': 2,
+    'transaction-list': 2,
+    'child-home': 8,
+}
+
+# Prometheus scrape endpoint; needs this bearer token. METRICS_REQUIRE_TOKEN=False opens
+# it to INTERNAL_IPS instead, for local development without a proxy in front.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_REQUIRE_TOKEN = config('METRICS_REQUIRE_TOKEN', default=True, cast=bool)
+INTERNAL_IPS = config('INTERNAL_IPS', default='127.0.0.1', cast=Csv())
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "https://waya-fawn.vercel.app",
@@ -134,6 +160,7 @@ CORS_ALLOW_HEADERS = [
     'x-csrftoken',
     'x-requested-with',
     'cache-control', 
+    'idempotency-key',
 ]
 
 # Don't do the below in production but for allowing more users for development purposes
@@ -194,6 +221,37 @@ else:
         'default': dj_database_url.parse(config("DATABASE_URL"))
     }
 
+# Database connection reuse (DB_CONNECTION_MODE):
+# - "persistent": each worker keeps its connection for DB_CONN_MAX_AGE seconds and checks
+#   it is still usable before reusing it, so requests skip the TCP/TLS/auth handshake.
+# - "pgbouncer": DATABASE_URL points at pgbouncer in transaction pooling mode. Connections
+#   to pgbouncer are kept for DB_CONN_MAX_AGE (0 closes them after each request) and
+#   server-side cursors, which do not survive transaction pooling, are disabled.
+# - "pool": a psycopg 3 connection pool per process (DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE
+#   connections, waiting up to DB_POOL_TIMEOUT seconds for a free one). Connections go
+#   back to the pool at the end of each request, from whichever thread ran it.
+# - "none": a new connection per request.
+# Under ASGI (uvicorn, see render.yaml) each request's sync code runs in its own thread,
+# so persistent connections are not reused; use "pool" or "pgbouncer" there. Keep
+# DB_POOL_MAX_SIZE x processes (web workers and Celery) under the server's max_connections.
+DB_CONNECTION_MODE = config('DB_CONNECTION_MODE', default='persistent')
+if DB_CONNECTION_MODE == 'persistent':
+    DATABASES['default']['CONN_MAX_AGE'] = config('DB_CONN_MAX_AGE', default=600, cast=int)
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+elif DB_CONNECTION_MODE == 'pgbouncer':
+    DATABASES['default']['CONN_MAX_AGE'] = config('DB_CONN_MAX_AGE', default=0, cast=int)
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+elif DB_CONNECTION_MODE == 'pool':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+        'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -255,7 +313,7 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': [
         #'children.authentication.ChildJWTAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
@@ -286,6 +344,10 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Claims-authenticated requests check the user's is_active flag from the cache; User.save
+# rewrites it, so this only bounds staleness after bulk updates that skip save()
+USER_ACTIVE_CACHE_SECONDS = config('USER_ACTIVE_CACHE_SECONDS', default=300, cast=int)
+
 SOCIALACCOUNT_PROVIDERS = {
     'google': {
         'APP': {
@@ -308,7 +370,7 @@ CACHES = {
         'BACKEND': 'django_redis.cache.RedisCache',
         'LOCATION': config('REDIS_URL',default='redis://127.0.0.1:6379/0'),
         'OPTIONS': {
-            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            'CLIENT_CLASS': 'waya_backend.metrics.InstrumentedRedisClient',
             'CONNECTION_POOL_KWARGS': {'max_connections': 100} 
         },
         'KEY_PREFIX': 'waya_django_cache' 
@@ -353,8 +415,15 @@ EMAIL_HOST_USER = 'apikey'  # This is literally the word "apikey"
 EMAIL_HOST_PASSWORD = os.getenv('SENDGRID_API_KEY')  # Pull your API key from env
 
 DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL")
-EMAIL_BACKEND = "sendgrid_backend.SendgridBackend"
+# Set to django.core.mail.backends.filebased.EmailBackend (writes to EMAIL_FILE_PATH)
+# or .console.EmailBackend for local development; the test runner uses locmem.
+EMAIL_BACKEND = config('EMAIL_BACKEND', default="sendgrid_backend.SendgridBackend")
+EMAIL_FILE_PATH = config('EMAIL_FILE_PATH', default=str(BASE_DIR / 'tmp' / 'emails'))
 SENDGRID_SANDBOX_MODE_IN_DEBUG = False
+# Keep verification and password-reset links pointing at our own domain instead of
+# SendGrid's click-tracking redirect (users/utils.send_email used to turn this off per message)
+SENDGRID_TRACK_CLICKS_PLAIN = False
+SENDGRID_TRACK_CLICKS_HTML = False
 SENDGRID_API_KEY = config("SENDGRID_API_KEY")
 
 DOMAIN = config('domain', default='http://localhost:3000')
@@ -377,9 +446,108 @@ CELERY_BROKER_URL = config('REDIS_URL')
 
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
+
+# Queues: money (Paystack), email (the email outbox drain) and analytics (cache warmers)
+# are separate so a backlog in one cannot delay the others; everything else, including
+# the realtime outbox drain, goes to "default". E.g.
+#   celery -A waya_backend worker -Q money,default
+#   celery -A waya_backend worker -Q email,analytics
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_ROUTES = {
+    'familywallet.tasks.*': {'queue': 'money'},
+    'notifications.tasks.drain_email_outbox': {'queue': 'email'},
+    'users.tasks.send_*': {'queue': 'email'},
+    'taskmaster.tasks.send_*': {'queue': 'email'},
+    'users.tasks.sync_wallet_stats_to_dashboard': {'queue': 'analytics'},
+}
+# No result backend is configured and nothing reads task results
+CELERY_TASK_IGNORE_RESULT = True
+# One reserved message per worker process, so a slow task cannot hold quick ones hostage
+CELERY_WORKER_PREFETCH_MULTIPLIER = config('CELERY_WORKER_PREFETCH_MULTIPLIER', default=1, cast=int)
+# Window for utils.debounce: repeated calls with the same args inside it run the task once
+TASK_DEBOUNCE_SECONDS = config('TASK_DEBOUNCE_SECONDS', default=5, cast=int)
+
+CELERY_BEAT_SCHEDULE = {
+    # Safety net for the transactional outbox; normally drained right after commit.
+    'drain-notification-outbox': {
+        'task': 'notifications.tasks.drain_outbox',
+        'schedule': config('OUTBOX_SWEEP_INTERVAL', default=10.0, cast=float),
+    },
+    'drain-email-outbox': {
+        'task': 'notifications.tasks.drain_email_outbox',
+        'schedule': config('OUTBOX_SWEEP_INTERVAL', default=10.0, cast=float),
+    },
+    'purge-read-notifications': {
+        'task': 'notifications.tasks.purge_read_notifications',
+        'schedule': timedelta(hours=config('NOTIFICATION_PURGE_INTERVAL_HOURS', default=24, cast=int)),
+    },
+    # Paystack funding whose webhook never arrived
+    'reconcile-wallet-funding': {
+        'task': 'familywallet.tasks.reconcile_wallet_funding',
+        'schedule': timedelta(minutes=config('PAYSTACK_RECONCILE_INTERVAL_MINUTES', default=10, cast=int)),
+    },
+    # Allowance payout engine (familywallet/payouts.py)
+    'schedule-allowance-payouts': {
+        'task': 'familywallet.tasks.schedule_allowance_payouts',
+        'schedule': timedelta(minutes=config('ALLOWANCE_PAYOUT_INTERVAL_MINUTES', default=15, cast=int)),
+    },
+}
+
+# After a correct wallet PIN, further payments within this window skip the PBKDF2 check (0 disables)
+WALLET_PIN_GRANT_SECONDS = config('WALLET_PIN_GRANT_SECONDS', default=300, cast=int)
+# Chores per pay_chores request
+WALLET_MAX_CHORE_PAYOUTS = config('WALLET_MAX_CHORE_PAYOUTS', default=50, cast=int)
+
+# Allowances locked and paid per pay_allowance_batch task (one transaction each)
+ALLOWANCE_PAYOUT_BATCH_SIZE = config('ALLOWANCE_PAYOUT_BATCH_SIZE', default=500, cast=int)
+
+# Notification coalescing and retention
+NOTIFICATION_COALESCE_WINDOW_MINUTES = config('NOTIFICATION_COALESCE_WINDOW_MINUTES', default=30, cast=int)
+NOTIFICATION_RETENTION_DAYS = config('NOTIFICATION_RETENTION_DAYS', default=90, cast=int)
+NOTIFICATION_PURGE_BATCH_SIZE = config('NOTIFICATION_PURGE_BATCH_SIZE', default=1000, cast=int)
+
+# Transactional outbox (notifications/outbox.py)
+OUTBOX_BATCH_SIZE = config('OUTBOX_BATCH_SIZE', default=100, cast=int)
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=8, cast=int)
+OUTBOX_BASE_BACKOFF_SECONDS = config('OUTBOX_BASE_BACKOFF_SECONDS', default=5, cast=int)
+OUTBOX_MAX_BACKOFF_SECONDS = config('OUTBOX_MAX_BACKOFF_SECONDS', default=600, cast=int)
+OUTBOX_RETENTION_HOURS = config('OUTBOX_RETENTION_HOURS', default=24, cast=int)
+OUTBOX_KICK_ON_COMMIT = config('OUTBOX_KICK_ON_COMMIT', default=True, cast=bool)
+OUTBOX_KICK_INTERVAL = config('OUTBOX_KICK_INTERVAL', default=2, cast=int)
+# How long a worker owns a claimed batch; rows it has not finished by then are due again
+OUTBOX_CLAIM_SECONDS = config('OUTBOX_CLAIM_SECONDS', default=300, cast=int)
+
+# Background realtime dispatcher (notifications/dispatch.py)
+REALTIME_QUEUE_MAXSIZE = config('REALTIME_QUEUE_MAXSIZE', default=10000, cast=int)
+REALTIME_MAX_BATCH = config('REALTIME_MAX_BATCH', default=200, cast=int)
+REALTIME_BATCH_WINDOW_MS = config('REALTIME_BATCH_WINDOW_MS', default=5, cast=int)
+
+# WebSocket presence (notifications/presence.py); realtime sends to offline groups are skipped
+PRESENCE_TTL_SECONDS = config('PRESENCE_TTL_SECONDS', default=120, cast=int)
+REALTIME_SKIP_OFFLINE = config('REALTIME_SKIP_OFFLINE', default=True, cast=bool)
 PAYSTACK_SECRET_KEY = config('PAYSTACK_SECRET_KEY')
 PAYSTACK_PUBLIC_KEY = config('PAYSTACK_PUBLIC_KEY')
 
+# Paystack HTTP client (utils/paystack.py)
+PAYSTACK_BASE_URL = config('PAYSTACK_BASE_URL', default='https://api.paystack.co')
+PAYSTACK_CONNECT_TIMEOUT = config('PAYSTACK_CONNECT_TIMEOUT', default=3.05, cast=float)
+PAYSTACK_READ_TIMEOUT = config('PAYSTACK_READ_TIMEOUT', default=10, cast=float)
+PAYSTACK_MAX_RETRIES = config('PAYSTACK_MAX_RETRIES', default=2, cast=int)
+PAYSTACK_RETRY_BACKOFF = config('PAYSTACK_RETRY_BACKOFF', default=0.25, cast=float)
+PAYSTACK_RETRY_BACKOFF_MAX = config('PAYSTACK_RETRY_BACKOFF_MAX', default=2, cast=float)
+PAYSTACK_POOL_SIZE = config('PAYSTACK_POOL_SIZE', default=10, cast=int)
+PAYSTACK_BREAKER_THRESHOLD = config('PAYSTACK_BREAKER_THRESHOLD', default=5, cast=int)
+PAYSTACK_BREAKER_RESET_SECONDS = config('PAYSTACK_BREAKER_RESET_SECONDS', default=30, cast=int)
+
+# Paystack funding reconciliation (familywallet/tasks.py)
+PAYSTACK_RECONCILE_AFTER_MINUTES = config('PAYSTACK_RECONCILE_AFTER_MINUTES', default=5, cast=int)
+PAYSTACK_RECONCILE_BATCH_SIZE = config('PAYSTACK_RECONCILE_BATCH_SIZE', default=100, cast=int)
+PAYSTACK_FUNDING_EXPIRY_HOURS = config('PAYSTACK_FUNDING_EXPIRY_HOURS', default=24, cast=int)
+
+# Idempotency-Key replay window for money-moving endpoints (utils/idempotency.py)
+IDEMPOTENCY_TTL_SECONDS = config('IDEMPOTENCY_TTL_SECONDS', default=86400, cast=int)
+IDEMPOTENCY_LOCK_TIMEOUT = config('IDEMPOTENCY_LOCK_TIMEOUT', default=60, cast=int)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -0,0 +1,131 @@
+# waya_backend/tests.py
+"""
+Per-endpoint query budgets.
+
+Each test hits one endpoint against a seeded family (3 children, 200 chores, 2,000
+transactions, 10 goals and the full curriculum) and fails if it runs more queries than
+its entry in settings.QUERY_BUDGETS, listing the SQL so the N+1 is easy to spot. The
+same table drives the production budget warnings in RequestMetricsMiddleware.
+
+MetricsEndpointTests covers who may scrape ``/internal/metrics/``.
+"""
+import json
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from children.tokens import ChildRefreshToken
+from moneymaze.models import Concept, ConceptProgress, Quiz, Reward, RewardEarned
+from users.tokens import WayaRefreshToken
+from waya_backend.seed import seed_family
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    OUTBOX_KICK_ON_COMMIT=False,
+)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = seed_family(label="budget")
+        cls.child = cls.parent.children.order_by('username').first()
+        cls.parent_token = str(WayaRefreshToken.for_user(cls.parent).access_token)
+        cls.child_token = str(ChildRefreshToken.for_child(cls.child).access_token)
+
+    def assertWithinBudget(self, url, token, method='get', data=None):
+        view_name = resolve(url).view_name
+        budget = settings.QUERY_BUDGETS[view_name]
+
+        with CaptureQueriesContext(connection) as queries:
+            if method == 'get':
+                response = self.client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}")
+            else:
+                response = self.client.post(
+                    url, data=json.dumps(data), content_type='application/json',
+                    HTTP_AUTHORIZATION=f"Bearer {token}",
+                )
+
+        self.assertLess(response.status_code, 300, response.content)
+        if len(queries) > budget:
+            statements = "\n".join(f"{n}. {query['sql']}" for n, query in enumerate(queries, 1))
+            self.fail(f"{view_name} ran {len(queries)} queries (budget {budget}):\n{statements}")
+        return response
+
+    def test_earning_meter(self):
+        self.assertWithinBudget('/api/earningmeter/dashboard/', self.child_token)
+
+    def test_chore_insights(self):
+        self.assertWithinBudget('/api/insighttracker/chores/insights/', self.parent_token)
+
+    def test_child_wallet_analysis(self):
+        self.assertWithinBudget('/api/familywallet/child-wallets/analysis/', self.parent_token)
+
+    def test_submit_quiz(self):
+        # The seed has already passed level 1 for every child
+        quiz = Quiz.objects.get(concept__level=2)
+        # A bigger curriculum must not cost more queries
+        Concept.objects.bulk_create([Concept(title=f"Extra {n}", level=3) for n in range(20)])
+        Reward.objects.bulk_create([Reward(concept=quiz.concept, name=f"Badge {n}") for n in range(20)])
+        answers = {
+            str(question.id): question.choices.get(is_correct=True).id
+            for question in quiz.questions.all()
+        }
+        response = self.assertWithinBudget(
+            '/api/moneymaze/quizzes/submit/', self.child_token,
+            method='post', data={'quiz_id': quiz.id, 'answers': answers},
+        )
+        self.assertTrue(response.json()['passed'])
+        self.assertEqual(
+            ConceptProgress.objects.filter(child=self.child, concept__level=3, unlocked=True).count(),
+            Concept.objects.filter(level=3).count(),
+        )
+        self.assertEqual(
+            RewardEarned.objects.filter(child=self.child, reward__concept=quiz.concept).count(),
+            Reward.objects.filter(concept=quiz.concept).count(),
+        )
+
+    def test_goal_summary(self):
+        self.assertWithinBudget('/api/goalgetter/goals/summary/', self.child_token)
+
+    def test_chore_list(self):
+        self.assertWithinBudget('/api/taskmaster/chores/', self.parent_token)
+
+    def test_transaction_list(self):
+        self.assertWithinBudget('/api/familywallet/transactions/', self.parent_token)
+
+    def test_dashboard_stats(self):
+        self.assertWithinBudget('/api/familywallet/wallet/dashboard_stats/', self.parent_token)
+
+    def test_child_home(self):
+        self.assertWithinBudget('/api/children/home/', self.child_token)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    METRICS_TOKEN='scrape-secret',
+    INTERNAL_IPS=['127.0.0.1'],
+)
+class MetricsEndpointTests(TestCase):
+    url = '/internal/metrics/'
+
+    def test_internal_address_alone_is_forbidden(self):
+        # The test client comes from 127.0.0.1, as every request does behind Nginx
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+
+    def test_token_is_authorized(self):
+        response = self.client.get(self.url, HTTP_AUTHORIZATION="Bearer scrape-secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+    @override_settings(METRICS_TOKEN='')
+    def test_no_token_configured_is_forbidden(self):
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION="Bearer ").status_code, 403)
+
+    @override_settings(METRICS_REQUIRE_TOKEN=False)
+    def test_internal_ips_without_token_when_requirement_is_off(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR='203.0.113.9').status_code, 403)
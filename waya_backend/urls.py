@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.urls import path, include, re_path # Make sure re_path is imported if you're using it (though not strictly necessary for this fix)
 from django.views.generic.base import RedirectView
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+from waya_backend.metrics import metrics_view
 
 # Commented out drf_yasg parts as you're using drf_spectacular
 # from drf_yasg.views import get_schema_view
@@ -56,6 +57,9 @@ urlpatterns = [
     path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
 
+    # Internal Prometheus scrape endpoint
+    path('internal/metrics/', metrics_view, name='metrics'),
+
 
     # # Swagger and Redoc URLs (drf_yasg - commented out)
     # # Ensure these remain commented out if you are fully switching to drf-spectacular